@@ -0,0 +1,96 @@
+"""Микробенчмарк кэша отрисованных экранов каталога и главного меню.
+
+Сравнивает сборку экранов на каждый запрос с выдачей из ``RenderCache``:
+время на одно обновление и объём выделенной памяти (tracemalloc).
+Требует тех же переменных окружения, что и бот; к базе данных не подключается.
+
+Запуск: ``PYTHONPATH=src python scripts/bench_render_cache.py``
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+import tracemalloc
+from datetime import date
+from typing import Callable
+
+from bot.handlers.common.start import MAIN_MENU_SCREEN_ID, _render_main_menu
+from bot.handlers.user.catalog import (
+    _get_subject_pages,
+    _get_subjects_screen,
+    _render_subject_pages,
+    _render_subjects_screen,
+)
+from bot.services.olympiad_service import (
+    DEMO_SUBJECTS,
+    CatalogSnapshot,
+    OlympiadInfo,
+    build_catalog_snapshot,
+)
+from bot.utils.render_cache import STATIC_SCREEN_VERSION, get_render_cache
+
+
+def _build_snapshot(olympiads_per_subject: int) -> CatalogSnapshot:
+    olympiads = [
+        OlympiadInfo(
+            id=index * len(DEMO_SUBJECTS) + offset,
+            subject_code=subject.code,
+            title=f"{subject.title}: олимпиада №{index}",
+            reg_deadline=date(2024, 9, 1 + index % 28),
+            round_date=date(2024, 11, 1 + index % 28),
+            description="Отборочный и заключительный этапы, очный и онлайн-формат.",
+        )
+        for index in range(olympiads_per_subject)
+        for offset, subject in enumerate(DEMO_SUBJECTS)
+    ]
+    return build_catalog_snapshot(DEMO_SUBJECTS, olympiads, version=1)
+
+
+def _update_uncached(snapshot: CatalogSnapshot) -> None:
+    _render_main_menu()
+    _render_subjects_screen(snapshot)
+    subject = snapshot.subjects_by_code["math"]
+    _render_subject_pages(subject.code, subject.title, snapshot.olympiads_by_subject["math"])
+
+
+def _update_cached(snapshot: CatalogSnapshot) -> None:
+    get_render_cache().get_or_render(
+        MAIN_MENU_SCREEN_ID, STATIC_SCREEN_VERSION, _render_main_menu
+    )
+    _get_subjects_screen(snapshot)
+    _get_subject_pages(snapshot, "math")
+
+
+def _measure(label: str, func: Callable[[], None], iterations: int) -> None:
+    func()
+    seconds = timeit.timeit(func, number=iterations)
+
+    tracemalloc.start()
+    for _ in range(iterations):
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size for stat in snapshot.statistics("filename"))
+
+    print(
+        f"{label:<10} {seconds / iterations * 1e6:10.1f} мкс/обновление"
+        f"  пик {peak / 1024:8.1f} КиБ  удержано {allocated / 1024:8.1f} КиБ"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--olympiads", type=int, default=40, help="олимпиад на предмет")
+    args = parser.parse_args()
+
+    snapshot = _build_snapshot(args.olympiads)
+    _measure("без кэша", lambda: _update_uncached(snapshot), args.iterations)
+    _measure("с кэшем", lambda: _update_cached(snapshot), args.iterations)
+    print(get_render_cache().stats())
+
+
+if __name__ == "__main__":
+    main()
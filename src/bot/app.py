@@ -14,13 +14,20 @@ from bot.handlers.common import help as help_router
 from bot.handlers.common import start as start_router
 from bot.handlers.user import calendar_sync_stub as calendar_sync_router
 from bot.handlers.user import catalog as catalog_router
+from bot.handlers.user import deadlines as deadlines_router
 from bot.handlers.user import favorites as favorites_router
 from bot.handlers.user import materials as materials_router
 from bot.handlers.user import subscription_stub as subscription_router
 from bot.handlers.user import universities as universities_router
 from bot.middlewares.subscription_gate import SubscriptionGateMiddleware
+from bot.services.followers_service import get_followers_service
+from bot.services.materials_service import get_materials_service
+from bot.services.olympiad_service import get_olympiad_service
+from bot.services.payments_service import get_payments_service
+from bot.services.universities_service import get_universities_service
 from bot.utils.logging import logger, setup_logging
 from bot.utils.scheduler import shutdown_scheduler, start_scheduler
+from bot.web.server import shutdown_web_server, start_web_server
 
 
 async def _set_default_commands(bot: Bot) -> None:
@@ -51,6 +58,7 @@ async def main() -> None:
     dp.include_router(help_router.router)
     dp.include_router(catalog_router.router)
     dp.include_router(favorites_router.router)
+    dp.include_router(deadlines_router.router)
     dp.include_router(materials_router.router)
     dp.include_router(subscription_router.router)
     dp.include_router(calendar_sync_router.router)
@@ -60,6 +68,13 @@ async def main() -> None:
 
     await bot.delete_webhook(drop_pending_updates=True)
     await _set_default_commands(bot)
+    olympiad_service = get_olympiad_service()
+    await olympiad_service.reload_catalog()
+    await olympiad_service.refresh_popularity()
+    await get_universities_service().reload()
+    get_materials_service().start_listener()
+    get_payments_service().start_worker()
+    await start_web_server()
 
     start_scheduler()
 
@@ -67,6 +82,11 @@ async def main() -> None:
         await dp.start_polling(bot)
     finally:
         shutdown_scheduler()
+        await shutdown_web_server()
+        await get_payments_service().stop_worker()
+        await get_materials_service().stop_listener()
+        # Не терять изменения счётчиков, накопленные после последнего сброса.
+        await get_followers_service().flush()
         logger.info("Остановка бота олимпиад")
 
 
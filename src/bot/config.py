@@ -24,6 +24,27 @@ class Settings(BaseSettings):
     google_client_id: str
     google_client_secret: str
     google_redirect_uri: str
+    google_auth_url: str = "https://accounts.google.com/o/oauth2/v2/auth"
+    google_token_url: str = "https://oauth2.googleapis.com/token"
+    google_api_base_url: str = "https://www.googleapis.com"
+    favorites_cache_max_users: int = 10_000
+    favorites_cache_ttl_seconds: int = 900
+    admin_materials_page_size: int = 10
+    link_check_concurrency: int = 20
+    link_check_host_interval_seconds: float = 1.0
+    link_check_ttl_hours: int = 24
+    web_host: str = "0.0.0.0"
+    web_port: int = 8080
+    public_base_url: str = "http://localhost:8080"
+    calendar_token_secret: str | None = None
+    calendar_token_cache_size: int = 10_000
+    calendar_sync_concurrency: int = 5
+    calendar_sync_account_interval_seconds: float = 1.0
+    pay_webhook_secret: str | None = None
+    subscription_cache_max_users: int = 50_000
+    subscription_cache_ttl_seconds: int = 300
+    subscription_period_days: int = 30
+    subscription_reminder_days: int = 3
 
     @field_validator("admin_ids", mode="before")
     @classmethod
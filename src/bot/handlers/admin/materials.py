@@ -2,20 +2,30 @@
 
 from __future__ import annotations
 
+from io import BytesIO
+
 from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message
 
-from typing import Sequence
-
 from ...config import get_config
 from ...keyboards.admin_menu import ADMIN_BACK_CALLBACK, ADMIN_MATERIALS_CALLBACK
+from ...services.materials_import import (
+    MaterialRowError,
+    MaterialsImportReport,
+    iter_material_rows,
+    validate_material_url,
+)
 from ...services.materials_service import (
-    AdminMaterial,
+    AdminMaterialsPage,
+    LinkStatus,
+    MaterialCategory,
+    MaterialsCursor,
     MaterialsService,
+    WriteOutcome,
     get_materials_service,
 )
 
@@ -26,9 +36,20 @@ _admin_ids = set(_settings.admin_ids)
 _service: MaterialsService = get_materials_service()
 
 ADD_MATERIAL_CALLBACK = "admin:materials:add"
+IMPORT_MATERIALS_CALLBACK = "admin:materials:import"
 EDIT_MATERIAL_PREFIX = "admin:materials:edit:"
 DELETE_MATERIAL_PREFIX = "admin:materials:delete:"
+ATTACH_DOCUMENT_PREFIX = "admin:materials:attach:"
+PAGE_MATERIALS_PREFIX = "admin:materials:page:"
 LIST_MATERIALS_CALLBACK = ADMIN_MATERIALS_CALLBACK
+CATEGORY_TITLES: dict[MaterialCategory, str] = {
+    MaterialCategory.PAST_PROBLEMS: "задачи прошлых лет",
+    MaterialCategory.THEORY: "теория",
+    MaterialCategory.ARTICLES: "статьи",
+    MaterialCategory.ADDITIONAL: "дополнительно",
+}
+# Бот не может скачать из Telegram файл больше 20 МБ.
+MAX_IMPORT_FILE_SIZE = 20 * 1024 * 1024
 
 
 class MaterialForm(StatesGroup):
@@ -37,25 +58,63 @@ class MaterialForm(StatesGroup):
     waiting_for_olympiad_id = State()
     waiting_for_title = State()
     waiting_for_url = State()
+    waiting_for_import_file = State()
+    waiting_for_document = State()
 
 
 def _is_admin(user_id: int | None) -> bool:
     return user_id is not None and user_id in _admin_ids
 
 
-def _format_materials_overview(materials: Sequence[AdminMaterial]) -> str:
-    if not materials:
+def _build_page_callback(olympiad_id: int | None, cursor: MaterialsCursor | None) -> str:
+    """Callback-данные страницы: фильтр по олимпиаде и токен позиции."""
+
+    scope = "-" if olympiad_id is None else str(olympiad_id)
+    token = cursor.encode() if cursor is not None else ""
+    return f"{PAGE_MATERIALS_PREFIX}{scope}:{token}"
+
+
+def _parse_page_callback(payload: str) -> tuple[int | None, MaterialsCursor | None]:
+    """Разобрать callback-данные страницы; ошибки ведут на первую страницу."""
+
+    body = payload.removeprefix(PAGE_MATERIALS_PREFIX)
+    raw_scope, _, token = body.partition(":")
+    olympiad_id = int(raw_scope) if raw_scope.isdigit() else None
+    cursor = MaterialsCursor.decode(token) if token else None
+    return olympiad_id, cursor
+
+
+def _format_materials_overview(page: AdminMaterialsPage) -> str:
+    scope = (
+        f" (олимпиада {page.olympiad_id})" if page.olympiad_id is not None else ""
+    )
+    if not page.items:
+        if not page.from_start:
+            return f"Материалы{scope}: на этой странице записей больше нет."
+        if page.olympiad_id is not None:
+            return f"Для олимпиады {page.olympiad_id} материалы ещё не добавлены."
         return (
             "Материалы ещё не добавлены."
             "\nИспользуйте кнопку «➕ Добавить материал», чтобы загрузить первый ресурс."
         )
 
-    lines = ["Материалы для подготовки:", ""]
-    for item in materials:
+    lines = [f"Материалы для подготовки{scope}:", ""]
+    for item in page.items:
         lines.append(
-            f"#{item.id}: {item.title} (олимпиада {item.olympiad_id})"
+            f"#{item.id}: {item.title}"
+            f" (олимпиада {item.olympiad_id}, {CATEGORY_TITLES[item.category]})"
         )
         lines.append(f"↗ {item.url}")
+        if item.link_status is LinkStatus.BROKEN:
+            status = f"HTTP {item.link_http_status}" if item.link_http_status else "нет ответа"
+            checked = (
+                f", проверено {item.link_checked_at:%d.%m.%Y %H:%M}"
+                if item.link_checked_at
+                else ""
+            )
+            lines.append(f"⚠️ Ссылка недоступна ({status}{checked})")
+        if item.document_name is not None:
+            lines.append(f"📎 Документ: {item.document_name}")
         if item.added_by_admin_id:
             lines.append(f"Добавил администратор: {item.added_by_admin_id}")
         lines.append("")
@@ -63,35 +122,81 @@ def _format_materials_overview(materials: Sequence[AdminMaterial]) -> str:
     return "\n".join(lines)
 
 
-def _build_materials_keyboard(materials: Sequence[AdminMaterial]):
+def _build_materials_keyboard(page: AdminMaterialsPage):
     from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
     inline_keyboard: list[list[InlineKeyboardButton]] = [
-        [InlineKeyboardButton(text="➕ Добавить материал", callback_data=ADD_MATERIAL_CALLBACK)]
+        [InlineKeyboardButton(text="➕ Добавить материал", callback_data=ADD_MATERIAL_CALLBACK)],
+        [
+            InlineKeyboardButton(
+                text="📥 Импорт из файла", callback_data=IMPORT_MATERIALS_CALLBACK
+            )
+        ],
     ]
-    for item in materials:
+    for item in page.items:
         inline_keyboard.append(
             [
                 InlineKeyboardButton(
                     text=f"✏️ Редактировать #{item.id}",
                     callback_data=f"{EDIT_MATERIAL_PREFIX}{item.id}",
                 ),
+                InlineKeyboardButton(
+                    text=f"📎 PDF #{item.id}",
+                    callback_data=f"{ATTACH_DOCUMENT_PREFIX}{item.id}",
+                ),
                 InlineKeyboardButton(
                     text=f"🗑 Удалить #{item.id}",
-                    callback_data=f"{DELETE_MATERIAL_PREFIX}{item.id}",
+                    callback_data=f"{DELETE_MATERIAL_PREFIX}{item.id}:{item.version}",
                 ),
             ]
         )
+
+    navigation: list[InlineKeyboardButton] = []
+    if page.newer is not None:
+        navigation.append(
+            InlineKeyboardButton(
+                text="◀️ Новее",
+                callback_data=_build_page_callback(page.olympiad_id, page.newer),
+            )
+        )
+    if page.older is not None:
+        navigation.append(
+            InlineKeyboardButton(
+                text="Старее ▶️",
+                callback_data=_build_page_callback(page.olympiad_id, page.older),
+            )
+        )
+    if navigation:
+        inline_keyboard.append(navigation)
+    if page.newer is not None or (not page.items and not page.from_start):
+        inline_keyboard.append(
+            [
+                InlineKeyboardButton(
+                    text="⏮ К первой странице",
+                    callback_data=_build_page_callback(page.olympiad_id, None),
+                )
+            ]
+        )
     inline_keyboard.append(
         [InlineKeyboardButton(text="⬅️ Назад", callback_data=ADMIN_BACK_CALLBACK)]
     )
     return InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
 
 
-async def _send_materials_overview(message: Message, *, edit: bool = False) -> None:
-    materials = await _service.list_admin_materials()
-    text = _format_materials_overview(materials)
-    keyboard = _build_materials_keyboard(materials)
+async def _send_materials_overview(
+    message: Message,
+    *,
+    edit: bool = False,
+    olympiad_id: int | None = None,
+    cursor: MaterialsCursor | None = None,
+) -> None:
+    page = await _service.list_admin_materials(
+        olympiad_id=olympiad_id,
+        cursor=cursor,
+        limit=_settings.admin_materials_page_size,
+    )
+    text = _format_materials_overview(page)
+    keyboard = _build_materials_keyboard(page)
     if edit:
         await message.edit_text(text, reply_markup=keyboard)
     else:
@@ -131,15 +236,44 @@ async def list_materials(callback: CallbackQuery) -> None:
     await _send_materials_overview(message, edit=True)
 
 
+@router.callback_query(F.data.startswith(PAGE_MATERIALS_PREFIX))
+async def list_materials_page(callback: CallbackQuery) -> None:
+    """Перейти на другую страницу списка материалов."""
+
+    if await _reject_non_admin(callback):
+        return
+
+    message = callback.message
+    if message is None:
+        await callback.answer()
+        return
+
+    olympiad_id, cursor = _parse_page_callback(callback.data or "")
+    await callback.answer()
+    await _send_materials_overview(
+        message, edit=True, olympiad_id=olympiad_id, cursor=cursor
+    )
+
+
 @router.message(Command("admin_materials"))
-async def list_materials_command(message: Message) -> None:
-    """Сервисная команда для быстрого доступа к управлению материалами."""
+async def list_materials_command(message: Message, command: CommandObject) -> None:
+    """Сервисная команда для быстрого доступа к управлению материалами.
+
+    Необязательный аргумент — ID олимпиады, по которой фильтруется список.
+    """
 
     if not _is_admin(message.from_user.id if message.from_user else None):
         await message.answer("Команда доступна только администраторам.")
         return
 
-    await _send_materials_overview(message, edit=False)
+    raw_id = (command.args or "").strip()
+    if raw_id and not raw_id.isdigit():
+        await message.answer("Укажите числовой ID олимпиады: /admin_materials 12")
+        return
+
+    await _send_materials_overview(
+        message, edit=False, olympiad_id=int(raw_id) if raw_id else None
+    )
 
 
 @router.callback_query(F.data == ADD_MATERIAL_CALLBACK)
@@ -166,6 +300,83 @@ async def start_add_material(callback: CallbackQuery, state: FSMContext) -> None
         )
 
 
+@router.callback_query(F.data == IMPORT_MATERIALS_CALLBACK)
+async def start_import_materials(callback: CallbackQuery, state: FSMContext) -> None:
+    """Запросить файл для пакетного импорта материалов."""
+
+    if await _reject_non_admin(callback):
+        return
+
+    await callback.answer()
+    await state.set_state(MaterialForm.waiting_for_import_file)
+    message = callback.message
+    if message is not None:
+        await message.answer(
+            "Отправьте файл CSV или JSON с полями olympiad_id, title, url"
+            " и необязательным category (past_problems, theory, articles, additional)."
+            "\nСсылки, которые уже есть у олимпиады, обновят существующие записи."
+        )
+
+
+def _format_import_report(report: MaterialsImportReport) -> str:
+    lines = [
+        "Импорт завершён.",
+        f"Добавлено: {report.inserted}",
+        f"Обновлено: {report.updated}",
+        f"Пропущено: {report.skipped}",
+    ]
+    if report.errors:
+        lines.append("")
+        lines.append("Ошибки:")
+        lines.extend(report.errors)
+    return "\n".join(lines)
+
+
+@router.message(MaterialForm.waiting_for_import_file, F.document)
+async def process_import_file(message: Message, state: FSMContext) -> None:
+    """Импортировать материалы из присланного документа."""
+
+    if await _reject_non_admin_message(message, state):
+        return
+
+    document = message.document
+    admin_id = message.from_user.id if message.from_user else None
+    if document is None or admin_id is None or message.bot is None:
+        return
+    if document.file_size and document.file_size > MAX_IMPORT_FILE_SIZE:
+        await message.answer("Файл больше 20 МБ. Разбейте его на несколько частей.")
+        return
+
+    await state.clear()
+    buffer = BytesIO()
+    await message.bot.download(document, destination=buffer)
+    buffer.seek(0)
+    try:
+        report = await _service.import_materials(
+            iter_material_rows(buffer, document.file_name or ""),
+            admin_tg_id=admin_id,
+        )
+    except UnicodeDecodeError:
+        await message.answer("Не удалось импортировать файл: нужна кодировка UTF-8.")
+        return
+    except ValueError as exc:
+        await message.answer(f"Не удалось импортировать файл: {exc}.")
+        return
+
+    await message.answer(_format_import_report(report))
+    await _send_materials_overview(message, edit=False)
+
+
+@router.message(MaterialForm.waiting_for_import_file)
+async def remind_import_file(message: Message, state: FSMContext) -> None:
+    """Напомнить, что для импорта нужен документ."""
+
+    if await _reject_non_admin_message(message, state):
+        return
+
+    await message.answer("Пришлите файл документом или выберите другое действие в меню.")
+
+
 @router.callback_query(F.data.startswith(EDIT_MATERIAL_PREFIX))
 async def start_edit_material(callback: CallbackQuery, state: FSMContext) -> None:
     """Начать процесс обновления материала."""
@@ -200,6 +411,7 @@ async def start_edit_material(callback: CallbackQuery, state: FSMContext) -> Non
         material_id=material.id,
         prev_title=material.title,
         prev_url=material.url,
+        version=material.version,
     )
 
     prompt = (
@@ -218,6 +430,71 @@ async def start_edit_material(callback: CallbackQuery, state: FSMContext) -> Non
         await message.answer(prompt)
 
 
+@router.callback_query(F.data.startswith(ATTACH_DOCUMENT_PREFIX))
+async def start_attach_document(callback: CallbackQuery, state: FSMContext) -> None:
+    """Запросить документ, который будет приложен к материалу."""
+
+    if await _reject_non_admin(callback):
+        return
+
+    payload = callback.data or ""
+    raw_id = payload.removeprefix(ATTACH_DOCUMENT_PREFIX)
+    try:
+        material_id = int(raw_id)
+    except ValueError:
+        await callback.answer("Некорректный идентификатор", show_alert=True)
+        return
+
+    await callback.answer()
+    await state.set_state(MaterialForm.waiting_for_document)
+    await state.update_data(material_id=material_id)
+    message = callback.message
+    if message is not None:
+        await message.answer(
+            f"Отправьте PDF или другой документ для материала #{material_id}."
+            "\nФайл загрузится в Telegram один раз и будет отправляться ученикам без"
+            " повторной загрузки."
+        )
+
+
+@router.message(MaterialForm.waiting_for_document, F.document)
+async def process_document(message: Message, state: FSMContext) -> None:
+    """Сохранить file_id присланного документа."""
+
+    if await _reject_non_admin_message(message, state):
+        return
+
+    document = message.document
+    data = await state.get_data()
+    material_id = data.get("material_id")
+    await state.clear()
+    if document is None or material_id is None:
+        await message.answer("Не удалось определить материал. Начните заново.")
+        return
+
+    attached = await _service.attach_document(
+        material_id=material_id,
+        file_id=document.file_id,
+        file_unique_id=document.file_unique_id,
+        file_name=document.file_name,
+    )
+    if not attached:
+        await message.answer("Материал не найден или был удалён.")
+        return
+    await message.answer("Документ прикреплён к материалу.")
+    await _send_materials_overview(message, edit=False)
+
+
+@router.message(MaterialForm.waiting_for_document)
+async def remind_document(message: Message, state: FSMContext) -> None:
+    """Напомнить, что нужен документ."""
+
+    if await _reject_non_admin_message(message, state):
+        return
+
+    await message.answer("Пришлите файл документом или выберите другое действие в меню.")
+
+
 @router.callback_query(F.data.startswith(DELETE_MATERIAL_PREFIX))
 async def delete_material(callback: CallbackQuery) -> None:
     """Удалить материал из базы."""
@@ -226,17 +503,27 @@ async def delete_material(callback: CallbackQuery) -> None:
         return
 
     payload = callback.data or ""
-    raw_id = payload.removeprefix(DELETE_MATERIAL_PREFIX)
+    raw_id, _, raw_version = payload.removeprefix(DELETE_MATERIAL_PREFIX).partition(":")
     try:
         material_id = int(raw_id)
+        version = int(raw_version) if raw_version else None
     except ValueError:
         await callback.answer("Некорректный идентификатор", show_alert=True)
         return
 
-    success = await _service.delete_material(material_id)
-    if not success:
+    outcome = await _service.delete_material(material_id, expected_version=version)
+    if outcome is WriteOutcome.NOT_FOUND:
         await callback.answer("Материал уже удалён", show_alert=True)
         return
+    if outcome is WriteOutcome.CONFLICT:
+        await callback.answer(
+            "Материал изменили после открытия списка. Проверьте его и повторите удаление.",
+            show_alert=True,
+        )
+        message = callback.message
+        if message is not None:
+            await _send_materials_overview(message, edit=True)
+        return
 
     await callback.answer("Материал удалён")
     message = callback.message
@@ -302,6 +589,15 @@ async def process_url(message: Message, state: FSMContext) -> None:
     if not url:
         await message.answer("Ссылка не может быть пустой. Попробуйте снова.")
         return
+    if len(url) > 1024:
+        await message.answer("Ссылка длиннее 1024 символов. Попробуйте снова.")
+        return
+    try:
+        validate_material_url(url)
+    except MaterialRowError as exc:
+        # Состояние не сбрасывается: администратор может сразу прислать исправленную ссылку.
+        await message.answer(f"Не удалось принять ссылку: {exc}. Попробуйте снова.")
+        return
 
     data = await state.get_data()
     olympiad_id = data.get("olympiad_id")
@@ -324,16 +620,25 @@ async def process_url(message: Message, state: FSMContext) -> None:
         if material_id is None:
             await message.answer("Не удалось определить материал для обновления.")
             return
-        updated = await _service.update_material(
+        outcome = await _service.update_material(
             material_id=material_id,
             olympiad_id=olympiad_id,
             title=title,
             url=url,
             admin_tg_id=admin_id,
+            expected_version=data.get("version"),
         )
-        if not updated:
+        if outcome is WriteOutcome.NOT_FOUND:
             await message.answer("Материал не найден или был удалён.")
             return
+        if outcome is WriteOutcome.CONFLICT:
+            await message.answer(
+                "Материал уже изменил другой администратор. Откройте его заново и повторите правку."
+            )
+            return
+        if outcome is WriteOutcome.DUPLICATE:
+            await message.answer("Такая ссылка уже есть у этой олимпиады.")
+            return
         await message.answer("Материал обновлён.")
     else:
         await _service.create_material(
@@ -8,12 +8,25 @@ from aiogram.types import Message
 
 from ...keyboards.main_menu import build_main_menu_keyboard
 from ...utils import texts
+from ...utils.render_cache import STATIC_SCREEN_VERSION, RenderedScreen, get_render_cache
 
 router = Router(name="common_start")
 
+MAIN_MENU_SCREEN_ID = "menu:main"
+
+
+def _render_main_menu() -> RenderedScreen:
+    return RenderedScreen(
+        text="\n".join(texts.START_GREETING_LINES),
+        reply_markup=build_main_menu_keyboard(),
+    )
+
+
 @router.message(CommandStart())
 async def handle_start(message: Message) -> None:
     """Отправить приветственное сообщение с главным меню."""
 
-    keyboard = build_main_menu_keyboard()
-    await message.answer("\n".join(texts.START_GREETING_LINES), reply_markup=keyboard)
+    screen = get_render_cache().get_or_render(
+        MAIN_MENU_SCREEN_ID, STATIC_SCREEN_VERSION, _render_main_menu
+    )
+    await message.answer(screen.text, reply_markup=screen.reply_markup)
@@ -3,10 +3,11 @@
 from __future__ import annotations
 
 from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
 
-from ...keyboards.calendar import build_calendar_keyboard
+from ...keyboards.calendar import build_calendar_keyboard, build_google_connect_keyboard
 from ...services.calendar_service_stub import get_calendar_service
 from ...utils import texts
 
@@ -15,11 +16,15 @@ router = Router(name="user_calendar_sync_stub")
 
 def _format_calendar_text(link: str) -> str:
     lines: list[str] = [texts.MAIN_MENU_CALENDAR, ""]
-    lines.extend(texts.CALENDAR_HINT)
+    lines.append(texts.CALENDAR_HINT)
     lines.append("")
     lines.append(f"🔗 Уникальная ссылка: {link}")
     lines.append("")
-    lines.append("После подключения вернитесь и подтвердите синхронизацию.")
+    lines.append(
+        "Добавьте ссылку в календарь как подписку (Google Календарь: «Добавить по URL»,"
+        " Apple Календарь: «Новая подписка на календарь»). События обновятся сами,"
+        " когда вы меняете избранное."
+    )
     return "\n".join(lines)
 
 
@@ -27,18 +32,24 @@ async def _send_calendar_screen(message: Message, link: str, *, edit: bool) -> N
     text = _format_calendar_text(link)
     keyboard = build_calendar_keyboard()
     if edit:
-        await message.edit_text(text, reply_markup=keyboard)
-    else:
-        await message.answer(text, reply_markup=keyboard)
+        try:
+            await message.edit_text(text, reply_markup=keyboard)
+            return
+        except TelegramBadRequest as exc:
+            # Ссылка постоянная: повторное нажатие не меняет экран.
+            if "message is not modified" in str(exc):
+                return
+    await message.answer(text, reply_markup=keyboard)
 
 
 @router.message(Command("calendar"))
 async def open_calendar_command(message: Message) -> None:
     """Показать раздел синхронизации по команде."""
 
+    if message.from_user is None:
+        return
     service = get_calendar_service()
-    user_id = message.from_user.id if message.from_user else 0
-    link = service.generate_unique_link(user_id)
+    link = await service.generate_unique_link(message.from_user.id)
     await _send_calendar_screen(message, link, edit=False)
 
 
@@ -51,33 +62,46 @@ async def open_calendar_from_menu(callback: CallbackQuery) -> None:
     if message is None:
         return
     service = get_calendar_service()
-    link = service.generate_unique_link(callback.from_user.id)
+    link = await service.generate_unique_link(callback.from_user.id)
     await _send_calendar_screen(message, link, edit=True)
 
 
 @router.callback_query(F.data == "calendar:link")
 async def refresh_calendar_link(callback: CallbackQuery) -> None:
-    """Сгенерировать новую уникальную ссылку."""
+    """Показать ссылку на ленту ещё раз."""
 
     service = get_calendar_service()
-    link = service.generate_unique_link(callback.from_user.id)
+    link = await service.generate_unique_link(callback.from_user.id)
     message = callback.message
     if message is not None:
         await _send_calendar_screen(message, link, edit=True)
-    await callback.answer("Ссылка обновлена")
+    await callback.answer("Ссылка готова")
+
+
+@router.callback_query(F.data == "calendar:rotate")
+async def rotate_calendar_link(callback: CallbackQuery) -> None:
+    """Перевыпустить ссылку, если прежняя попала к посторонним."""
+
+    service = get_calendar_service()
+    link = await service.rotate_link(callback.from_user.id)
+    message = callback.message
+    if message is not None:
+        await _send_calendar_screen(message, link, edit=True)
+    await callback.answer("Ссылка обновлена, прежняя больше не работает", show_alert=True)
 
 
 @router.callback_query(F.data == "calendar:confirm")
 async def confirm_calendar_sync(callback: CallbackQuery) -> None:
-    """Подтвердить синхронизацию (заглушка)."""
+    """Отправить ссылку на подключение Google Календаря."""
 
     service = get_calendar_service()
-    service.confirm_synchronization(callback.from_user.id)
-    await callback.answer("Готово!", show_alert=False)
+    url = service.google_connect_url(callback.from_user.id)
+    await callback.answer()
     message = callback.message
     if message is not None:
-        confirmation = "\n".join(texts.CONFIRM_CALENDAR_SYNC)
-        await message.answer(confirmation)
+        await message.answer(
+            texts.CONFIRM_CALENDAR_SYNC, reply_markup=build_google_connect_keyboard(url)
+        )
 
 
 __all__ = ["router"]
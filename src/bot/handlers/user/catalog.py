@@ -2,21 +2,56 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+from html import escape
+from typing import Any, Mapping, Sequence
+
 from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
 from ...keyboards.catalog import (
+    ADD_ALL_CALLBACK_PREFIX,
     BACK_TO_SUBJECTS_CALLBACK,
+    POPULAR_CALLBACK,
+    SELECT_PAGE_CALLBACK_PREFIX,
+    SELECT_SAVE_CALLBACK,
+    SELECT_TOGGLE_CALLBACK_PREFIX,
+    SUBJECT_CALLBACK_PREFIX,
+    build_multiselect_keyboard,
     build_olympiads_keyboard,
     build_subjects_keyboard,
+    parse_subject_page_callback,
 )
-from ...services.olympiad_service import get_olympiad_service
+from ...services.olympiad_service import CatalogSnapshot, OlympiadInfo, get_olympiad_service
 from ...utils import texts
+from ...utils.render_cache import RenderedScreen, get_render_cache
 
 
 router = Router(name="user_catalog")
 
+# Ограничения Telegram: 4096 символов в сообщении и 100 кнопок в клавиатуре.
+MESSAGE_TEXT_LIMIT = 4096
+OLYMPIADS_PER_PAGE = 8
+DESCRIPTION_LIMIT = 300
+
+SUBJECTS_SCREEN_ID = "catalog:subjects"
+SUBJECT_PAGES_SCREEN_ID = "catalog:pages"
+POPULAR_SCREEN_ID = "catalog:popular"
+SELECTION_STATE_KEY = "catalog_selection"
+# Подсказка режима выбора дописывается к готовой странице предмета.
+MULTISELECT_SUFFIX = "\n\n" + texts.CATALOG_MULTISELECT_HINT
+
+
+@dataclass(frozen=True, slots=True)
+class SubjectPage:
+    """Страница олимпиад предмета: готовый экран и олимпиады на ней."""
+
+    screen: RenderedScreen
+    olympiads: tuple[OlympiadInfo, ...]
+
 
 def _format_catalog_intro() -> str:
     lines = [texts.MAIN_MENU_CATALOG, ""]
@@ -24,36 +59,185 @@ def _format_catalog_intro() -> str:
     return "\n".join(lines)
 
 
-def _format_olympiads_text(subject_title: str, olympiads: list) -> str:
-    lines: list[str] = [f"📚 {subject_title}", ""]
-    if olympiads:
+def _format_olympiad_entry(item: OlympiadInfo) -> str:
+    details: list[str] = []
+    if item.reg_deadline:
+        details.append(f"регистрация до {item.reg_deadline.strftime('%d.%m.%Y')}")
+    if item.round_date:
+        details.append(f"тур {item.round_date.strftime('%d.%m.%Y')}")
+    suffix = f" ({', '.join(details)})" if details else ""
+    lines = [f"• {escape(item.title)}{suffix}"]
+    if item.description:
+        description = item.description
+        if len(description) > DESCRIPTION_LIMIT:
+            description = description[: DESCRIPTION_LIMIT - 1].rstrip() + "…"
+        lines.append(f"  {escape(description)}")
+    return "\n".join(lines)
+
+
+def _format_olympiads_text(
+    subject_title: str,
+    entries: Sequence[str],
+    *,
+    page: int = 0,
+    pages_total: int = 1,
+) -> str:
+    lines: list[str] = [f"📚 {escape(subject_title)}", ""]
+    if entries:
         lines.append("Доступные олимпиады:")
-        for item in olympiads:
-            details: list[str] = []
-            if item.reg_deadline:
-                details.append(f"регистрация до {item.reg_deadline.strftime('%d.%m.%Y')}")
-            if item.round_date:
-                details.append(f"тур {item.round_date.strftime('%d.%m.%Y')}")
-            suffix = f" ({', '.join(details)})" if details else ""
-            lines.append(f"• {item.title}{suffix}")
-            if item.description:
-                lines.append(f"  {item.description}")
+        lines.extend(entries)
         lines.append("")
+        if pages_total > 1:
+            lines.append(f"Страница {page + 1} из {pages_total}")
         lines.append("Нажмите кнопку ниже, чтобы добавить олимпиаду в ❤ Мои олимпиады.")
     else:
         lines.append("Список олимпиад для этого предмета появится позже.")
     return "\n".join(lines)
 
 
+def _split_into_pages(
+    subject_title: str, olympiads: Sequence[OlympiadInfo]
+) -> list[list[tuple[OlympiadInfo, str]]]:
+    """Разбить олимпиады на страницы по числу кнопок и длине текста."""
+
+    # Резерв под заголовок, подвал с номером страницы максимальной длины и
+    # подсказку режима выбора, с которой та же страница показывается там.
+    budget = (
+        MESSAGE_TEXT_LIMIT
+        - len(_format_olympiads_text(subject_title, ["x"], page=998, pages_total=999))
+        - len(MULTISELECT_SUFFIX)
+    )
+    pages: list[list[tuple[OlympiadInfo, str]]] = []
+    current: list[tuple[OlympiadInfo, str]] = []
+    used = 0
+    for item in olympiads:
+        entry = _format_olympiad_entry(item)
+        cost = len(entry) + 1
+        if current and (len(current) >= OLYMPIADS_PER_PAGE or used + cost > budget):
+            pages.append(current)
+            current, used = [], 0
+        current.append((item, entry))
+        used += cost
+    if current or not pages:
+        pages.append(current)
+    return pages
+
+
+def _render_subject_pages(
+    subject_code: str, subject_title: str, olympiads: Sequence[OlympiadInfo]
+) -> tuple[SubjectPage, ...]:
+    chunks = _split_into_pages(subject_title, olympiads)
+    pages_total = len(chunks)
+    rendered: list[SubjectPage] = []
+    for page, chunk in enumerate(chunks):
+        text = _format_olympiads_text(
+            subject_title,
+            [entry for _, entry in chunk],
+            page=page,
+            pages_total=pages_total,
+        )
+        keyboard = build_olympiads_keyboard(
+            [(item.id, item.title) for item, _ in chunk],
+            subject_code=subject_code,
+            page=page,
+            pages_total=pages_total,
+        )
+        rendered.append(
+            SubjectPage(
+                screen=RenderedScreen(text=text, reply_markup=keyboard),
+                olympiads=tuple(item for item, _ in chunk),
+            )
+        )
+    return tuple(rendered)
+
+
+def _render_all_subject_pages(
+    snapshot: CatalogSnapshot,
+) -> Mapping[str, tuple[SubjectPage, ...]]:
+    return {
+        subject.code: _render_subject_pages(
+            subject.code,
+            subject.title,
+            snapshot.olympiads_by_subject.get(subject.code, ()),
+        )
+        for subject in snapshot.subjects
+    }
+
+
+def _get_subject_pages(
+    snapshot: CatalogSnapshot, subject_code: str
+) -> tuple[SubjectPage, ...]:
+    """Вернуть страницы предмета, пересобрав их при смене версии каталога."""
+
+    pages_by_subject = get_render_cache().get_or_render(
+        SUBJECT_PAGES_SCREEN_ID,
+        snapshot.version,
+        lambda: _render_all_subject_pages(snapshot),
+    )
+    return pages_by_subject.get(subject_code, ())
+
+
+def _render_subjects_screen(snapshot: CatalogSnapshot) -> RenderedScreen:
+    subjects = [(subject.code, subject.title) for subject in snapshot.subjects]
+    return RenderedScreen(
+        text=_format_catalog_intro(),
+        reply_markup=build_subjects_keyboard(subjects),
+    )
+
+
+def _get_subjects_screen(snapshot: CatalogSnapshot) -> RenderedScreen:
+    """Вернуть экран со списком предметов для текущей версии каталога."""
+
+    return get_render_cache().get_or_render(
+        SUBJECTS_SCREEN_ID,
+        snapshot.version,
+        lambda: _render_subjects_screen(snapshot),
+    )
+
+
+def _format_followers(count: int) -> str:
+    if count % 10 == 1 and count % 100 != 11:
+        word = "подписчик"
+    elif count % 10 in (2, 3, 4) and count % 100 not in (12, 13, 14):
+        word = "подписчика"
+    else:
+        word = "подписчиков"
+    return f"{count} {word}"
+
+
+def _render_popular_screen(snapshot: CatalogSnapshot) -> RenderedScreen:
+    lines = [f"<b>{texts.CATALOG_POPULAR_TITLE}</b>", ""]
+    if not snapshot.popular:
+        lines.append(texts.CATALOG_POPULAR_EMPTY)
+    for position, item in enumerate(snapshot.popular, start=1):
+        lines.append(
+            f"{position}. <b>{escape(item.olympiad.title)}</b>"
+            f" — {_format_followers(item.followers)}"
+        )
+    return RenderedScreen(
+        text="\n".join(lines),
+        reply_markup=build_olympiads_keyboard(
+            [(item.olympiad.id, item.olympiad.title) for item in snapshot.popular]
+        ),
+    )
+
+
+def _get_popular_screen(snapshot: CatalogSnapshot) -> RenderedScreen:
+    """Вернуть экран рейтинга для текущей версии рейтинга популярности."""
+
+    return get_render_cache().get_or_render(
+        POPULAR_SCREEN_ID,
+        snapshot.popularity_version,
+        lambda: _render_popular_screen(snapshot),
+    )
+
+
 async def _show_subjects(message: Message, *, edit: bool = False) -> None:
-    service = get_olympiad_service()
-    subjects = [(subject.code, subject.title) for subject in service.list_subjects()]
-    keyboard = build_subjects_keyboard(subjects)
-    text = _format_catalog_intro()
+    screen = _get_subjects_screen(get_olympiad_service().snapshot)
     if edit:
-        await message.edit_text(text, reply_markup=keyboard)
+        await message.edit_text(screen.text, reply_markup=screen.reply_markup)
     else:
-        await message.answer(text, reply_markup=keyboard)
+        await message.answer(screen.text, reply_markup=screen.reply_markup)
 
 
 @router.message(Command("catalog"))
@@ -74,7 +258,19 @@ async def open_catalog_from_menu(callback: CallbackQuery) -> None:
     await _show_subjects(message, edit=False)
 
 
-@router.callback_query(F.data.startswith("subj:"))
+@router.callback_query(F.data == POPULAR_CALLBACK)
+async def handle_popular(callback: CallbackQuery) -> None:
+    """Показать олимпиады с наибольшим числом подписчиков."""
+
+    await callback.answer()
+    message = callback.message
+    if message is None:
+        return
+    screen = _get_popular_screen(get_olympiad_service().snapshot)
+    await message.edit_text(screen.text, reply_markup=screen.reply_markup)
+
+
+@router.callback_query(F.data.startswith(SUBJECT_CALLBACK_PREFIX))
 async def handle_subject_selection(callback: CallbackQuery) -> None:
     """Показать список олимпиад выбранного предмета."""
 
@@ -89,18 +285,16 @@ async def handle_subject_selection(callback: CallbackQuery) -> None:
         await _show_subjects(message, edit=True)
         return
 
-    _, _, subject_code = payload.partition(":")
+    subject_code, page = parse_subject_page_callback(payload)
 
-    service = get_olympiad_service()
-    subject = service.get_subject(subject_code)
-    if subject is None:
+    snapshot = get_olympiad_service().snapshot
+    pages = _get_subject_pages(snapshot, subject_code)
+    if not pages:
         await message.answer("Не удалось найти такой предмет в каталоге.")
         return
 
-    olympiads = list(service.list_olympiads(subject.code))
-    keyboard = build_olympiads_keyboard([(item.id, item.title) for item in olympiads])
-    text = _format_olympiads_text(subject.title, olympiads)
-    await message.edit_text(text, reply_markup=keyboard)
+    screen = pages[min(page, len(pages) - 1)].screen
+    await message.edit_text(screen.text, reply_markup=screen.reply_markup)
 
 
 @router.callback_query(F.data.startswith("olymp:"))
@@ -139,4 +333,153 @@ async def handle_add_to_favorites(callback: CallbackQuery) -> None:
         await callback.answer("Эта олимпиада уже в избранном", show_alert=True)
 
 
+def _format_bulk_confirmation(added: int, requested: int) -> str:
+    if not added:
+        return "Все выбранные олимпиады уже в ❤ Мои олимпиады."
+    lines = [texts.CONFIRM_FAVORITES_BULK_ADDED.format(count=added)]
+    if added < requested:
+        lines.append(f"Ещё {requested - added} уже были в избранном.")
+    return "\n".join(lines)
+
+
+async def _add_many(callback: CallbackQuery, olympiad_ids: Sequence[int]) -> int | None:
+    """Добавить олимпиады в избранное и отправить одно подтверждение."""
+
+    message = callback.message
+    if message is None:
+        await callback.answer("Команда доступна только в чате", show_alert=True)
+        return None
+
+    added = await get_olympiad_service().add_many_to_favorites(
+        tg_user_id=callback.from_user.id,
+        olympiad_ids=olympiad_ids,
+        username=callback.from_user.username,
+    )
+    await message.answer(_format_bulk_confirmation(len(added), len(olympiad_ids)))
+    await callback.answer("Готово ✨" if added else "Уже в избранном")
+    return len(added)
+
+
+@router.callback_query(F.data.startswith(ADD_ALL_CALLBACK_PREFIX))
+async def handle_add_all(callback: CallbackQuery) -> None:
+    """Добавить в избранное все олимпиады предмета."""
+
+    subject_code = (callback.data or "").removeprefix(ADD_ALL_CALLBACK_PREFIX)
+    olympiads = get_olympiad_service().list_olympiads(subject_code)
+    if not olympiads:
+        await callback.answer("Не удалось найти олимпиады предмета", show_alert=True)
+        return
+    await _add_many(callback, [item.id for item in olympiads])
+
+
+async def _show_selection(
+    message: Message, selection: dict[str, Any], *, edit: bool = True
+) -> bool:
+    """Показать страницу предмета в режиме выбора нескольких олимпиад."""
+
+    snapshot = get_olympiad_service().snapshot
+    pages = _get_subject_pages(snapshot, selection["subject"])
+    if not pages:
+        return False
+    page = min(selection["page"], len(pages) - 1)
+    current = pages[page]
+    text = current.screen.text + MULTISELECT_SUFFIX
+    keyboard = build_multiselect_keyboard(
+        [(item.id, item.title) for item in current.olympiads],
+        selected=set(selection["ids"]),
+        subject_code=selection["subject"],
+        page=page,
+        pages_total=len(pages),
+    )
+    if edit:
+        try:
+            await message.edit_text(text, reply_markup=keyboard)
+            return True
+        except TelegramBadRequest:
+            pass
+    await message.answer(text, reply_markup=keyboard)
+    return True
+
+
+@router.callback_query(F.data.startswith(SELECT_PAGE_CALLBACK_PREFIX))
+async def handle_selection_page(callback: CallbackQuery, state: FSMContext) -> None:
+    """Включить режим выбора или перелистнуть страницу в нём."""
+
+    body = (callback.data or "").removeprefix(SELECT_PAGE_CALLBACK_PREFIX)
+    subject_code, _, raw_page = body.rpartition(":")
+    try:
+        page = max(int(raw_page), 0)
+    except ValueError:
+        await callback.answer("Не удалось открыть страницу", show_alert=True)
+        return
+
+    await callback.answer()
+    message = callback.message
+    if message is None:
+        return
+
+    data = await state.get_data()
+    selection = data.get(SELECTION_STATE_KEY) or {}
+    if selection.get("subject") != subject_code:
+        selection = {"subject": subject_code, "ids": []}
+    selection["page"] = page
+    await state.update_data({SELECTION_STATE_KEY: selection})
+
+    if not await _show_selection(message, selection):
+        await message.answer("Не удалось найти такой предмет в каталоге.")
+
+
+@router.callback_query(F.data.startswith(SELECT_TOGGLE_CALLBACK_PREFIX))
+async def handle_selection_toggle(callback: CallbackQuery, state: FSMContext) -> None:
+    """Отметить олимпиаду или снять отметку в режиме выбора."""
+
+    raw_id = (callback.data or "").removeprefix(SELECT_TOGGLE_CALLBACK_PREFIX)
+    data = await state.get_data()
+    selection = data.get(SELECTION_STATE_KEY)
+    try:
+        olympiad_id = int(raw_id)
+    except ValueError:
+        olympiad_id = None
+    if olympiad_id is None or not selection:
+        await callback.answer("Откройте выбор заново", show_alert=True)
+        return
+
+    ids: list[int] = selection["ids"]
+    if olympiad_id in ids:
+        ids.remove(olympiad_id)
+    else:
+        ids.append(olympiad_id)
+    await state.update_data({SELECTION_STATE_KEY: selection})
+
+    await callback.answer()
+    message = callback.message
+    if message is not None:
+        await _show_selection(message, selection)
+
+
+@router.callback_query(F.data == SELECT_SAVE_CALLBACK)
+async def handle_selection_save(callback: CallbackQuery, state: FSMContext) -> None:
+    """Добавить отмеченные олимпиады в избранное одной операцией."""
+
+    data = await state.get_data()
+    selection = data.get(SELECTION_STATE_KEY)
+    if not selection or not selection["ids"]:
+        await callback.answer("Отметьте хотя бы одну олимпиаду", show_alert=True)
+        return
+
+    added = await _add_many(callback, selection["ids"])
+    if added is None:
+        return
+    await state.update_data({SELECTION_STATE_KEY: None})
+
+    message = callback.message
+    pages = _get_subject_pages(get_olympiad_service().snapshot, selection["subject"])
+    if message is not None and pages:
+        screen = pages[min(selection["page"], len(pages) - 1)].screen
+        try:
+            await message.edit_text(screen.text, reply_markup=screen.reply_markup)
+        except TelegramBadRequest:
+            pass
+
+
 __all__ = ["router"]
@@ -0,0 +1,186 @@
+"""Маршрутизатор ближайших дат регистрации и туров."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from html import escape
+from typing import Sequence
+
+from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, CommandObject
+from aiogram.types import CallbackQuery, Message
+
+from ...keyboards.deadlines import (
+    DEADLINES_CALLBACK_PREFIX,
+    DeadlinesScope,
+    build_deadlines_keyboard,
+    parse_deadlines_callback,
+)
+from ...services.favorites_service import get_favorites_service
+from ...services.olympiad_service import CatalogEvent, get_olympiad_service
+from ...utils import texts
+from ...utils.render_cache import RenderedScreen, get_render_cache
+
+router = Router(name="user_deadlines")
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 365
+MAX_EVENTS_SHOWN = 40
+# Ограничение Telegram на длину сообщения.
+MESSAGE_TEXT_LIMIT = 4096
+HIDDEN_EVENTS_TEMPLATE = "И ещё {hidden}. Сократите период, чтобы увидеть все даты."
+
+_EVENT_LABELS = {
+    "reg_deadline": "окончание регистрации",
+    "round": "тур",
+}
+
+
+def _format_deadlines_text(
+    events: Sequence[CatalogEvent], *, scope: DeadlinesScope, days: int
+) -> str:
+    scope_title = "ваших олимпиад" if scope == "fav" else "всех олимпиад"
+    lines: list[str] = [texts.MAIN_MENU_DEADLINES, "", texts.DEADLINES_HINT, ""]
+    lines.append(f"Даты {scope_title} на {days} дн.:")
+
+    if not events:
+        if scope == "fav":
+            lines.append("В этот период у избранных олимпиад нет важных дат.")
+        else:
+            lines.append("В этот период важных дат нет.")
+        return "\n".join(lines)
+
+    # Длинные названия упираются в лимит раньше, чем в MAX_EVENTS_SHOWN:
+    # резервируем место под подвал и добавляем даты, пока они помещаются.
+    budget = (
+        MESSAGE_TEXT_LIMIT
+        - len("\n".join(lines))
+        - len(HIDDEN_EVENTS_TEMPLATE.format(hidden=len(events)))
+        - 2
+    )
+    shown = 0
+    current_day = None
+    for event in events[:MAX_EVENTS_SHOWN]:
+        block: list[str] = []
+        if event.day != current_day:
+            block.extend(("", f"📌 {event.day.strftime('%d.%m.%Y')}"))
+        block.append(f"• {escape(event.olympiad.title)} — {_EVENT_LABELS[event.kind]}")
+        cost = sum(len(line) + 1 for line in block)
+        if cost > budget:
+            break
+        budget -= cost
+        lines.extend(block)
+        current_day = event.day
+        shown += 1
+
+    hidden = len(events) - shown
+    if hidden > 0:
+        lines.append("")
+        lines.append(HIDDEN_EVENTS_TEMPLATE.format(hidden=hidden))
+    return "\n".join(lines)
+
+
+async def _build_deadlines_screen(
+    tg_user_id: int, *, scope: DeadlinesScope, days: int
+) -> RenderedScreen:
+    service = get_olympiad_service()
+    today = datetime.now(tz=timezone.utc).date()
+    keyboard = build_deadlines_keyboard(scope=scope, days=days)
+
+    if scope == "fav":
+        favorite_ids = await get_favorites_service().get_favorite_ids(tg_user_id=tg_user_id)
+        events = service.list_upcoming_events(days=days, today=today, olympiad_ids=favorite_ids)
+        return RenderedScreen(
+            text=_format_deadlines_text(events, scope=scope, days=days),
+            reply_markup=keyboard,
+        )
+
+    def render() -> RenderedScreen:
+        events = service.list_upcoming_events(days=days, today=today)
+        return RenderedScreen(
+            text=_format_deadlines_text(events, scope=scope, days=days),
+            reply_markup=keyboard,
+        )
+
+    return get_render_cache().get_or_render(
+        f"deadlines:all:{days}:{today.isoformat()}",
+        service.snapshot.version,
+        render,
+    )
+
+
+async def _send_deadlines(
+    message: Message,
+    tg_user_id: int,
+    *,
+    scope: DeadlinesScope,
+    days: int,
+    edit: bool,
+) -> None:
+    screen = await _build_deadlines_screen(tg_user_id, scope=scope, days=days)
+    if edit:
+        try:
+            await message.edit_text(screen.text, reply_markup=screen.reply_markup)
+            return
+        except TelegramBadRequest:
+            pass
+    await message.answer(screen.text, reply_markup=screen.reply_markup)
+
+
+@router.message(Command("deadlines"))
+async def handle_deadlines_command(message: Message, command: CommandObject) -> None:
+    """Показать ближайшие даты; необязательный аргумент — число дней."""
+
+    user = message.from_user
+    if user is None:
+        return
+
+    days = DEFAULT_DAYS
+    if command.args:
+        try:
+            days = int(command.args.strip())
+        except ValueError:
+            await message.answer("Укажите период числом дней, например: /deadlines 14")
+            return
+    days = min(max(days, 1), MAX_DAYS)
+    await _send_deadlines(message, user.id, scope="all", days=days, edit=False)
+
+
+@router.callback_query(F.data == "menu:deadlines")
+async def open_deadlines_from_menu(callback: CallbackQuery) -> None:
+    """Открыть ближайшие даты из главного меню."""
+
+    await callback.answer()
+    message = callback.message
+    if message is None:
+        return
+    await _send_deadlines(
+        message, callback.from_user.id, scope="all", days=DEFAULT_DAYS, edit=False
+    )
+
+
+@router.callback_query(F.data.startswith(DEADLINES_CALLBACK_PREFIX))
+async def switch_deadlines_view(callback: CallbackQuery) -> None:
+    """Сменить период или набор олимпиад на экране ближайших дат."""
+
+    parsed = parse_deadlines_callback(callback.data or "")
+    if parsed is None:
+        await callback.answer("Не удалось открыть раздел", show_alert=True)
+        return
+
+    await callback.answer()
+    message = callback.message
+    if message is None:
+        return
+    scope, days = parsed
+    await _send_deadlines(
+        message,
+        callback.from_user.id,
+        scope=scope,
+        days=min(max(days, 1), MAX_DAYS),
+        edit=True,
+    )
+
+
+__all__ = ["router"]
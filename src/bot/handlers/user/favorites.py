@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from html import escape
 from typing import Sequence
 
 from aiogram import F, Router
@@ -35,9 +36,9 @@ async def _format_favorites_text(tg_user_id: int) -> tuple[str, Sequence[Favorit
             if item.round_date:
                 meta.append(f"тур {item.round_date.strftime('%d.%m.%Y')}")
             suffix = f" ({', '.join(meta)})" if meta else ""
-            lines.append(f"• {item.title}{suffix}")
+            lines.append(f"• {escape(item.title)}{suffix}")
             if item.description:
-                lines.append(f"  {item.description}")
+                lines.append(f"  {escape(item.description)}")
         lines.extend(
             [
                 "",
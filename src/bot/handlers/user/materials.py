@@ -2,47 +2,118 @@
 
 from __future__ import annotations
 
+from html import escape
+from typing import Sequence
+
 from aiogram import F, Router
-from aiogram.types import CallbackQuery, Message
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InputMediaDocument, Message
 
 from ...keyboards.favorites import MATERIALS_CALLBACK_PREFIX
-from ...services.materials_service import get_materials_service
+from ...services.materials_service import MaterialLink, get_materials_service
 from ...services.olympiad_service import get_olympiad_service
+from ...utils.logging import logger
+from ...utils.render_cache import RenderCache
 
 router = Router(name="user_materials")
 
+# Тексты подборок по олимпиадам; ключ включает версию каталога (название
+# олимпиады), а версия записи — поколение материалов олимпиады.
+TEXTS_CACHE_SIZE = 4096
+_texts = RenderCache(maxsize=TEXTS_CACHE_SIZE)
+# Telegram принимает в одном sendMediaGroup от 2 до 10 файлов.
+MEDIA_GROUP_LIMIT = 10
+# Ограничение Telegram на длину сообщения.
+MESSAGE_TEXT_LIMIT = 4096
+NO_MATERIALS_LINE = "• материалы появятся позже"
+
+
+def _format_link(link: MaterialLink) -> str:
+    # Названия и ссылки приходят из импорта, а бот работает с parse_mode HTML.
+    suffix = " 📎" if link.file_id else ""
+    return f"• {escape(link.title)} — {escape(link.url)}{suffix}"
+
+
+async def _send_documents(message: Message, documents: Sequence[MaterialLink]) -> None:
+    """Отправить приложенные документы по сохранённым file_id.
+
+    Файлы не загружаются заново, а группы до десяти документов уходят
+    одним вызовом ``sendMediaGroup``.
+    """
+
+    for start in range(0, len(documents), MEDIA_GROUP_LIMIT):
+        chunk = documents[start : start + MEDIA_GROUP_LIMIT]
+        try:
+            if len(chunk) == 1:
+                await message.answer_document(chunk[0].file_id, caption=escape(chunk[0].title))
+            else:
+                await message.answer_media_group(
+                    [
+                        InputMediaDocument(media=link.file_id, caption=escape(link.title))
+                        for link in chunk
+                    ]
+                )
+        except TelegramBadRequest as exc:
+            logger.warning("Не удалось отправить документы материалов: {error}", error=exc)
+
+
+def _hidden_line(hidden: int) -> str:
+    return f"• …и ещё {hidden}"
+
 
 def _format_materials_text(olympiad_title: str, bundle) -> str:
-    """Сформировать текст с подборкой материалов."""
+    """Сформировать текст с подборкой материалов.
 
-    lines = ["📚 Материалы для подготовки", ""]
-    lines.append(f"Для олимпиады: {olympiad_title}")
-    lines.append("")
+    Импорт загружает материалы сезона целиком, поэтому ссылки каждого раздела
+    добавляются, пока текст укладывается в лимит Telegram; остаток раздела
+    заменяется строкой «и ещё N».
+    """
 
-    categories = [
-        ("Задачи прошлых лет", bundle.past_problems),
-        ("Теория и видеоразборы", bundle.theory),
-        ("Полезные статьи и методички", bundle.articles),
+    sections: list[tuple[str, Sequence[MaterialLink]]] = [
+        ("Задачи прошлых лет:", bundle.past_problems),
+        ("Теория и видеоразборы:", bundle.theory),
+        ("Полезные статьи и методички:", bundle.articles),
     ]
-    for title, links in categories:
-        lines.append(f"{title}:")
-        if links:
-            for link in links:
-                lines.append(f"• {link.title} — {link.url}")
-        else:
-            lines.append("• материалы появятся позже")
-        lines.append("")
-
     if bundle.additional:
-        lines.append("Дополнительные материалы от администраторов:")
-        for link in bundle.additional:
-            lines.append(f"• {link.title} — {link.url}")
+        sections.append(("Дополнительные материалы от администраторов:", bundle.additional))
+    header = ["📚 Материалы для подготовки", "", f"Для олимпиады: {escape(olympiad_title)}", ""]
+    footer = [
+        "Не нашли нужное? Нажмите «📚 Материалы для подготовки» в разделе ❤ Мои олимпиады,",
+        "и мы добавим новые материалы вручную.",
+    ]
+
+    # Заголовки, подвал и строка «и ещё N» у каждого непустого раздела
+    # выводятся всегда; оставшееся место делится между разделами поровну,
+    # а неиспользованная часть переходит к следующим.
+    fixed = sum(len(line) + 1 for line in header + footer)
+    for title, links in sections:
+        fixed += len(title) + 2
+        fixed += len(_hidden_line(len(links))) + 1 if links else len(NO_MATERIALS_LINE) + 1
+    budget = MESSAGE_TEXT_LIMIT - fixed
+
+    lines = list(header)
+    for index, (title, links) in enumerate(sections):
+        lines.append(title)
+        if not links:
+            lines.append(NO_MATERIALS_LINE)
+            lines.append("")
+            continue
+        share = budget // (len(sections) - index)
+        used = 0
+        shown = 0
+        for link in links:
+            line = _format_link(link)
+            if used + len(line) + 1 > share:
+                break
+            lines.append(line)
+            used += len(line) + 1
+            shown += 1
+        budget -= used
+        if shown < len(links):
+            lines.append(_hidden_line(len(links) - shown))
         lines.append("")
 
-    lines.append(
-        "Не нашли нужное? Нажмите «📚 Материалы для подготовки» в разделе ❤ Мои олимпиады,"
-    )
-    lines.append("и мы добавим новые материалы вручную.")
+    lines.extend(footer)
     return "\n".join(lines).strip()
 
 
@@ -68,16 +139,24 @@ async def show_favorite_materials(callback: CallbackQuery) -> None:
         return
 
     materials_service = get_materials_service()
+    generation = materials_service.generation(olympiad_id)
     bundle = await materials_service.get_materials(olympiad_id)
 
-    olympiad_service = get_olympiad_service()
-    olympiad = olympiad_service.get_olympiad(olympiad_id)
+    snapshot = get_olympiad_service().snapshot
+    olympiad = snapshot.olympiads_by_id.get(olympiad_id)
     title = olympiad.title if olympiad else "выбранная олимпиада"
 
     message = callback.message
     if message is not None:
-        text = _format_materials_text(title, bundle)
+        text = _texts.get_or_render(
+            f"materials:{olympiad_id}:{snapshot.version}",
+            generation,
+            lambda: _format_materials_text(title, bundle),
+        )
         await message.answer(text, disable_web_page_preview=True)
+        documents = bundle.documents()
+        if documents:
+            await _send_documents(message, documents)
     await callback.answer("Материалы отправлены")
 
 
@@ -37,11 +37,14 @@ async def _show_subscription_overview(
     edit: bool,
 ) -> None:
     service = get_subscription_service()
-    is_subscribed = await service.is_subscribed(tg_user_id=tg_user_id)
+    status = await service.get_status(tg_user_id=tg_user_id)
+    is_subscribed = status.is_active()
     text_lines = (
         texts.SUBSCRIPTION_ACTIVE_LINES if is_subscribed else texts.SUBSCRIPTION_INTRO_LINES
     )
     text = _join_lines(text_lines)
+    if is_subscribed and status.expires_at is not None:
+        text = f"{text}\n{texts.SUBSCRIPTION_EXPIRES_LINE.format(date=status.expires_at)}"
     keyboard = build_subscription_overview_keyboard(is_subscribed=is_subscribed)
 
     if edit:
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from html import escape
 from typing import Sequence
 
 from aiogram import F, Router
@@ -21,9 +22,15 @@ from ...services.universities_service import (
     get_universities_service,
 )
 from ...utils import texts
+from ...utils.render_cache import STATIC_SCREEN_VERSION, RenderCache, RenderedScreen
 
 router = Router(name="user_universities")
 
+# Экраны зависят от набора избранного, поэтому хранятся отдельно от общего
+# кэша экранов каталога и не вытесняют его.
+SCREENS_CACHE_SIZE = 4096
+_screens = RenderCache(maxsize=SCREENS_CACHE_SIZE)
+
 
 def _format_universities_overview(
     recommendations: Sequence[UniversityRecommendation],
@@ -43,16 +50,19 @@ def _format_universities_overview(
 
     lines.append("Подобрали университеты, где учитывают ваши олимпиады:")
     for item in recommendations:
-        lines.append(f"• {item.name}")
-        lines.append(f"  {item.description}")
+        lines.append(f"• {escape(item.name)}")
+        if item.description:
+            lines.append(f"  {escape(item.description)}")
         if item.matched_olympiads:
             lines.append(
-                "  Подходит за: " + ", ".join(sorted(item.matched_olympiads)) + "."
+                "  Подходит за: "
+                + ", ".join(escape(title) for title in sorted(item.matched_olympiads))
+                + "."
             )
         if item.benefits:
             lines.append("  Льготы:")
             for benefit in item.benefits:
-                lines.append(f"    • {benefit}")
+                lines.append(f"    • {escape(benefit)}")
         lines.append("")
 
     return "\n".join(lines).strip()
@@ -61,27 +71,29 @@ def _format_universities_overview(
 def _format_university_details(detail: UniversityDetail) -> str:
     """Подготовить текст детализации по одному ВУЗу."""
 
-    lines: list[str] = [f"🎓 {detail.name}", ""]
-    lines.append(detail.description)
-    lines.append("")
+    lines: list[str] = [f"🎓 {escape(detail.name)}", ""]
+    if detail.description:
+        lines.append(escape(detail.description))
+        lines.append("")
     if detail.matched_olympiads:
         lines.append("Ваши достижения учитываются в приёме:")
         for title in sorted(detail.matched_olympiads):
-            lines.append(f"• {title}")
+            lines.append(f"• {escape(title)}")
         lines.append("")
     if detail.benefits:
         lines.append("Какие льготы доступны:")
         for benefit in detail.benefits:
-            lines.append(f"• {benefit}")
+            lines.append(f"• {escape(benefit)}")
         lines.append("")
     if detail.faculties:
         lines.append("Факультеты и направления:")
         for faculty in detail.faculties:
-            lines.append(f"🏫 {faculty.title}")
-            lines.append(f"   {faculty.description}")
+            lines.append(f"🏫 {escape(faculty.title)}")
+            if faculty.description:
+                lines.append(f"   {escape(faculty.description)}")
             if faculty.benefits:
                 for benefit in faculty.benefits:
-                    lines.append(f"   • {benefit}")
+                    lines.append(f"   • {escape(benefit)}")
             lines.append("")
     return "\n".join(lines).strip()
 
@@ -95,19 +107,38 @@ async def _send_universities_overview(
     """Показать список рекомендованных ВУЗов."""
 
     service = get_universities_service()
-    recommendations = await service.list_recommendations(tg_user_id=tg_user_id)
-    text = _format_universities_overview(recommendations)
-    keyboard = build_universities_keyboard(
-        [(item.id, item.name) for item in recommendations]
+    recommendation_set = await service.get_recommendation_set(tg_user_id=tg_user_id)
+    screen = _screens.get_or_render(
+        f"universities:list:{recommendation_set.key}",
+        STATIC_SCREEN_VERSION,
+        lambda: _render_universities_overview(recommendation_set.recommendations),
     )
 
     if edit:
         try:
-            await message.edit_text(text, reply_markup=keyboard)
+            await message.edit_text(screen.text, reply_markup=screen.reply_markup)
             return
         except TelegramBadRequest:
             pass
-    await message.answer(text, reply_markup=keyboard)
+    await message.answer(screen.text, reply_markup=screen.reply_markup)
+
+
+def _render_universities_overview(
+    recommendations: Sequence[UniversityRecommendation],
+) -> RenderedScreen:
+    return RenderedScreen(
+        text=_format_universities_overview(recommendations),
+        reply_markup=build_universities_keyboard(
+            [(item.id, item.name) for item in recommendations]
+        ),
+    )
+
+
+def _render_university_details(detail: UniversityDetail) -> RenderedScreen:
+    return RenderedScreen(
+        text=_format_university_details(detail),
+        reply_markup=build_university_details_keyboard(),
+    )
 
 
 @router.message(Command("universities"))
@@ -160,21 +191,23 @@ async def open_university_details(callback: CallbackQuery) -> None:
         return
 
     service = get_universities_service()
-    detail = await service.get_details(
-        tg_user_id=callback.from_user.id, university_id=university_id
-    )
+    recommendation_set = await service.get_recommendation_set(tg_user_id=callback.from_user.id)
+    detail = service.get_details_for(recommendation_set, university_id)
     if detail is None:
         await message.answer(
             "Информация недоступна. Убедитесь, что подходящие олимпиады добавлены в избранное.",
         )
         return
 
-    text = _format_university_details(detail)
-    keyboard = build_university_details_keyboard()
+    screen = _screens.get_or_render(
+        f"universities:detail:{recommendation_set.key}:{university_id}",
+        STATIC_SCREEN_VERSION,
+        lambda: _render_university_details(detail),
+    )
     try:
-        await message.edit_text(text, reply_markup=keyboard)
+        await message.edit_text(screen.text, reply_markup=screen.reply_markup)
     except TelegramBadRequest:
-        await message.answer(text, reply_markup=keyboard)
+        await message.answer(screen.text, reply_markup=screen.reply_markup)
 
 
 __all__ = ["router"]
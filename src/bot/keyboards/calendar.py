@@ -10,7 +10,8 @@ from ..utils import texts
 
 CALENDAR_BUTTONS: tuple[tuple[str, str], ...] = (
     ("🔗 Получить ссылку", "calendar:link"),
-    ("✅ Подтвердить синхронизацию", "calendar:confirm"),
+    ("♻️ Перевыпустить ссылку", "calendar:rotate"),
+    ("✅ Подключить Google Календарь", "calendar:confirm"),
     (texts.MAIN_MENU_FAVORITES, "menu:favorites"),
 )
 
@@ -25,4 +26,12 @@ def build_calendar_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-__all__ = ["build_calendar_keyboard"]
+def build_google_connect_keyboard(url: str) -> InlineKeyboardMarkup:
+    """Кнопка перехода на страницу согласия Google."""
+
+    builder = InlineKeyboardBuilder()
+    builder.button(text="🔐 Разрешить доступ", url=url)
+    return builder.as_markup()
+
+
+__all__ = ["build_calendar_keyboard", "build_google_connect_keyboard"]
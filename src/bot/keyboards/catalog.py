@@ -2,13 +2,43 @@
 
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections.abc import Collection, Sequence
 
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 
+SUBJECT_CALLBACK_PREFIX = "subj:"
 BACK_TO_SUBJECTS_CALLBACK = "subj:__back__"
+ADD_ALL_CALLBACK_PREFIX = "favall:"
+SELECT_PAGE_CALLBACK_PREFIX = "sel:page:"
+SELECT_TOGGLE_CALLBACK_PREFIX = "sel:tog:"
+SELECT_SAVE_CALLBACK = "sel:save"
+POPULAR_CALLBACK = "catalog:popular"
+
+
+def build_subject_page_callback(subject_code: str, page: int) -> str:
+    """Собрать callback-данные страницы предмета в компактном виде."""
+
+    if page <= 0:
+        return f"{SUBJECT_CALLBACK_PREFIX}{subject_code}"
+    return f"{SUBJECT_CALLBACK_PREFIX}{subject_code}:{page}"
+
+
+def parse_subject_page_callback(payload: str) -> tuple[str, int]:
+    """Разобрать callback-данные страницы предмета.
+
+    Возвращает код предмета и номер страницы (с нуля). Некорректный номер
+    страницы трактуется как первая страница.
+    """
+
+    body = payload.removeprefix(SUBJECT_CALLBACK_PREFIX)
+    subject_code, _, raw_page = body.partition(":")
+    try:
+        page = int(raw_page) if raw_page else 0
+    except ValueError:
+        page = 0
+    return subject_code, max(page, 0)
 
 
 def build_subjects_keyboard(subjects: Sequence[tuple[str, str]]) -> InlineKeyboardMarkup:
@@ -16,29 +46,121 @@ def build_subjects_keyboard(subjects: Sequence[tuple[str, str]]) -> InlineKeyboa
 
     builder = InlineKeyboardBuilder()
     for code, title in subjects:
-        builder.button(text=title, callback_data=f"subj:{code}")
-    if not subjects:
+        builder.button(text=title, callback_data=build_subject_page_callback(code, 0))
+    if subjects:
+        builder.button(text="🔥 Популярные олимпиады", callback_data=POPULAR_CALLBACK)
+    else:
         builder.button(text="Каталог временно пуст", callback_data=BACK_TO_SUBJECTS_CALLBACK)
     builder.adjust(1)
     return builder.as_markup()
 
 
 def build_olympiads_keyboard(
-    olympiads: Sequence[tuple[int, str]], *, include_back: bool = True
+    olympiads: Sequence[tuple[int, str]],
+    *,
+    subject_code: str | None = None,
+    page: int = 0,
+    pages_total: int = 1,
+    include_back: bool = True,
 ) -> InlineKeyboardMarkup:
-    """Построить клавиатуру со списком олимпиад выбранного предмета."""
+    """Построить клавиатуру со списком олимпиад одной страницы предмета.
+
+    При нескольких страницах добавляется строка навигации «назад/вперёд».
+    """
 
     builder = InlineKeyboardBuilder()
     for olympiad_id, title in olympiads:
         builder.button(text=f"⭐ {title}", callback_data=f"olymp:{olympiad_id}")
+
+    navigation: list[tuple[str, str]] = []
+    if subject_code is not None and pages_total > 1:
+        if page > 0:
+            navigation.append(("◀", build_subject_page_callback(subject_code, page - 1)))
+        if page < pages_total - 1:
+            navigation.append(("▶", build_subject_page_callback(subject_code, page + 1)))
+    for text, callback_data in navigation:
+        builder.button(text=text, callback_data=callback_data)
+
+    bulk_actions = 0
+    if subject_code is not None and olympiads:
+        builder.button(
+            text="⭐ Добавить все", callback_data=f"{ADD_ALL_CALLBACK_PREFIX}{subject_code}"
+        )
+        builder.button(
+            text="☑ Выбрать несколько",
+            callback_data=f"{SELECT_PAGE_CALLBACK_PREFIX}{subject_code}:{page}",
+        )
+        bulk_actions = 2
+
     if include_back:
         builder.button(text="← Назад к предметам", callback_data=BACK_TO_SUBJECTS_CALLBACK)
-    builder.adjust(1)
+
+    row_sizes = [1] * len(olympiads)
+    if navigation:
+        row_sizes.append(len(navigation))
+    if bulk_actions:
+        row_sizes.append(bulk_actions)
+    if include_back:
+        row_sizes.append(1)
+    builder.adjust(*row_sizes if row_sizes else (1,))
+    return builder.as_markup()
+
+
+def build_multiselect_keyboard(
+    olympiads: Sequence[tuple[int, str]],
+    *,
+    selected: Collection[int],
+    subject_code: str,
+    page: int,
+    pages_total: int,
+) -> InlineKeyboardMarkup:
+    """Клавиатура режима выбора нескольких олимпиад."""
+
+    builder = InlineKeyboardBuilder()
+    for olympiad_id, title in olympiads:
+        mark = "✅" if olympiad_id in selected else "☐"
+        builder.button(
+            text=f"{mark} {title}",
+            callback_data=f"{SELECT_TOGGLE_CALLBACK_PREFIX}{olympiad_id}",
+        )
+
+    navigation = 0
+    if page > 0:
+        builder.button(
+            text="◀", callback_data=f"{SELECT_PAGE_CALLBACK_PREFIX}{subject_code}:{page - 1}"
+        )
+        navigation += 1
+    if page < pages_total - 1:
+        builder.button(
+            text="▶", callback_data=f"{SELECT_PAGE_CALLBACK_PREFIX}{subject_code}:{page + 1}"
+        )
+        navigation += 1
+
+    builder.button(
+        text=f"⭐ Добавить выбранные ({len(selected)})", callback_data=SELECT_SAVE_CALLBACK
+    )
+    builder.button(
+        text="✖ Отмена", callback_data=build_subject_page_callback(subject_code, page)
+    )
+
+    row_sizes = [1] * len(olympiads)
+    if navigation:
+        row_sizes.append(navigation)
+    row_sizes.extend((1, 1))
+    builder.adjust(*row_sizes)
     return builder.as_markup()
 
 
 __all__ = [
+    "ADD_ALL_CALLBACK_PREFIX",
     "BACK_TO_SUBJECTS_CALLBACK",
-    "build_subjects_keyboard",
+    "SELECT_PAGE_CALLBACK_PREFIX",
+    "SELECT_SAVE_CALLBACK",
+    "SELECT_TOGGLE_CALLBACK_PREFIX",
+    "SUBJECT_CALLBACK_PREFIX",
+    "build_multiselect_keyboard",
     "build_olympiads_keyboard",
+    "build_subject_page_callback",
+    "build_subjects_keyboard",
+    "parse_subject_page_callback",
 ]
@@ -0,0 +1,64 @@
+"""Инлайн-клавиатура раздела ближайших дат."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from ..utils import texts
+
+DeadlinesScope = Literal["all", "fav"]
+
+DEADLINES_CALLBACK_PREFIX = "deadlines:"
+DEADLINE_PERIODS: tuple[int, ...] = (7, 30, 90)
+
+
+def build_deadlines_callback(scope: DeadlinesScope, days: int) -> str:
+    """Собрать callback-данные экрана ближайших дат."""
+
+    return f"{DEADLINES_CALLBACK_PREFIX}{scope}:{days}"
+
+
+def parse_deadlines_callback(payload: str) -> tuple[DeadlinesScope, int] | None:
+    """Разобрать callback-данные экрана ближайших дат."""
+
+    body = payload.removeprefix(DEADLINES_CALLBACK_PREFIX)
+    raw_scope, _, raw_days = body.partition(":")
+    if raw_scope not in ("all", "fav"):
+        return None
+    try:
+        days = int(raw_days)
+    except ValueError:
+        return None
+    return raw_scope, days  # type: ignore[return-value]
+
+
+def build_deadlines_keyboard(*, scope: DeadlinesScope, days: int) -> InlineKeyboardMarkup:
+    """Клавиатура выбора периода и набора олимпиад."""
+
+    builder = InlineKeyboardBuilder()
+    for period in DEADLINE_PERIODS:
+        label = f"{period} дн."
+        if period == days:
+            label = f"• {label}"
+        builder.button(text=label, callback_data=build_deadlines_callback(scope, period))
+
+    if scope == "all":
+        builder.button(text="❤ Только мои", callback_data=build_deadlines_callback("fav", days))
+    else:
+        builder.button(text="📂 Весь каталог", callback_data=build_deadlines_callback("all", days))
+    builder.button(text=texts.MAIN_MENU_FAVORITES, callback_data="menu:favorites")
+    builder.adjust(len(DEADLINE_PERIODS), 1, 1)
+    return builder.as_markup()
+
+
+__all__ = [
+    "DEADLINES_CALLBACK_PREFIX",
+    "DEADLINE_PERIODS",
+    "DeadlinesScope",
+    "build_deadlines_callback",
+    "build_deadlines_keyboard",
+    "parse_deadlines_callback",
+]
@@ -15,16 +15,17 @@ MENU_CALLBACKS: tuple[tuple[str, str], ...] = (
     (texts.MAIN_MENU_UNIVERSITIES, "menu:universities"),
     (texts.MAIN_MENU_SUBSCRIPTION, "menu:subscription"),
     (texts.MAIN_MENU_HELP, "menu:help"),
+    (texts.MAIN_MENU_DEADLINES, "menu:deadlines"),
 )
 
 
 def build_main_menu_keyboard() -> InlineKeyboardMarkup:
-    """Собрать инлайн-клавиатуру из шести пунктов меню."""
+    """Собрать инлайн-клавиатуру из пунктов главного меню."""
 
     builder = InlineKeyboardBuilder()
     for text, callback_data in MENU_CALLBACKS:
         builder.button(text=text, callback_data=callback_data)
-    builder.adjust(2, 2, 2)
+    builder.adjust(2, 2, 2, 1)
     return builder.as_markup()
 
 
@@ -0,0 +1,46 @@
+"""Maintained follower counters for olympiads."""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180002"
+down_revision: Union[str, None] = "202610180001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "olympiad_followers",
+        sa.Column("olympiad_id", sa.Integer(), nullable=False),
+        sa.Column("followers", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.ForeignKeyConstraint(["olympiad_id"], ["olympiads.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("olympiad_id"),
+    )
+    op.create_index(
+        "ix_olympiad_followers_followers", "olympiad_followers", ["followers"], unique=False
+    )
+
+    # Разовый пересчёт по существующему избранному; дальше счётчики ведёт бот.
+    op.execute(
+        """
+        INSERT INTO olympiad_followers (olympiad_id, followers)
+        SELECT olympiad_id, count(*) FROM user_olympiads GROUP BY olympiad_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_olympiad_followers_followers", table_name="olympiad_followers")
+    op.drop_table("olympiad_followers")
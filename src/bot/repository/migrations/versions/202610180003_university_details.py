@@ -0,0 +1,63 @@
+"""Descriptions, faculties and benefits of universities."""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180003"
+down_revision: Union[str, None] = "202610180002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("universities", sa.Column("description", sa.Text(), nullable=True))
+
+    op.create_table(
+        "university_faculties",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("university_id", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["university_id"], ["universities.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_university_faculties_university_id",
+        "university_faculties",
+        ["university_id"],
+        unique=False,
+    )
+
+    op.create_table(
+        "university_benefits",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("university_id", sa.Integer(), nullable=False),
+        sa.Column("faculty_id", sa.Integer(), nullable=True),
+        sa.Column("position", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(["university_id"], ["universities.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["faculty_id"], ["university_faculties.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_university_benefits_university_id",
+        "university_benefits",
+        ["university_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_university_benefits_university_id", table_name="university_benefits")
+    op.drop_table("university_benefits")
+    op.drop_index("ix_university_faculties_university_id", table_name="university_faculties")
+    op.drop_table("university_faculties")
+    op.drop_column("universities", "description")
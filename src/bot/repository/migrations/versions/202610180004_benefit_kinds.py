@@ -0,0 +1,51 @@
+"""Benefit kinds and faculties on olympiad-university links."""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180004"
+down_revision: Union[str, None] = "202610180003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+benefit_kind_enum = sa.Enum("bvi", "hundred_points", "extra_points", name="benefit_kind")
+
+
+def upgrade() -> None:
+    benefit_kind_enum.create(op.get_bind(), checkfirst=True)
+    op.add_column(
+        "olympiad_university",
+        sa.Column(
+            "benefit_kind",
+            benefit_kind_enum,
+            nullable=False,
+            server_default="extra_points",
+        ),
+    )
+    op.add_column("olympiad_university", sa.Column("faculty_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "fk_olympiad_university_faculty_id",
+        "olympiad_university",
+        "university_faculties",
+        ["faculty_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.add_column(
+        "university_faculties", sa.Column("subject_code", sa.String(length=50), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("university_faculties", "subject_code")
+    op.drop_constraint(
+        "fk_olympiad_university_faculty_id", "olympiad_university", type_="foreignkey"
+    )
+    op.drop_column("olympiad_university", "faculty_id")
+    op.drop_column("olympiad_university", "benefit_kind")
+    benefit_kind_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,33 @@
+"""Composite indexes for keyset pagination of materials."""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180006"
+down_revision: Union[str, None] = "202610180005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_materials_created_at_id", "materials", ["created_at", "id"], unique=False
+    )
+    op.create_index(
+        "ix_materials_olympiad_created_at_id",
+        "materials",
+        ["olympiad_id", "created_at", "id"],
+        unique=False,
+    )
+    # Составной индекс начинается с olympiad_id и заменяет одиночный.
+    op.drop_index("ix_materials_olympiad_id", table_name="materials")
+
+
+def downgrade() -> None:
+    op.create_index("ix_materials_olympiad_id", "materials", ["olympiad_id"], unique=False)
+    op.drop_index("ix_materials_olympiad_created_at_id", table_name="materials")
+    op.drop_index("ix_materials_created_at_id", table_name="materials")
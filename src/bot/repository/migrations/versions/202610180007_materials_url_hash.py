@@ -0,0 +1,88 @@
+"""Normalised URL hash with a unique index for material deduplication."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Sequence, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180007"
+down_revision: Union[str, None] = "202610180006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Копия bot.utils.urls на момент миграции: правки нормализации в коде бота
+# не должны менять уже записанные хэши.
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = frozenset({"fbclid", "gclid", "yclid", "_openstat"})
+
+
+def _normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    port = parts.port
+    netloc = host
+    if parts.username:
+        netloc = f"{parts.username}@{host}"
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+
+    path = parts.path.rstrip("/") or ("/" if not netloc else "")
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in _TRACKING_PARAMS
+            and not key.lower().startswith(_TRACKING_PREFIXES)
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def _url_hash(url: str) -> str:
+    return hashlib.sha1(_normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column("materials", sa.Column("url_hash", sa.String(length=40), nullable=True))
+
+    # Нормализация ссылок выполняется в Python, как и в боте. У уже
+    # существующих дубликатов хэш получает только самая старая запись,
+    # у нераспознаваемых ссылок он остаётся пустым.
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text("SELECT id, olympiad_id, url FROM materials ORDER BY created_at, id")
+    )
+    seen: set[tuple[int, str]] = set()
+    updates: list[dict[str, object]] = []
+    for material_id, olympiad_id, url in rows:
+        try:
+            key = (olympiad_id, _url_hash(url))
+        except ValueError:
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        updates.append({"id": material_id, "url_hash": key[1]})
+    if updates:
+        bind.execute(
+            sa.text("UPDATE materials SET url_hash = :url_hash WHERE id = :id"), updates
+        )
+
+    op.create_index(
+        "uq_materials_olympiad_url_hash",
+        "materials",
+        ["olympiad_id", "url_hash"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_materials_olympiad_url_hash", table_name="materials")
+    op.drop_column("materials", "url_hash")
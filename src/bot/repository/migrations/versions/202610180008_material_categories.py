@@ -0,0 +1,167 @@
+"""Material categories; demo materials for demo olympiads already in the database."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Sequence, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180008"
+down_revision: Union[str, None] = "202610180007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Копия bot.utils.urls на момент миграции: правки нормализации в коде бота
+# не должны менять уже записанные хэши.
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = frozenset({"fbclid", "gclid", "yclid", "_openstat"})
+
+
+def _normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    port = parts.port
+    netloc = host
+    if parts.username:
+        netloc = f"{parts.username}@{host}"
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+
+    path = parts.path.rstrip("/") or ("/" if not netloc else "")
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in _TRACKING_PARAMS
+            and not key.lower().startswith(_TRACKING_PREFIXES)
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def _url_hash(url: str) -> str:
+    return hashlib.sha1(_normalize_url(url).encode("utf-8")).hexdigest()
+
+
+material_category_enum = sa.Enum(
+    "past_problems", "theory", "articles", "additional", name="material_category"
+)
+
+# Демо-олимпиады, к которым раньше привязывались зашитые в код подборки.
+# Они попадают в базу, только если пользователь добавил их в избранное.
+DEMO_OLYMPIAD_TITLES: dict[int, str] = {
+    1: "Олимпиада НИУ ВШЭ по математике",
+    2: "ВсОШ. Теоретический тур",
+    3: "Олимпиада НТИ. Профиль Информационные технологии",
+    4: "ВсОШ по информатике",
+    5: "Физтех. Олимпиада Физтеха",
+    6: "Ломоносов по физике",
+}
+
+DEMO_MATERIALS: tuple[tuple[int, str, str, str], ...] = (
+    (1, "past_problems", "НИУ ВШЭ: комплект задач прошлых лет", "https://example.org/hse/problems"),
+    (1, "theory", "НИУ ВШЭ: теория и видеоразборы", "https://example.org/hse/theory"),
+    (1, "articles", "НИУ ВШЭ: методички и полезные статьи", "https://example.org/hse/articles"),
+    (
+        2,
+        "past_problems",
+        "ВсОШ по математике: задачи за 2023 год",
+        "https://example.org/vsosh/problems",
+    ),
+    (2, "theory", "ВсОШ: теория и вебинары", "https://example.org/vsosh/theory"),
+    (
+        2,
+        "articles",
+        "ВсОШ: рекомендации и методические материалы",
+        "https://example.org/vsosh/articles",
+    ),
+    (3, "past_problems", "НТИ: задачи отборочного и финала", "https://example.org/nti/problems"),
+    (3, "theory", "НТИ: теория и тренировки", "https://example.org/nti/theory"),
+    (3, "articles", "НТИ: статьи и гайды", "https://example.org/nti/articles"),
+    (
+        4,
+        "past_problems",
+        "ВсОШ по информатике: задания прошлых лет",
+        "https://example.org/informatics/problems",
+    ),
+    (
+        4,
+        "theory",
+        "ВсОШ по информатике: теория и разборы",
+        "https://example.org/informatics/theory",
+    ),
+    (
+        4,
+        "articles",
+        "ВсОШ по информатике: полезные материалы",
+        "https://example.org/informatics/articles",
+    ),
+    (5, "past_problems", "Физтех: комплект прошлых туров", "https://example.org/mipt/problems"),
+    (5, "theory", "Физтех: лекции и видеоразборы", "https://example.org/mipt/theory"),
+    (5, "articles", "Физтех: статьи и памятки", "https://example.org/mipt/articles"),
+    (
+        6,
+        "past_problems",
+        "Ломоносов: задачи прошлых лет",
+        "https://example.org/lomonosov/problems",
+    ),
+    (6, "theory", "Ломоносов: теория и видео", "https://example.org/lomonosov/theory"),
+    (
+        6,
+        "articles",
+        "Ломоносов: методические рекомендации",
+        "https://example.org/lomonosov/articles",
+    ),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    material_category_enum.create(bind, checkfirst=True)
+    op.add_column(
+        "materials",
+        sa.Column(
+            "category",
+            material_category_enum,
+            nullable=False,
+            server_default="additional",
+        ),
+    )
+
+    # Каталог миграция не трогает: подборки переносятся только к уже
+    # существующим демо-олимпиадам. Если id занят импортированной олимпиадой
+    # с другим названием, материалы не создаются. Демо-олимпиады, попавшие
+    # в базу позже, получают подборки из кода бота при первом сохранении.
+    bind.execute(
+        sa.text(
+            """
+            INSERT INTO materials (olympiad_id, category, title, url, url_hash)
+            SELECT o.id, CAST(:category AS material_category), :title, :url, :url_hash
+            FROM olympiads AS o
+            WHERE o.id = :olympiad_id AND o.title = :olympiad_title
+            ON CONFLICT (olympiad_id, url_hash) DO NOTHING
+            """
+        ),
+        [
+            {
+                "olympiad_id": olympiad_id,
+                "olympiad_title": DEMO_OLYMPIAD_TITLES[olympiad_id],
+                "category": category,
+                "title": title,
+                "url": url,
+                "url_hash": _url_hash(url),
+            }
+            for olympiad_id, category, title, url in DEMO_MATERIALS
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("materials", "category")
+    material_category_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,53 @@
+"""Link health columns for materials."""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180009"
+down_revision: Union[str, None] = "202610180008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+link_status_enum = sa.Enum("unknown", "ok", "broken", name="link_status")
+
+
+def upgrade() -> None:
+    link_status_enum.create(op.get_bind(), checkfirst=True)
+    op.add_column(
+        "materials",
+        sa.Column("link_status", link_status_enum, nullable=False, server_default="unknown"),
+    )
+    op.add_column("materials", sa.Column("link_http_status", sa.Integer(), nullable=True))
+    op.add_column(
+        "materials",
+        sa.Column("link_failures", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.add_column(
+        "materials", sa.Column("link_checked_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column("materials", sa.Column("link_etag", sa.String(length=255), nullable=True))
+    op.add_column(
+        "materials", sa.Column("link_last_modified", sa.String(length=64), nullable=True)
+    )
+    op.create_index(
+        "ix_materials_link_checked_at",
+        "materials",
+        [sa.text("link_checked_at NULLS FIRST")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_materials_link_checked_at", table_name="materials")
+    op.drop_column("materials", "link_last_modified")
+    op.drop_column("materials", "link_etag")
+    op.drop_column("materials", "link_checked_at")
+    op.drop_column("materials", "link_failures")
+    op.drop_column("materials", "link_http_status")
+    op.drop_column("materials", "link_status")
+    link_status_enum.drop(op.get_bind(), checkfirst=True)
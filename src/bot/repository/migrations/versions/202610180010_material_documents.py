@@ -0,0 +1,30 @@
+"""Telegram documents attached to materials."""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180010"
+down_revision: Union[str, None] = "202610180009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "materials", sa.Column("document_file_id", sa.String(length=255), nullable=True)
+    )
+    op.add_column(
+        "materials", sa.Column("document_file_unique_id", sa.String(length=64), nullable=True)
+    )
+    op.add_column("materials", sa.Column("document_name", sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("materials", "document_name")
+    op.drop_column("materials", "document_file_unique_id")
+    op.drop_column("materials", "document_file_id")
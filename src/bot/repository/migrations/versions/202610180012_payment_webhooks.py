@@ -0,0 +1,47 @@
+"""Provider payment ids for idempotent payment webhooks."""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180012"
+down_revision: Union[str, None] = "202610180011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "payments_stub", sa.Column("provider_payment_id", sa.String(length=128), nullable=True)
+    )
+    op.add_column(
+        "payments_stub", sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column(
+        "payments_stub", sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.create_index(
+        "uq_payments_stub_provider_payment_id",
+        "payments_stub",
+        ["provider_payment_id"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_payments_stub_unprocessed",
+        "payments_stub",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("status = 'succeeded' AND processed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payments_stub_unprocessed", table_name="payments_stub")
+    op.drop_index("uq_payments_stub_provider_payment_id", table_name="payments_stub")
+    op.drop_column("payments_stub", "processed_at")
+    op.drop_column("payments_stub", "updated_at")
+    op.drop_column("payments_stub", "provider_payment_id")
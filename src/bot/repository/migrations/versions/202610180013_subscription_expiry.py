@@ -0,0 +1,59 @@
+"""Subscription expiry and renewal reminder queue."""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180013"
+down_revision: Union[str, None] = "202610180012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users", sa.Column("subscription_expires_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.create_index(
+        "ix_users_subscription_expires_at",
+        "users",
+        ["subscription_expires_at"],
+        unique=False,
+        postgresql_where=sa.text("is_subscribed AND subscription_expires_at IS NOT NULL"),
+    )
+
+    op.create_table(
+        "subscription_reminders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("scheduled_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "uq_subscription_reminders_user_expires",
+        "subscription_reminders",
+        ["user_id", "expires_at"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_subscription_reminders_pending",
+        "subscription_reminders",
+        ["scheduled_at"],
+        unique=False,
+        postgresql_where=sa.text("sent_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_subscription_reminders_pending", table_name="subscription_reminders")
+    op.drop_index("uq_subscription_reminders_user_expires", table_name="subscription_reminders")
+    op.drop_table("subscription_reminders")
+    op.drop_index("ix_users_subscription_expires_at", table_name="users")
+    op.drop_column("users", "subscription_expires_at")
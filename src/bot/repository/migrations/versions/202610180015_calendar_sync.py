@@ -0,0 +1,69 @@
+"""External calendar accounts and pushed event records."""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180015"
+down_revision: Union[str, None] = "202610180014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "calendar_accounts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("calendar_id", sa.String(length=255), nullable=False, server_default="primary"),
+        sa.Column("refresh_token", sa.Text(), nullable=False),
+        sa.Column("access_token", sa.Text(), nullable=True),
+        sa.Column("access_token_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("sync_requested_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("failures", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("last_synced_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id"),
+    )
+    op.create_index(
+        "ix_calendar_accounts_sync_due",
+        "calendar_accounts",
+        ["sync_requested_at"],
+        unique=False,
+        postgresql_where=sa.text("sync_requested_at IS NOT NULL AND revoked_at IS NULL"),
+    )
+
+    op.create_table(
+        "calendar_pushed_events",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("event_key", sa.String(length=64), nullable=False),
+        sa.Column("remote_event_id", sa.String(length=255), nullable=False),
+        sa.Column("content_hash", sa.String(length=40), nullable=True),
+        sa.Column(
+            "pushed_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.ForeignKeyConstraint(["account_id"], ["calendar_accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("account_id", "event_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("calendar_pushed_events")
+    op.drop_index("ix_calendar_accounts_sync_due", table_name="calendar_accounts")
+    op.drop_table("calendar_accounts")
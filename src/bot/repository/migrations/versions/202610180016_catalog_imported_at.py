@@ -0,0 +1,28 @@
+"""Mark the catalog as imported so favourites do not replace the demo catalog."""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "202610180016"
+down_revision: Union[str, None] = "202610180015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "catalog_state",
+        sa.Column("imported_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Начальная версия — 1, импортёр увеличивает её: версия выше означает,
+    # что каталог уже загружался.
+    op.execute("UPDATE catalog_state SET imported_at = updated_at WHERE version > 1")
+
+
+def downgrade() -> None:
+    op.drop_column("catalog_state", "imported_at")
@@ -5,7 +5,21 @@ from __future__ import annotations
 import enum
 from datetime import date, datetime
 
-from sqlalchemy import BigInteger, Boolean, Date, DateTime, Enum, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -22,10 +36,44 @@ class ReminderKind(str, enum.Enum):
     DAY_OF = "day_of"
 
 
+class BenefitKind(str, enum.Enum):
+    """Admission benefit granted for an olympiad, strongest first."""
+
+    BVI = "bvi"
+    HUNDRED_POINTS = "hundred_points"
+    EXTRA_POINTS = "extra_points"
+
+
+class MaterialCategory(str, enum.Enum):
+    """Section of the materials bundle shown to users."""
+
+    PAST_PROBLEMS = "past_problems"
+    THEORY = "theory"
+    ARTICLES = "articles"
+    ADDITIONAL = "additional"
+
+
+class LinkStatus(str, enum.Enum):
+    """Result of the latest availability check of a material link."""
+
+    UNKNOWN = "unknown"
+    OK = "ok"
+    BROKEN = "broken"
+
+
 class User(Base):
     """Telegram bot user."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Индекс покрывает только активные подписки: очистка и напоминания
+        # не просматривают всю таблицу пользователей.
+        Index(
+            "ix_users_subscription_expires_at",
+            "subscription_expires_at",
+            postgresql_where=text("is_subscribed AND subscription_expires_at IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     tg_id: Mapped[int] = mapped_column(BigInteger, unique=True)
@@ -33,8 +81,12 @@ class User(Base):
     is_subscribed: Mapped[bool] = mapped_column(
         Boolean, nullable=False, server_default="false", default=False
     )
+    # NULL у подписок, оформленных до появления срока действия: они бессрочные.
+    subscription_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now()
     )
 
     olympiads: Mapped[list["UserOlympiad"]] = relationship(back_populates="user")
@@ -42,6 +94,30 @@ class User(Base):
     payments: Mapped[list["PaymentStub"]] = relationship(back_populates="user")
 
 
+class CatalogSubject(Base):
+    """Subject of the olympiad catalog."""
+
+    __tablename__ = "subjects"
+
+    code: Mapped[str] = mapped_column(String(50), primary_key=True)
+    title: Mapped[str] = mapped_column(String(100), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class CatalogState(Base):
+    """Single-row table holding the current catalog version."""
+
+    __tablename__ = "catalog_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="1", default=1)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now()
+    )
+    # Время последнего импорта; NULL — каталог не загружался и работает демо-каталог.
+    imported_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
 class Olympiad(Base):
     """Olympiad catalog entry."""
 
@@ -72,28 +148,88 @@ class UserOlympiad(Base):
         ForeignKey("olympiads.id", ondelete="CASCADE"), primary_key=True
     )
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now()
     )
 
     user: Mapped[User] = relationship(back_populates="olympiads")
     olympiad: Mapped[Olympiad] = relationship(back_populates="participants")
 
 
+class OlympiadFollowers(Base):
+    """Maintained follower counter of an olympiad."""
+
+    __tablename__ = "olympiad_followers"
+    __table_args__ = (Index("ix_olympiad_followers_followers", "followers"),)
+
+    olympiad_id: Mapped[int] = mapped_column(
+        ForeignKey("olympiads.id", ondelete="CASCADE"), primary_key=True
+    )
+    followers: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default="0", default=0
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now()
+    )
+
+
 class Material(Base):
     """Learning materials linked to an olympiad."""
 
     __tablename__ = "materials"
+    __table_args__ = (
+        Index("ix_materials_created_at_id", "created_at", "id"),
+        Index("ix_materials_olympiad_created_at_id", "olympiad_id", "created_at", "id"),
+        Index("uq_materials_olympiad_url_hash", "olympiad_id", "url_hash", unique=True),
+        # Порядок NULLS FIRST совпадает с выборкой ссылок на проверку.
+        Index("ix_materials_link_checked_at", text("link_checked_at NULLS FIRST")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     olympiad_id: Mapped[int] = mapped_column(
-        ForeignKey("olympiads.id", ondelete="CASCADE"), nullable=False, index=True
+        ForeignKey("olympiads.id", ondelete="CASCADE"), nullable=False
     )
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     url: Mapped[str] = mapped_column(String(1024), nullable=False)
+    # SHA-1 нормализованной ссылки; NULL только у старых дубликатов.
+    url_hash: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    category: Mapped[MaterialCategory] = mapped_column(
+        Enum(
+            MaterialCategory,
+            name="material_category",
+            values_callable=lambda categories: [category.value for category in categories],
+        ),
+        nullable=False,
+        server_default=MaterialCategory.ADDITIONAL.value,
+        default=MaterialCategory.ADDITIONAL,
+    )
     added_by_admin_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now()
     )
+    link_status: Mapped[LinkStatus] = mapped_column(
+        Enum(
+            LinkStatus,
+            name="link_status",
+            values_callable=lambda statuses: [status.value for status in statuses],
+        ),
+        nullable=False,
+        server_default=LinkStatus.UNKNOWN.value,
+        default=LinkStatus.UNKNOWN,
+    )
+    link_http_status: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    link_failures: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default="0", default=0
+    )
+    link_checked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Валидаторы последнего успешного ответа для условных запросов.
+    link_etag: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    link_last_modified: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Документ, загруженный администратором: file_id переиспользуется при отправке.
+    document_file_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    document_file_unique_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    document_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Увеличивается при каждой правке администратором (оптимистичная блокировка).
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1", default=1)
 
     olympiad: Mapped[Olympiad] = relationship(back_populates="materials")
 
@@ -127,8 +263,48 @@ class University(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     olympiads: Mapped[list["OlympiadUniversity"]] = relationship(back_populates="university")
+    faculties: Mapped[list["UniversityFaculty"]] = relationship(back_populates="university")
+    benefits: Mapped[list["UniversityBenefit"]] = relationship(back_populates="university")
+
+
+class UniversityFaculty(Base):
+    """Faculty of a university."""
+
+    __tablename__ = "university_faculties"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    university_id: Mapped[int] = mapped_column(
+        ForeignKey("universities.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    position: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0", default=0)
+    title: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    subject_code: Mapped[str | None] = mapped_column(String(50), nullable=True)
+
+    university: Mapped[University] = relationship(back_populates="faculties")
+    benefits: Mapped[list["UniversityBenefit"]] = relationship(back_populates="faculty")
+
+
+class UniversityBenefit(Base):
+    """Admission benefit of a university or one of its faculties."""
+
+    __tablename__ = "university_benefits"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    university_id: Mapped[int] = mapped_column(
+        ForeignKey("universities.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    faculty_id: Mapped[int | None] = mapped_column(
+        ForeignKey("university_faculties.id", ondelete="CASCADE"), nullable=True
+    )
+    position: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0", default=0)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+
+    university: Mapped[University] = relationship(back_populates="benefits")
+    faculty: Mapped[UniversityFaculty | None] = relationship(back_populates="benefits")
 
 
 class OlympiadUniversity(Base):
@@ -142,37 +318,194 @@ class OlympiadUniversity(Base):
     university_id: Mapped[int] = mapped_column(
         ForeignKey("universities.id", ondelete="CASCADE"), primary_key=True
     )
+    benefit_kind: Mapped[BenefitKind] = mapped_column(
+        Enum(
+            BenefitKind,
+            name="benefit_kind",
+            values_callable=lambda kinds: [kind.value for kind in kinds],
+        ),
+        nullable=False,
+        server_default=BenefitKind.EXTRA_POINTS.value,
+        default=BenefitKind.EXTRA_POINTS,
+    )
+    faculty_id: Mapped[int | None] = mapped_column(
+        ForeignKey("university_faculties.id", ondelete="SET NULL"), nullable=True
+    )
 
     olympiad: Mapped[Olympiad] = relationship(back_populates="universities")
     university: Mapped[University] = relationship(back_populates="olympiads")
 
 
+class UserRecommendation(Base):
+    """Precomputed university recommendations of a user."""
+
+    __tablename__ = "user_recommendations"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    fingerprint: Mapped[str] = mapped_column(String(40), nullable=False)
+    university_ids: Mapped[list[int]] = mapped_column(ARRAY(Integer), nullable=False)
+    scores: Mapped[list[float]] = mapped_column(ARRAY(Float), nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now()
+    )
+
+
 class PaymentStub(Base):
     """Stub table for payment records."""
 
     __tablename__ = "payments_stub"
+    __table_args__ = (
+        Index("uq_payments_stub_provider_payment_id", "provider_payment_id", unique=True),
+        # Оплаченные, но ещё не применённые платежи дочитываются при старте.
+        Index(
+            "ix_payments_stub_unprocessed",
+            "id",
+            postgresql_where=text("status = 'succeeded' AND processed_at IS NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     status: Mapped[str] = mapped_column(String(50), nullable=False)
+    # Идентификатор платежа у провайдера; NULL у записей до приёма уведомлений.
+    provider_payment_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now()
     )
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     user: Mapped[User] = relationship(back_populates="payments")
 
 
+class CalendarToken(Base):
+    """Secret token of a user's calendar feed."""
+
+    __tablename__ = "calendar_tokens"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True
+    )
+    # SHA-256 токена: сам токен выводится из секрета и поколения и не хранится.
+    token_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    generation: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default=text("1"), default=1
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now()
+    )
+    rotated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class CalendarAccount(Base):
+    """External calendar connected for push synchronisation."""
+
+    __tablename__ = "calendar_accounts"
+    __table_args__ = (
+        # Очередь синхронизации: только аккаунты, ожидающие отправки изменений.
+        Index(
+            "ix_calendar_accounts_sync_due",
+            "sync_requested_at",
+            postgresql_where=text("sync_requested_at IS NOT NULL AND revoked_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True
+    )
+    calendar_id: Mapped[str] = mapped_column(
+        String(255), nullable=False, server_default="primary", default="primary"
+    )
+    refresh_token: Mapped[str] = mapped_column(Text, nullable=False)
+    access_token: Mapped[str | None] = mapped_column(Text, nullable=True)
+    access_token_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Время первого несинхронизированного изменения; NULL — всё отправлено.
+    sync_requested_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    next_attempt_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    failures: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default=text("0"), default=0
+    )
+    last_synced_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    revoked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now()
+    )
+
+
+class CalendarPushedEvent(Base):
+    """Event already pushed to an external calendar."""
+
+    __tablename__ = "calendar_pushed_events"
+
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("calendar_accounts.id", ondelete="CASCADE"), primary_key=True
+    )
+    event_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    remote_event_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    # SHA-1 отправленного тела события; NULL — содержимое неизвестно.
+    content_hash: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    pushed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=func.now()
+    )
+
+
+class SubscriptionReminder(Base):
+    """Queued reminder about an upcoming subscription expiry."""
+
+    __tablename__ = "subscription_reminders"
+    __table_args__ = (
+        # Одно напоминание на каждый срок: продление создаёт новый срок.
+        Index("uq_subscription_reminders_user_expires", "user_id", "expires_at", unique=True),
+        Index(
+            "ix_subscription_reminders_pending",
+            "scheduled_at",
+            postgresql_where=text("sent_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    scheduled_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
 __all__ = (
     "Base",
+    "BenefitKind",
+    "CalendarAccount",
+    "CalendarPushedEvent",
+    "CalendarToken",
+    "CatalogState",
+    "CatalogSubject",
+    "LinkStatus",
     "Material",
+    "MaterialCategory",
     "Olympiad",
+    "OlympiadFollowers",
     "OlympiadUniversity",
     "PaymentStub",
     "Reminder",
     "ReminderKind",
+    "SubscriptionReminder",
     "University",
+    "UniversityBenefit",
+    "UniversityFaculty",
     "User",
     "UserOlympiad",
+    "UserRecommendation",
 )
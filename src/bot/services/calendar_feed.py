@@ -0,0 +1,228 @@
+"""Лента iCalendar с избранными олимпиадами пользователя."""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterable
+
+from bot.config import get_config
+from bot.services.favorites_service import FavoritesService, get_favorites_service
+from bot.services.olympiad_service import (
+    CatalogSnapshot,
+    OlympiadInfo,
+    OlympiadService,
+    get_olympiad_service,
+)
+from bot.utils.render_cache import RenderCache
+
+FEED_PATH_PREFIX = "/calendar/"
+FEED_SUFFIX = ".ics"
+PRODUCT_ID = "-//Olympiad Bot//Favorites Calendar//RU"
+UID_DOMAIN = "olympiad-bot"
+# Длина строки iCalendar в октетах без CRLF (RFC 5545, раздел 3.1).
+MAX_LINE_OCTETS = 75
+# Фрагментов не больше, чем олимпиад в каталоге; запас на рост каталога.
+FRAGMENT_CACHE_SIZE = 10_000
+
+_FEED_HEADER = "\r\n".join(
+    (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODUCT_ID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        "X-WR-CALNAME:Олимпиады",
+        "",
+    )
+)
+_FEED_FOOTER = "END:VCALENDAR\r\n"
+
+
+@dataclass(frozen=True, slots=True)
+class FeedState:
+    """Состояние ленты пользователя: ETag и данные для сборки тела."""
+
+    etag: str
+    snapshot: CatalogSnapshot
+    olympiad_ids: tuple[int, ...]
+
+
+def _escape(value: str) -> str:
+    """Экранировать текстовое значение свойства iCalendar."""
+
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Перенести строку длиннее 75 октетов, не разрывая символы UTF-8."""
+
+    if len(line.encode()) <= MAX_LINE_OCTETS:
+        return line + "\r\n"
+    parts: list[str] = []
+    current = ""
+    limit = MAX_LINE_OCTETS
+    for char in line:
+        if len((current + char).encode()) > limit:
+            parts.append(current)
+            current = ""
+            # Продолжение начинается с пробела, который тоже занимает октет.
+            limit = MAX_LINE_OCTETS - 1
+        current += char
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+@dataclass(frozen=True, slots=True)
+class OlympiadEvent:
+    """Ключевая дата олимпиады в виде события календаря."""
+
+    key: str
+    day: date
+    summary: str
+    description: str | None = None
+
+
+def olympiad_events(olympiad: OlympiadInfo) -> tuple[OlympiadEvent, ...]:
+    """События олимпиады: конец регистрации и тур.
+
+    Ключ события стабилен между версиями каталога: по нему календари и
+    синхронизация узнают уже добавленное событие.
+    """
+
+    events: list[OlympiadEvent] = []
+    if olympiad.reg_deadline is not None:
+        events.append(
+            OlympiadEvent(
+                key=f"olympiad-{olympiad.id}-reg",
+                day=olympiad.reg_deadline,
+                summary=f"Конец регистрации: {olympiad.title}",
+                description=olympiad.description,
+            )
+        )
+    if olympiad.round_date is not None:
+        events.append(
+            OlympiadEvent(
+                key=f"olympiad-{olympiad.id}-round",
+                day=olympiad.round_date,
+                summary=f"Тур: {olympiad.title}",
+                description=olympiad.description,
+            )
+        )
+    return tuple(events)
+
+
+def _vevent(event: OlympiadEvent) -> str:
+    # DTSTAMP выводится из даты события, а не из времени отрисовки: тело
+    # ленты должно зависеть только от каталога и избранного, иначе сильный
+    # ETag перестал бы совпадать с содержимым после перезапуска.
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.key}@{UID_DOMAIN}",
+        f"DTSTAMP:{event.day:%Y%m%d}T000000Z",
+        f"DTSTART;VALUE=DATE:{event.day:%Y%m%d}",
+        f"DTEND;VALUE=DATE:{event.day + timedelta(days=1):%Y%m%d}",
+        f"SUMMARY:{_escape(event.summary)}",
+    ]
+    if event.description:
+        lines.append(f"DESCRIPTION:{_escape(event.description)}")
+    lines.append("TRANSP:TRANSPARENT")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+def render_olympiad_events(olympiad: OlympiadInfo) -> str:
+    """Отрисовать VEVENT-фрагменты ключевых дат одной олимпиады."""
+
+    return "".join(_vevent(event) for event in olympiad_events(olympiad))
+
+
+def feed_etag(version: int, olympiad_ids: Iterable[int]) -> str:
+    """Сильный ETag ленты: версия каталога и набор избранных олимпиад."""
+
+    digest = hashlib.sha1(",".join(map(str, sorted(olympiad_ids))).encode()).hexdigest()
+    return f'"{version}-{digest[:20]}"'
+
+
+def feed_url(token: str) -> str:
+    """Публичный адрес ленты для подключения в календаре."""
+
+    base = get_config().public_base_url.rstrip("/")
+    return f"{base}{FEED_PATH_PREFIX}{token}{FEED_SUFFIX}"
+
+
+class CalendarFeedService:
+    """Сборка ленты из закэшированных фрагментов.
+
+    VEVENT-фрагменты олимпиад отрисовываются один раз на версию каталога.
+    ETag считается до сборки тела, поэтому на условный запрос с совпавшим
+    ETag лента не собирается вовсе.
+    """
+
+    def __init__(
+        self,
+        olympiad_service: OlympiadService | None = None,
+        favorites_service: FavoritesService | None = None,
+        fragments: RenderCache | None = None,
+    ) -> None:
+        self._olympiad_service = olympiad_service or get_olympiad_service()
+        self._favorites_service = favorites_service or get_favorites_service()
+        self._fragments = fragments or RenderCache(maxsize=FRAGMENT_CACHE_SIZE)
+
+    async def get_state(self, *, tg_user_id: int) -> FeedState:
+        """Вернуть ETag ленты вместе со срезом каталога, по которому он посчитан."""
+
+        snapshot = self._olympiad_service.snapshot
+        favorite_ids = await self._favorites_service.get_favorite_ids(tg_user_id=tg_user_id)
+        olympiad_ids = tuple(sorted(i for i in favorite_ids if i in snapshot.olympiads_by_id))
+        return FeedState(
+            etag=feed_etag(snapshot.version, olympiad_ids),
+            snapshot=snapshot,
+            olympiad_ids=olympiad_ids,
+        )
+
+    def render(self, state: FeedState) -> bytes:
+        """Собрать тело ленты из фрагментов."""
+
+        snapshot = state.snapshot
+        parts = [_FEED_HEADER]
+        for olympiad_id in state.olympiad_ids:
+            olympiad = snapshot.olympiads_by_id[olympiad_id]
+            parts.append(
+                self._fragments.get_or_render(
+                    f"ics:{olympiad_id}",
+                    snapshot.version,
+                    lambda olympiad=olympiad: render_olympiad_events(olympiad),
+                )
+            )
+        parts.append(_FEED_FOOTER)
+        return "".join(parts).encode()
+
+
+@lru_cache
+def get_calendar_feed_service() -> CalendarFeedService:
+    """Получить singleton-сервис календарной ленты."""
+
+    return CalendarFeedService()
+
+
+__all__ = [
+    "CalendarFeedService",
+    "FEED_PATH_PREFIX",
+    "FEED_SUFFIX",
+    "FeedState",
+    "OlympiadEvent",
+    "feed_etag",
+    "feed_url",
+    "get_calendar_feed_service",
+    "olympiad_events",
+    "render_olympiad_events",
+]
@@ -1,36 +1,35 @@
-"""Заглушка сервиса синхронизации с календарём."""
+"""Сервис подключения календаря: лента iCalendar и синхронизация с Google."""
 
 from __future__ import annotations
 
 from dataclasses import dataclass
 from functools import lru_cache
-from uuid import uuid4
 
-from bot.utils.logging import logger
+from bot.services.calendar_feed import feed_url
+from bot.services.calendar_sync import get_calendar_sync_service
+from bot.services.calendar_tokens import get_calendar_token_service
 
 
 @dataclass(slots=True)
 class CalendarServiceStub:
     """Простейшая заглушка календарного сервиса."""
 
-    def generate_unique_link(self, tg_user_id: int) -> str:
-        """Вернуть фиктивную ссылку синхронизации и залогировать обращение."""
+    async def generate_unique_link(self, tg_user_id: int) -> str:
+        """Вернуть постоянную ссылку на ленту избранного пользователя."""
 
-        unique_link = f"https://calendar.stub/sync/{uuid4()}"
-        logger.info(
-            "Generated calendar sync link for user {user_id}: {link}",
-            user_id=tg_user_id,
-            link=unique_link,
-        )
-        return unique_link
+        token = await get_calendar_token_service().get_or_create_token(tg_user_id=tg_user_id)
+        return feed_url(token)
 
-    def confirm_synchronization(self, tg_user_id: int) -> None:
-        """Залогировать подтверждение синхронизации."""
+    async def rotate_link(self, tg_user_id: int) -> str:
+        """Перевыпустить ссылку: прежняя перестаёт работать."""
 
-        logger.info(
-            "User {user_id} confirmed calendar synchronization (stub)",
-            user_id=tg_user_id,
-        )
+        token = await get_calendar_token_service().rotate_token(tg_user_id=tg_user_id)
+        return feed_url(token)
+
+    def google_connect_url(self, tg_user_id: int) -> str:
+        """Ссылка на подключение Google Календаря для синхронизации избранного."""
+
+        return get_calendar_sync_service().authorization_url(tg_user_id)
 
 
 @lru_cache
@@ -0,0 +1,577 @@
+"""Синхронизация избранного с Google Календарём пакетами изменений."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Mapping
+
+import aiohttp
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import get_config
+from bot.repository.db import AsyncSessionLocal
+from bot.repository.models import CalendarAccount, CalendarPushedEvent, User, UserOlympiad
+from bot.services.calendar_feed import OlympiadEvent, olympiad_events
+from bot.services.olympiad_service import CatalogSnapshot, OlympiadService, get_olympiad_service
+from bot.utils.google_calendar import (
+    MAX_BATCH_SIZE,
+    EventOperation,
+    GoogleApiError,
+    GoogleCalendarClient,
+    OperationResult,
+    build_authorization_url,
+    create_http_session,
+)
+from bot.utils.link_checker import HostRateLimiter
+from bot.utils.logging import logger
+
+SessionFactory = Callable[[], AsyncSession]
+
+# Сколько аккаунтов забирается в работу за один проход.
+SYNC_BATCH_ACCOUNTS = 100
+# На это время аккаунт закрепляется за проходом, чтобы его не взяла другая реплика.
+LEASE_SECONDS = 10 * 60
+BACKOFF_BASE_SECONDS = 60
+BACKOFF_MAX_SECONDS = 6 * 60 * 60
+TOKEN_REFRESH_MARGIN = timedelta(minutes=1)
+OAUTH_STATE_TTL_SECONDS = 60 * 60
+# Удаление уже удалённого события не считается ошибкой.
+GONE_STATUSES = frozenset({404, 410})
+
+
+@dataclass(frozen=True, slots=True)
+class PushedEvent:
+    """Запись об отправленном событии."""
+
+    remote_event_id: str
+    content_hash: str | None
+
+
+@dataclass(slots=True)
+class AccountOutcome:
+    """Итог синхронизации одного аккаунта до записи в базу."""
+
+    results: list[tuple[EventOperation, OperationResult]] = field(default_factory=list)
+    access_token: str | None = None
+    access_token_expires_at: datetime | None = None
+    retry: bool = False
+    revoked: bool = False
+
+
+@dataclass(slots=True)
+class CalendarSyncReport:
+    """Итоги прохода синхронизации."""
+
+    accounts: int = 0
+    operations: int = 0
+    failed_accounts: int = 0
+
+
+def remote_event_id(account_id: int, key: str) -> str:
+    """Детерминированный id события в Google (base32hex, строчные буквы).
+
+    Повторная вставка после сбоя записи в базу получает 409 вместо дубликата.
+    """
+
+    digest = hashlib.sha1(f"{account_id}:{key}".encode()).digest()
+    return base64.b32hexencode(digest).decode().rstrip("=").lower()
+
+
+def event_body(event: OlympiadEvent) -> dict[str, Any]:
+    """Тело события Google Calendar без идентификатора."""
+
+    body: dict[str, Any] = {
+        "summary": event.summary,
+        "start": {"date": event.day.isoformat()},
+        "end": {"date": (event.day + timedelta(days=1)).isoformat()},
+        "transparency": "transparent",
+        "extendedProperties": {"private": {"olympiadBotKey": event.key}},
+    }
+    if event.description:
+        body["description"] = event.description
+    return body
+
+
+def content_hash(body: Mapping[str, Any]) -> str:
+    """SHA-1 канонического JSON тела события."""
+
+    payload = json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def diff_events(
+    account_id: int,
+    desired: Mapping[str, Mapping[str, Any]],
+    pushed: Mapping[str, PushedEvent],
+) -> list[EventOperation]:
+    """Сравнить нужные события с отправленными и вернуть только изменения."""
+
+    operations: list[EventOperation] = []
+    for key, body in desired.items():
+        record = pushed.get(key)
+        if record is None:
+            event_id = remote_event_id(account_id, key)
+            operations.append(
+                EventOperation(key, "insert", event_id, {**body, "id": event_id})
+            )
+        elif record.content_hash != content_hash(body):
+            operations.append(EventOperation(key, "update", record.remote_event_id, body))
+    for key, record in pushed.items():
+        if key not in desired:
+            operations.append(EventOperation(key, "delete", record.remote_event_id))
+    return operations
+
+
+def backoff_delay(failures: int) -> timedelta:
+    """Экспоненциальная пауза с джиттером после ``failures`` неудач подряд."""
+
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** max(failures - 1, 0), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def _state_signature(payload: str) -> str:
+    settings = get_config()
+    secret = settings.calendar_token_secret or settings.bot_token
+    message = f"google-oauth:{payload}".encode()
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+
+def make_oauth_state(tg_user_id: int, *, now: float | None = None) -> str:
+    """Подписанный параметр ``state``: пользователь и время выдачи ссылки."""
+
+    payload = f"{tg_user_id}.{int(now if now is not None else time.time())}"
+    return f"{payload}.{_state_signature(payload)}"
+
+
+def parse_oauth_state(state: str, *, now: float | None = None) -> int:
+    """Проверить ``state`` и вернуть Telegram ID; ``ValueError`` при ошибке."""
+
+    payload, _, signature = state.rpartition(".")
+    raw_user, _, raw_issued = payload.partition(".")
+    if not hmac.compare_digest(signature, _state_signature(payload)):
+        raise ValueError("неверная подпись state")
+    issued_at = int(raw_issued)
+    if (now if now is not None else time.time()) - issued_at > OAUTH_STATE_TTL_SECONDS:
+        raise ValueError("ссылка на подключение устарела")
+    return int(raw_user)
+
+
+class CalendarSyncService:
+    """Отправка изменений избранного во внешние календари.
+
+    Для каждого аккаунта хранится список отправленных событий с хэшем тела.
+    Смена избранного или дат в каталоге только помечает аккаунт
+    ``sync_requested_at``; воркер сравнивает нужные события с отправленными и
+    отправляет разницу пакетными запросами не чаще раза в
+    ``calendar_sync_account_interval_seconds`` на аккаунт. При временных
+    ошибках аккаунт откладывается с экспоненциальной паузой.
+    """
+
+    def __init__(
+        self,
+        session_factory: SessionFactory | None = None,
+        olympiad_service: OlympiadService | None = None,
+    ) -> None:
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._olympiad_service = olympiad_service or get_olympiad_service()
+        self._settings = get_config()
+
+    def _client(self, http: aiohttp.ClientSession) -> GoogleCalendarClient:
+        return GoogleCalendarClient(
+            http,
+            client_id=self._settings.google_client_id,
+            client_secret=self._settings.google_client_secret,
+            token_url=self._settings.google_token_url,
+            api_base_url=self._settings.google_api_base_url,
+        )
+
+    def authorization_url(self, tg_user_id: int) -> str:
+        """Ссылка на подключение Google Календаря."""
+
+        return build_authorization_url(
+            self._settings.google_auth_url,
+            client_id=self._settings.google_client_id,
+            redirect_uri=self._settings.google_redirect_uri,
+            state=make_oauth_state(tg_user_id),
+        )
+
+    async def connect(self, *, code: str, state: str) -> int:
+        """Завершить OAuth: сохранить токены и запросить первую синхронизацию.
+
+        Возвращает Telegram ID подключившегося пользователя.
+        """
+
+        tg_user_id = parse_oauth_state(state)
+        async with create_http_session() as http:
+            token = await self._client(http).exchange_code(
+                code, redirect_uri=self._settings.google_redirect_uri
+            )
+        if not token.refresh_token:
+            raise GoogleApiError(400, "Google не выдал refresh-токен")
+
+        expires_at = datetime.now(tz=timezone.utc) + timedelta(seconds=token.expires_in)
+        values = {
+            "refresh_token": token.refresh_token,
+            "access_token": token.token,
+            "access_token_expires_at": expires_at,
+            "sync_requested_at": func.now(),
+            "next_attempt_at": None,
+            "failures": 0,
+            "revoked_at": None,
+        }
+        async with self._session_factory() as session:
+            async with session.begin():
+                await session.execute(
+                    pg_insert(User)
+                    .values(tg_id=tg_user_id)
+                    .on_conflict_do_nothing(index_elements=[User.tg_id])
+                )
+                user_id = select(User.id).where(User.tg_id == tg_user_id).scalar_subquery()
+                stmt = pg_insert(CalendarAccount).values(user_id=user_id, **values)
+                await session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[CalendarAccount.user_id], set_=values
+                    )
+                )
+        logger.info("Google Календарь подключён для {user_id}", user_id=tg_user_id)
+        return tg_user_id
+
+    async def request_sync_all(self) -> int:
+        """Пометить все подключённые аккаунты для сверки, например после смены дат."""
+
+        async with self._session_factory() as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(CalendarAccount)
+                    .where(
+                        CalendarAccount.revoked_at.is_(None),
+                        CalendarAccount.sync_requested_at.is_(None),
+                    )
+                    .values(sync_requested_at=func.now())
+                    .execution_options(synchronize_session=False)
+                )
+        return max(result.rowcount or 0, 0)
+
+    async def sync_due(self, *, limit: int = SYNC_BATCH_ACCOUNTS) -> CalendarSyncReport:
+        """Синхронизировать аккаунты, ожидающие отправки изменений."""
+
+        report = CalendarSyncReport()
+        accounts = await self._claim_accounts(limit)
+        if not accounts:
+            return report
+
+        account_ids = [account.id for account in accounts]
+        favorites, pushed = await self._load_state(account_ids)
+        snapshot = self._olympiad_service.snapshot
+        limiter = HostRateLimiter(self._settings.calendar_sync_account_interval_seconds)
+        semaphore = asyncio.Semaphore(max(self._settings.calendar_sync_concurrency, 1))
+
+        async with create_http_session() as http:
+            client = self._client(http)
+
+            async def run(account: Row[Any]) -> AccountOutcome:
+                async with semaphore:
+                    return await self._sync_account(
+                        client,
+                        limiter,
+                        account,
+                        self._desired_events(snapshot, favorites.get(account.user_id, ())),
+                        pushed.get(account.id, {}),
+                    )
+
+            results = await asyncio.gather(
+                *(run(account) for account in accounts), return_exceptions=True
+            )
+
+        for account, outcome in zip(accounts, results):
+            if isinstance(outcome, BaseException):
+                # Сбой одного аккаунта не должен терять итоги остальных: аккаунт
+                # откладывается с паузой, а не висит под арендой.
+                logger.opt(exception=outcome).error(
+                    "Сбой синхронизации аккаунта {account_id}", account_id=account.id
+                )
+                outcome = AccountOutcome(retry=True)
+            await self._store_outcome(account, outcome)
+            report.accounts += 1
+            report.operations += sum(1 for _, result in outcome.results if result.ok)
+            if outcome.retry or outcome.revoked:
+                report.failed_accounts += 1
+
+        logger.info(
+            "Синхронизация календарей: аккаунтов {accounts}, изменений {operations},"
+            " отложено {failed}",
+            accounts=report.accounts,
+            operations=report.operations,
+            failed=report.failed_accounts,
+        )
+        return report
+
+    async def _claim_accounts(self, limit: int) -> list[Row[Any]]:
+        """Забрать аккаунты в работу, продвинув ``next_attempt_at`` на срок аренды."""
+
+        due = (
+            select(CalendarAccount.id)
+            .where(
+                CalendarAccount.sync_requested_at.is_not(None),
+                CalendarAccount.revoked_at.is_(None),
+                (CalendarAccount.next_attempt_at.is_(None))
+                | (CalendarAccount.next_attempt_at <= func.now()),
+            )
+            .order_by(CalendarAccount.sync_requested_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(CalendarAccount)
+            .where(CalendarAccount.id.in_(due))
+            .values(next_attempt_at=func.now() + timedelta(seconds=LEASE_SECONDS))
+            .returning(
+                CalendarAccount.id,
+                CalendarAccount.user_id,
+                CalendarAccount.calendar_id,
+                CalendarAccount.refresh_token,
+                CalendarAccount.access_token,
+                CalendarAccount.access_token_expires_at,
+                CalendarAccount.sync_requested_at,
+                CalendarAccount.failures,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        async with self._session_factory() as session:
+            async with session.begin():
+                return list((await session.execute(stmt)).all())
+
+    async def _load_state(
+        self, account_ids: list[int]
+    ) -> tuple[dict[int, list[int]], dict[int, dict[str, PushedEvent]]]:
+        """Прочитать избранное и отправленные события всех аккаунтов двумя запросами."""
+
+        favorites: dict[int, list[int]] = defaultdict(list)
+        pushed: dict[int, dict[str, PushedEvent]] = defaultdict(dict)
+        async with self._session_factory() as session:
+            rows = await session.execute(
+                select(UserOlympiad.user_id, UserOlympiad.olympiad_id)
+                .join(CalendarAccount, CalendarAccount.user_id == UserOlympiad.user_id)
+                .where(CalendarAccount.id.in_(account_ids))
+            )
+            for user_id, olympiad_id in rows.all():
+                favorites[user_id].append(olympiad_id)
+            rows = await session.execute(
+                select(
+                    CalendarPushedEvent.account_id,
+                    CalendarPushedEvent.event_key,
+                    CalendarPushedEvent.remote_event_id,
+                    CalendarPushedEvent.content_hash,
+                ).where(CalendarPushedEvent.account_id.in_(account_ids))
+            )
+            for account_id, key, event_id, digest in rows.all():
+                pushed[account_id][key] = PushedEvent(event_id, digest)
+        return favorites, pushed
+
+    @staticmethod
+    def _desired_events(
+        snapshot: CatalogSnapshot, olympiad_ids: Iterable[int]
+    ) -> dict[str, dict[str, Any]]:
+        desired: dict[str, dict[str, Any]] = {}
+        for olympiad_id in sorted(olympiad_ids):
+            olympiad = snapshot.olympiads_by_id.get(olympiad_id)
+            if olympiad is None:
+                continue
+            for event in olympiad_events(olympiad):
+                desired[event.key] = event_body(event)
+        return desired
+
+    async def _sync_account(
+        self,
+        client: GoogleCalendarClient,
+        limiter: HostRateLimiter,
+        account: Row[Any],
+        desired: Mapping[str, Mapping[str, Any]],
+        pushed: Mapping[str, PushedEvent],
+    ) -> AccountOutcome:
+        outcome = AccountOutcome()
+        operations = diff_events(account.id, desired, pushed)
+        if not operations:
+            return outcome
+
+        access_token = account.access_token
+        expires_at = account.access_token_expires_at
+        now = datetime.now(tz=timezone.utc)
+        if not access_token or expires_at is None or expires_at - TOKEN_REFRESH_MARGIN <= now:
+            try:
+                token = await client.refresh_access_token(account.refresh_token)
+            except GoogleApiError as exc:
+                # invalid_grant: пользователь отозвал доступ, повторять бессмысленно.
+                outcome.revoked = exc.status in {400, 401}
+                outcome.retry = not outcome.revoked
+                logger.warning(
+                    "Не удалось обновить токен аккаунта {account_id}: {error}",
+                    account_id=account.id,
+                    error=exc,
+                )
+                return outcome
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                outcome.retry = True
+                logger.warning(
+                    "Google OAuth недоступен для аккаунта {account_id}: {error}",
+                    account_id=account.id,
+                    error=exc,
+                )
+                return outcome
+            access_token = outcome.access_token = token.token
+            outcome.access_token_expires_at = now + timedelta(seconds=token.expires_in)
+
+        try:
+            for start in range(0, len(operations), MAX_BATCH_SIZE):
+                chunk = operations[start : start + MAX_BATCH_SIZE]
+                await limiter.wait(f"account:{account.id}")
+                results = await client.execute_batch(access_token, account.calendar_id, chunk)
+                outcome.results.extend(zip(chunk, results))
+                if any(result.retryable for result in results):
+                    # Сервис просит притормозить: остальное отправим после паузы.
+                    outcome.retry = True
+                    break
+        except GoogleApiError as exc:
+            outcome.retry = True
+            if exc.status == 401:
+                # Токен отозван раньше срока: следующий проход получит новый.
+                outcome.access_token = ""
+                outcome.access_token_expires_at = None
+            logger.warning(
+                "Ошибка Google API для аккаунта {account_id}: {error}",
+                account_id=account.id,
+                error=exc,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            outcome.retry = True
+            logger.warning(
+                "Google API недоступен для аккаунта {account_id}: {error}",
+                account_id=account.id,
+                error=exc,
+            )
+        return outcome
+
+    async def _store_outcome(self, account: Row[Any], outcome: AccountOutcome) -> None:
+        """Записать отправленные изменения и новое состояние аккаунта одной транзакцией."""
+
+        upserts: list[dict[str, Any]] = []
+        deleted_keys: list[str] = []
+        for operation, result in outcome.results:
+            if (operation.operation == "delete" and result.ok) or result.status in GONE_STATUSES:
+                # 404/410: событие удалили в самом календаре; запись снимается,
+                # и при необходимости следующий проход вставит его заново.
+                deleted_keys.append(operation.key)
+            elif operation.body is not None and (
+                result.ok or (operation.operation == "insert" and result.status == 409)
+            ):
+                # 409: событие уже есть в календаре; без хэша следующий проход обновит его.
+                upserts.append(
+                    {
+                        "account_id": account.id,
+                        "event_key": operation.key,
+                        "remote_event_id": operation.event_id,
+                        "content_hash": (
+                            content_hash({k: v for k, v in operation.body.items() if k != "id"})
+                            if result.ok
+                            else None
+                        ),
+                    }
+                )
+            elif not result.retryable:
+                logger.warning(
+                    "Google отклонил событие {key} аккаунта {account_id}: {status}",
+                    key=operation.key,
+                    account_id=account.id,
+                    status=result.status,
+                )
+
+        values: dict[str, Any]
+        if outcome.revoked:
+            values = {"revoked_at": func.now(), "next_attempt_at": None}
+        elif outcome.retry:
+            failures = account.failures + 1
+            values = {
+                "failures": failures,
+                "next_attempt_at": func.now() + backoff_delay(failures),
+            }
+        else:
+            # Изменения, пришедшие во время прохода, оставляют аккаунт в очереди.
+            values = {
+                "failures": 0,
+                "next_attempt_at": None,
+                "last_synced_at": func.now(),
+                "sync_requested_at": case(
+                    (CalendarAccount.sync_requested_at == account.sync_requested_at, None),
+                    else_=CalendarAccount.sync_requested_at,
+                ),
+            }
+        if outcome.access_token is not None:
+            values["access_token"] = outcome.access_token
+            values["access_token_expires_at"] = outcome.access_token_expires_at
+
+        async with self._session_factory() as session:
+            async with session.begin():
+                if upserts:
+                    stmt = pg_insert(CalendarPushedEvent).values(upserts)
+                    await session.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=[
+                                CalendarPushedEvent.account_id,
+                                CalendarPushedEvent.event_key,
+                            ],
+                            set_={
+                                "remote_event_id": stmt.excluded.remote_event_id,
+                                "content_hash": stmt.excluded.content_hash,
+                                "pushed_at": func.now(),
+                            },
+                        )
+                    )
+                if deleted_keys:
+                    await session.execute(
+                        delete(CalendarPushedEvent).where(
+                            CalendarPushedEvent.account_id == account.id,
+                            CalendarPushedEvent.event_key.in_(deleted_keys),
+                        )
+                    )
+                await session.execute(
+                    update(CalendarAccount)
+                    .where(CalendarAccount.id == account.id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+
+
+@lru_cache
+def get_calendar_sync_service() -> CalendarSyncService:
+    """Получить singleton-сервис синхронизации календарей."""
+
+    return CalendarSyncService()
+
+
+__all__ = [
+    "CalendarSyncReport",
+    "CalendarSyncService",
+    "PushedEvent",
+    "backoff_delay",
+    "content_hash",
+    "diff_events",
+    "event_body",
+    "get_calendar_sync_service",
+    "make_oauth_state",
+    "parse_oauth_state",
+    "remote_event_id",
+]
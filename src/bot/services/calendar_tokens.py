@@ -0,0 +1,244 @@
+"""Постоянные токены календарной ленты с ротацией."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, TypeVar
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import get_config
+from bot.repository.db import AsyncSessionLocal
+from bot.repository.models import CalendarToken, User
+from bot.utils.logging import logger
+
+SessionFactory = Callable[[], AsyncSession]
+K = TypeVar("K")
+V = TypeVar("V")
+
+DEFAULT_CACHE_SIZE = 10_000
+# Ротация в другой реплике видна здесь не позже чем через TTL.
+DEFAULT_CACHE_TTL_SECONDS = 10 * 60
+# Длина токена в символах base64url (144 бита).
+TOKEN_LENGTH = 24
+
+
+def derive_token(tg_user_id: int, generation: int) -> str:
+    """Вывести токен из Telegram ID и поколения.
+
+    Токен воспроизводим, поэтому в базе хранится только его хэш, а ссылку
+    можно показать повторно. Смена поколения даёт новый токен, старый
+    перестаёт находиться.
+    """
+
+    settings = get_config()
+    secret = settings.calendar_token_secret or settings.bot_token
+    message = f"calendar-feed:{tg_user_id}:{generation}".encode()
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode()[:TOKEN_LENGTH]
+
+
+def hash_token(token: str) -> str:
+    """Хэш токена, по которому он ищется в ``calendar_tokens``."""
+
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class CalendarTokenCache:
+    """LRU-кэш токенов в обе стороны: хэш → пользователь и пользователь → токен.
+
+    Календари опрашивают ленту каждые несколько минут, поэтому поиск по
+    токену почти всегда обслуживается из памяти.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_users: int = DEFAULT_CACHE_SIZE,
+        ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_users = max_users
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._users: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        self._tokens: OrderedDict[int, tuple[float, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def get_user(self, token_hash: str) -> int | None:
+        """Вернуть Telegram ID владельца токена или ``None`` при промахе."""
+
+        with self._lock:
+            return self._lookup(self._users, token_hash)
+
+    def get_token(self, tg_user_id: int) -> str | None:
+        """Вернуть действующий токен пользователя или ``None`` при промахе."""
+
+        with self._lock:
+            return self._lookup(self._tokens, tg_user_id)
+
+    def set(self, tg_user_id: int, token: str) -> None:
+        """Запомнить действующий токен пользователя."""
+
+        expires_at = self._clock() + self._ttl
+        with self._lock:
+            self._store(self._users, hash_token(token), (expires_at, tg_user_id))
+            self._store(self._tokens, tg_user_id, (expires_at, token))
+
+    def invalidate(self, tg_user_id: int) -> None:
+        """Забыть токен пользователя, например после ротации."""
+
+        with self._lock:
+            item = self._tokens.pop(tg_user_id, None)
+            if item is not None:
+                self._users.pop(hash_token(item[1]), None)
+
+    def _lookup(self, entries: OrderedDict[K, tuple[float, V]], key: K) -> V | None:
+        item = entries.get(key)
+        if item is None:
+            return None
+        if item[0] <= self._clock():
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return item[1]
+
+    def _store(
+        self, entries: OrderedDict[K, tuple[float, V]], key: K, value: tuple[float, V]
+    ) -> None:
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self._max_users:
+            entries.popitem(last=False)
+
+
+class CalendarTokenService:
+    """Выдача, поиск и ротация токенов календарной ленты."""
+
+    def __init__(
+        self,
+        session_factory: SessionFactory | None = None,
+        cache: CalendarTokenCache | None = None,
+    ) -> None:
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._cache = cache or CalendarTokenCache(
+            max_users=get_config().calendar_token_cache_size
+        )
+
+    async def get_or_create_token(self, *, tg_user_id: int) -> str:
+        """Вернуть действующий токен пользователя, создав его при первом обращении."""
+
+        cached = self._cache.get_token(tg_user_id)
+        if cached is not None:
+            return cached
+
+        async with self._session_factory() as session:
+            async with session.begin():
+                generation = await self._current_generation(session, tg_user_id)
+                if generation is None:
+                    await session.execute(
+                        pg_insert(User)
+                        .values(tg_id=tg_user_id)
+                        .on_conflict_do_nothing(index_elements=[User.tg_id])
+                    )
+                    user_id = select(User.id).where(User.tg_id == tg_user_id).scalar_subquery()
+                    await session.execute(
+                        pg_insert(CalendarToken)
+                        .values(
+                            user_id=user_id,
+                            generation=1,
+                            token_hash=hash_token(derive_token(tg_user_id, 1)),
+                        )
+                        .on_conflict_do_nothing(index_elements=[CalendarToken.user_id])
+                    )
+                    # При гонке строку мог создать параллельный запрос: перечитываем.
+                    generation = await self._current_generation(session, tg_user_id)
+
+        token = derive_token(tg_user_id, generation or 1)
+        self._cache.set(tg_user_id, token)
+        return token
+
+    async def rotate_token(self, *, tg_user_id: int) -> str:
+        """Выпустить новый токен; старая ссылка перестаёт работать."""
+
+        async with self._session_factory() as session:
+            async with session.begin():
+                row = (
+                    await session.execute(
+                        select(CalendarToken.id, CalendarToken.generation)
+                        .join(User, User.id == CalendarToken.user_id)
+                        .where(User.tg_id == tg_user_id)
+                        .with_for_update(of=CalendarToken)
+                    )
+                ).first()
+                if row is not None:
+                    generation = row.generation + 1
+                    await session.execute(
+                        update(CalendarToken)
+                        .where(CalendarToken.id == row.id)
+                        .values(
+                            generation=generation,
+                            token_hash=hash_token(derive_token(tg_user_id, generation)),
+                            rotated_at=func.now(),
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+
+        self._cache.invalidate(tg_user_id)
+        if row is None:
+            return await self.get_or_create_token(tg_user_id=tg_user_id)
+        token = derive_token(tg_user_id, generation)
+        self._cache.set(tg_user_id, token)
+        logger.info("Ссылка на календарь перевыпущена для {user_id}", user_id=tg_user_id)
+        return token
+
+    async def resolve(self, token: str) -> int | None:
+        """Найти Telegram ID владельца токена по уникальному индексу хэша."""
+
+        if len(token) != TOKEN_LENGTH:
+            return None
+        token_hash = hash_token(token)
+        cached = self._cache.get_user(token_hash)
+        if cached is not None:
+            return cached
+
+        async with self._session_factory() as session:
+            tg_user_id = await session.scalar(
+                select(User.tg_id)
+                .join(CalendarToken, CalendarToken.user_id == User.id)
+                .where(CalendarToken.token_hash == token_hash)
+            )
+        if tg_user_id is not None:
+            self._cache.set(tg_user_id, token)
+        return tg_user_id
+
+    async def _current_generation(self, session: AsyncSession, tg_user_id: int) -> int | None:
+        return await session.scalar(
+            select(CalendarToken.generation)
+            .join(User, User.id == CalendarToken.user_id)
+            .where(User.tg_id == tg_user_id)
+        )
+
+
+@lru_cache
+def get_calendar_token_service() -> CalendarTokenService:
+    """Получить singleton-сервис токенов календаря."""
+
+    return CalendarTokenService()
+
+
+__all__ = [
+    "CalendarTokenCache",
+    "CalendarTokenService",
+    "derive_token",
+    "get_calendar_token_service",
+    "hash_token",
+]
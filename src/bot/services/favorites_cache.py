@@ -0,0 +1,158 @@
+"""Кэш избранных олимпиад пользователей с ограничением размера и TTL."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from threading import Lock
+from typing import Callable
+
+from bot.config import get_config
+
+DEFAULT_MAX_USERS = 10_000
+DEFAULT_TTL_SECONDS = 15 * 60
+
+
+@dataclass(frozen=True, slots=True)
+class FavoriteEntry:
+    """Олимпиада в избранном пользователя и время её добавления."""
+
+    olympiad_id: int
+    added_at: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class FavoritesCacheStats:
+    """Счётчики обращений к кэшу избранного."""
+
+    hits: int
+    misses: int
+    expirations: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class FavoritesCache:
+    """LRU-кэш избранного по Telegram ID с обновлением при записи.
+
+    Записи хранятся в порядке выдачи списка избранного: сначала добавленные
+    позже. Изменения избранного применяются к уже загруженным записям, а
+    отсутствующие записи загружаются из базы при следующем чтении.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_users: int = DEFAULT_MAX_USERS,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_users = max_users
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[int, tuple[float, tuple[FavoriteEntry, ...]]] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+
+    def get(self, tg_user_id: int) -> tuple[FavoriteEntry, ...] | None:
+        """Вернуть закэшированное избранное или ``None`` при промахе."""
+
+        with self._lock:
+            item = self._entries.get(tg_user_id)
+            if item is None:
+                self._misses += 1
+                return None
+            expires_at, entries = item
+            if expires_at <= self._clock():
+                del self._entries[tg_user_id]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(tg_user_id)
+            self._hits += 1
+            return entries
+
+    def set(self, tg_user_id: int, entries: tuple[FavoriteEntry, ...]) -> None:
+        """Сохранить избранное пользователя, загруженное из базы."""
+
+        with self._lock:
+            self._store(tg_user_id, entries)
+
+    def add(self, tg_user_id: int, olympiad_id: int, added_at: datetime) -> None:
+        """Добавить олимпиаду в начало загруженного списка избранного."""
+
+        with self._lock:
+            item = self._entries.get(tg_user_id)
+            if item is None:
+                return
+            entries = tuple(
+                entry for entry in item[1] if entry.olympiad_id != olympiad_id
+            )
+            self._store(tg_user_id, (FavoriteEntry(olympiad_id, added_at), *entries))
+
+    def remove(self, tg_user_id: int, olympiad_id: int) -> None:
+        """Убрать олимпиаду из загруженного списка избранного."""
+
+        with self._lock:
+            item = self._entries.get(tg_user_id)
+            if item is None:
+                return
+            entries = tuple(
+                entry for entry in item[1] if entry.olympiad_id != olympiad_id
+            )
+            self._store(tg_user_id, entries)
+
+    def invalidate(self, tg_user_id: int) -> None:
+        """Сбросить запись пользователя."""
+
+        with self._lock:
+            self._entries.pop(tg_user_id, None)
+
+    def stats(self) -> FavoritesCacheStats:
+        """Текущие значения счётчиков."""
+
+        with self._lock:
+            return FavoritesCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                expirations=self._expirations,
+                evictions=self._evictions,
+                size=len(self._entries),
+            )
+
+    def _store(self, tg_user_id: int, entries: tuple[FavoriteEntry, ...]) -> None:
+        self._entries[tg_user_id] = (self._clock() + self._ttl, entries)
+        self._entries.move_to_end(tg_user_id)
+        while len(self._entries) > self._max_users:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+
+@lru_cache
+def get_favorites_cache() -> FavoritesCache:
+    """Получить общий кэш избранного."""
+
+    settings = get_config()
+    return FavoritesCache(
+        max_users=settings.favorites_cache_max_users,
+        ttl_seconds=settings.favorites_cache_ttl_seconds,
+    )
+
+
+__all__ = [
+    "FavoriteEntry",
+    "FavoritesCache",
+    "FavoritesCacheStats",
+    "get_favorites_cache",
+]
@@ -7,11 +7,14 @@ from datetime import date, datetime
 from functools import lru_cache
 from typing import Sequence
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.repository.db import AsyncSessionLocal
-from bot.repository.models import Olympiad, User, UserOlympiad
+from bot.repository.models import CalendarAccount, Reminder, User, UserOlympiad
+from bot.services.favorites_cache import FavoriteEntry, FavoritesCache, get_favorites_cache
+from bot.services.followers_service import get_followers_service
+from bot.services.olympiad_service import get_olympiad_service
 
 
 @dataclass(frozen=True, slots=True)
@@ -30,60 +33,118 @@ class FavoriteOlympiad:
 class FavoritesService:
     """Бизнес-логика для списка избранных олимпиад."""
 
-    def __init__(self, session_factory: type[AsyncSession] | None = None) -> None:
+    def __init__(
+        self,
+        session_factory: type[AsyncSession] | None = None,
+        cache: FavoritesCache | None = None,
+    ) -> None:
         self._session_factory = session_factory or AsyncSessionLocal
+        self._cache = cache or get_favorites_cache()
 
     async def list_favorites(self, *, tg_user_id: int) -> Sequence[FavoriteOlympiad]:
-        """Вернуть все избранные олимпиады пользователя."""
+        """Вернуть все избранные олимпиады пользователя.
+
+        Названия и даты берутся из снимка каталога в памяти, поэтому для
+        пользователя с тёплым кэшем запрос к базе не выполняется.
+        """
+
+        snapshot = get_olympiad_service().snapshot
+        favorites: list[FavoriteOlympiad] = []
+        for entry in await self.get_favorite_entries(tg_user_id=tg_user_id):
+            olympiad = snapshot.olympiads_by_id.get(entry.olympiad_id)
+            if olympiad is None:
+                continue
+            subject = snapshot.subjects_by_code.get(olympiad.subject_code)
+            favorites.append(
+                FavoriteOlympiad(
+                    olympiad_id=olympiad.id,
+                    title=olympiad.title,
+                    subject=subject.title if subject else olympiad.subject_code,
+                    reg_deadline=olympiad.reg_deadline,
+                    round_date=olympiad.round_date,
+                    description=olympiad.description,
+                    added_at=entry.added_at,
+                )
+            )
+        return tuple(favorites)
+
+    async def get_favorite_entries(self, *, tg_user_id: int) -> tuple[FavoriteEntry, ...]:
+        """Вернуть упорядоченные записи избранного, используя кэш."""
+
+        cached = self._cache.get(tg_user_id)
+        if cached is not None:
+            return cached
 
         async with self._session_factory() as session:
             stmt = (
-                select(UserOlympiad, Olympiad)
+                select(UserOlympiad.olympiad_id, UserOlympiad.created_at)
                 .join(User, User.id == UserOlympiad.user_id)
-                .join(Olympiad, Olympiad.id == UserOlympiad.olympiad_id)
                 .where(User.tg_id == tg_user_id)
                 .order_by(UserOlympiad.created_at.desc())
             )
             result = await session.execute(stmt)
-            favorites: list[FavoriteOlympiad] = []
-            for user_olympiad, olympiad in result.all():
-                favorites.append(
-                    FavoriteOlympiad(
-                        olympiad_id=olympiad.id,
-                        title=olympiad.title,
-                        subject=olympiad.subject,
-                        reg_deadline=olympiad.reg_deadline,
-                        round_date=olympiad.round_date,
-                        description=olympiad.description,
-                        added_at=user_olympiad.created_at,
-                    )
-                )
-            return tuple(favorites)
+            entries = tuple(
+                FavoriteEntry(olympiad_id=olympiad_id, added_at=created_at)
+                for olympiad_id, created_at in result.all()
+            )
 
-    async def remove_favorite(self, *, tg_user_id: int, olympiad_id: int) -> bool:
-        """Удалить олимпиаду из избранного пользователя."""
+        self._cache.set(tg_user_id, entries)
+        return entries
 
-        async with self._session_factory() as session:
-            async with session.begin():
-                user_id = await self._get_user_id(session, tg_user_id)
-                if user_id is None:
-                    return False
+    async def get_favorite_ids(self, *, tg_user_id: int) -> frozenset[int]:
+        """Вернуть идентификаторы избранных олимпиад, используя кэш."""
 
-                favorite = await session.get(UserOlympiad, (user_id, olympiad_id))
-                if favorite is None:
-                    return False
+        entries = await self.get_favorite_entries(tg_user_id=tg_user_id)
+        return frozenset(entry.olympiad_id for entry in entries)
 
-                await session.delete(favorite)
+    async def remove_favorite(self, *, tg_user_id: int, olympiad_id: int) -> bool:
+        """Удалить олимпиаду из избранного пользователя.
+
+        Вместе со связью удаляются неотправленные напоминания по этой
+        олимпиаде, а подключённый календарь помечается для синхронизации:
+        все команды выполняются одним запросом через CTE.
+        """
+
+        user_id = select(User.id).where(User.tg_id == tg_user_id).scalar_subquery()
+        removed = (
+            delete(UserOlympiad)
+            .where(UserOlympiad.user_id == user_id, UserOlympiad.olympiad_id == olympiad_id)
+            .returning(UserOlympiad.user_id, UserOlympiad.olympiad_id)
+            .cte("removed")
+        )
+        purged = (
+            delete(Reminder)
+            .where(
+                Reminder.user_id == removed.c.user_id,
+                Reminder.olympiad_id == removed.c.olympiad_id,
+                Reminder.sent_at.is_(None),
+            )
+            .returning(Reminder.id)
+            .cte("purged")
+        )
+        flagged = (
+            update(CalendarAccount)
+            .where(CalendarAccount.user_id.in_(select(removed.c.user_id)))
+            .values(sync_requested_at=func.coalesce(CalendarAccount.sync_requested_at, func.now()))
+            .returning(CalendarAccount.id)
+            .cte("flagged")
+        )
+        stmt = select(
+            select(func.count()).select_from(removed).scalar_subquery(),
+            select(func.count()).select_from(purged).scalar_subquery(),
+            select(func.count()).select_from(flagged).scalar_subquery(),
+        )
 
-            return True
+        async with self._session_factory() as session:
+            async with session.begin():
+                removed_count, _, _ = (await session.execute(stmt)).one()
 
-    async def _get_user_id(self, session: AsyncSession, tg_user_id: int) -> int | None:
-        """Получить внутренний идентификатор пользователя."""
+        if not removed_count:
+            return False
 
-        result = await session.execute(
-            select(User.id).where(User.tg_id == tg_user_id)
-        )
-        return result.scalar_one_or_none()
+        self._cache.remove(tg_user_id, olympiad_id)
+        get_followers_service().record((olympiad_id,), -1)
+        return True
 
 
 @lru_cache
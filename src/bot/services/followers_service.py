@@ -0,0 +1,116 @@
+"""Счётчики подписчиков олимпиад с пакетной записью в базу."""
+
+from __future__ import annotations
+
+from collections import Counter
+from functools import lru_cache
+from threading import Lock
+from typing import Iterable, Mapping
+
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.repository.db import AsyncSessionLocal
+from bot.repository.models import OlympiadFollowers
+
+# Сколько верхних счётчиков читается из базы для рейтинга популярности.
+DEFAULT_TOP_LIMIT = 50
+
+
+class FollowersService:
+    """Накопление изменений числа подписчиков и их сброс в базу.
+
+    Добавление и удаление избранного только меняют счётчики в памяти.
+    Накопленные дельты периодически записываются одной командой
+    ``INSERT ... ON CONFLICT DO UPDATE``, поэтому рейтинг не требует
+    ``COUNT(*)`` по ``user_olympiads``.
+    """
+
+    def __init__(self, session_factory: type[AsyncSession] | None = None) -> None:
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._pending: Counter[int] = Counter()
+        self._lock = Lock()
+
+    def record(self, olympiad_ids: Iterable[int], delta: int) -> None:
+        """Учесть изменение числа подписчиков у перечисленных олимпиад."""
+
+        with self._lock:
+            for olympiad_id in olympiad_ids:
+                self._pending[olympiad_id] += delta
+
+    def pending(self) -> int:
+        """Количество олимпиад с ещё не записанными изменениями."""
+
+        with self._lock:
+            return len(self._pending)
+
+    async def flush(self) -> int:
+        """Записать накопленные изменения в базу.
+
+        Возвращает число обновлённых счётчиков. Если запись не удалась,
+        изменения возвращаются в буфер до следующей попытки.
+        """
+
+        with self._lock:
+            deltas = {key: value for key, value in self._pending.items() if value}
+            self._pending.clear()
+        if not deltas:
+            return 0
+
+        stmt = pg_insert(OlympiadFollowers).values(
+            [
+                {"olympiad_id": olympiad_id, "followers": max(delta, 0)}
+                for olympiad_id, delta in sorted(deltas.items())
+            ]
+        )
+        # Новая строка получает неотрицательное значение, а к существующей
+        # прибавляется исходная дельта пакета, в том числе отрицательная.
+        delta_by_id = case(deltas, value=OlympiadFollowers.olympiad_id, else_=0)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OlympiadFollowers.olympiad_id],
+            set_={
+                "followers": func.greatest(OlympiadFollowers.followers + delta_by_id, 0),
+                "updated_at": func.now(),
+            },
+        )
+
+        try:
+            async with self._session_factory() as session:
+                async with session.begin():
+                    await session.execute(stmt)
+        except Exception:
+            self.record_many(deltas)
+            raise
+        return len(deltas)
+
+    def record_many(self, deltas: Mapping[int, int]) -> None:
+        """Вернуть в буфер набор дельт, например после неудачной записи."""
+
+        with self._lock:
+            self._pending.update(deltas)
+
+    async def load_top(self, *, limit: int = DEFAULT_TOP_LIMIT) -> dict[int, int]:
+        """Прочитать олимпиады с наибольшим числом подписчиков."""
+
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(OlympiadFollowers.olympiad_id, OlympiadFollowers.followers)
+                .where(OlympiadFollowers.followers > 0)
+                .order_by(OlympiadFollowers.followers.desc(), OlympiadFollowers.olympiad_id)
+                .limit(limit)
+            )
+            return {olympiad_id: followers for olympiad_id, followers in result.all()}
+
+
+@lru_cache
+def get_followers_service() -> FollowersService:
+    """Получить singleton-сервис счётчиков подписчиков."""
+
+    return FollowersService()
+
+
+__all__ = [
+    "FollowersService",
+    "get_followers_service",
+]
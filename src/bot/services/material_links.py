@@ -0,0 +1,145 @@
+"""Фоновая проверка ссылок материалов."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.engine import Row
+
+from bot.config import get_config
+from bot.repository.db import AsyncSessionLocal
+from bot.repository.models import LinkStatus, Material
+from bot.utils.link_checker import LinkChecker, LinkCheckResult, create_http_session
+from bot.utils.logging import logger
+
+# Сколько материалов читается и записывается за одну пачку.
+CHECK_BATCH_SIZE = 500
+# После стольких временных ошибок подряд ссылка считается битой.
+BROKEN_AFTER_FAILURES = 3
+
+
+@dataclass(slots=True)
+class LinkCheckReport:
+    """Итоги проверки ссылок."""
+
+    checked: int = 0
+    ok: int = 0
+    broken: int = 0
+    failed: int = 0
+
+
+def _apply_result(row: Row[Any], result: LinkCheckResult, now: datetime) -> dict[str, Any]:
+    """Новые значения колонок проверки для одной строки материала."""
+
+    values: dict[str, Any] = {
+        "id": row.id,
+        "link_checked_at": now,
+        "link_http_status": result.http_status,
+    }
+    if result.reachable:
+        values.update(link_status=LinkStatus.OK, link_failures=0)
+        # На 304 сервер может не прислать валидаторы: оставляем прежние.
+        if not result.not_modified:
+            values.update(link_etag=result.etag, link_last_modified=result.last_modified)
+    elif result.reachable is False:
+        values.update(link_status=LinkStatus.BROKEN, link_failures=row.link_failures + 1)
+    else:
+        failures = row.link_failures + 1
+        status = LinkStatus.BROKEN if failures >= BROKEN_AFTER_FAILURES else row.link_status
+        values.update(link_status=status, link_failures=failures)
+    return values
+
+
+async def check_material_links(*, now: datetime | None = None) -> LinkCheckReport:
+    """Проверить ссылки, результат проверки которых старше TTL.
+
+    Результаты хранятся в колонках ``materials`` и служат кэшем: ссылка,
+    проверенная недавно, повторно не запрашивается. Одинаковые ссылки
+    разных олимпиад проверяются одним запросом.
+    """
+
+    settings = get_config()
+    started_at = now or datetime.now(tz=timezone.utc)
+    due_before = started_at - timedelta(hours=settings.link_check_ttl_hours)
+    report = LinkCheckReport()
+
+    stmt = (
+        select(
+            Material.id,
+            Material.url,
+            Material.url_hash,
+            Material.link_status,
+            Material.link_failures,
+            Material.link_etag,
+            Material.link_last_modified,
+        )
+        .where(or_(Material.link_checked_at.is_(None), Material.link_checked_at < due_before))
+        .order_by(Material.link_checked_at.asc().nulls_first(), Material.id)
+        .limit(CHECK_BATCH_SIZE)
+    )
+
+    async with create_http_session(concurrency=settings.link_check_concurrency) as http:
+        checker = LinkChecker(
+            http,
+            concurrency=settings.link_check_concurrency,
+            host_interval=settings.link_check_host_interval_seconds,
+        )
+        while True:
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(stmt)).all()
+            if not rows:
+                break
+
+            groups: dict[str, list[Row[Any]]] = defaultdict(list)
+            for row in rows:
+                groups[row.url_hash or row.url].append(row)
+            keys = list(groups)
+            results = await asyncio.gather(
+                *(
+                    checker.check(
+                        groups[key][0].url,
+                        etag=groups[key][0].link_etag,
+                        last_modified=groups[key][0].link_last_modified,
+                    )
+                    for key in keys
+                )
+            )
+
+            updates = []
+            for key, result in zip(keys, results):
+                report.checked += 1
+                if result.reachable:
+                    report.ok += 1
+                elif result.reachable is False:
+                    report.broken += 1
+                else:
+                    report.failed += 1
+                updates.extend(_apply_result(row, result, started_at) for row in groups[key])
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await session.execute(update(Material), updates)
+
+            if len(rows) < CHECK_BATCH_SIZE:
+                break
+
+    if report.checked:
+        logger.info(
+            "Проверено ссылок материалов: {checked} (рабочих {ok}, битых {broken},"
+            " временных ошибок {failed})",
+            checked=report.checked,
+            ok=report.ok,
+            broken=report.broken,
+            failed=report.failed,
+        )
+    return report
+
+
+__all__ = [
+    "LinkCheckReport",
+    "check_material_links",
+]
@@ -0,0 +1,173 @@
+"""Разбор файлов пакетного импорта материалов.
+
+Поддерживаются CSV с заголовком и JSON: массив объектов или JSON Lines.
+Каждая запись содержит поля ``olympiad_id``, ``title``, ``url`` и
+необязательное ``category`` (``past_problems``, ``theory``, ``articles`` или
+``additional`` — по умолчанию). Строки
+читаются и проверяются по одной, поэтому файл не разворачивается в память
+целиком (кроме JSON-массива, который разбирается за один вызов).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Iterator, Mapping
+from urllib.parse import urlsplit
+
+from bot.repository.models import MaterialCategory
+from bot.utils.urls import url_hash
+
+MAX_REPORTED_ERRORS = 10
+SUPPORTED_SUFFIXES = (".csv", ".json", ".jsonl", ".ndjson")
+CATEGORIES = tuple(category.value for category in MaterialCategory)
+
+
+class MaterialRowError(ValueError):
+    """Ошибка валидации строки файла импорта."""
+
+
+@dataclass(frozen=True, slots=True)
+class MaterialRow:
+    """Проверенная строка импорта."""
+
+    olympiad_id: int
+    title: str
+    url: str
+    url_hash: str
+    category: MaterialCategory = MaterialCategory.ADDITIONAL
+
+
+@dataclass(slots=True)
+class MaterialsImportReport:
+    """Итоги импорта материалов."""
+
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def add_error(self, location: str, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"{location}: {message}")
+
+
+def _required_text(row: Mapping[str, Any], key: str, max_length: int) -> str:
+    value = row.get(key)
+    if value is None or not str(value).strip():
+        raise MaterialRowError(f"поле {key!r} обязательно")
+    value = str(value).strip()
+    if len(value) > max_length:
+        raise MaterialRowError(f"поле {key!r} длиннее {max_length} символов")
+    return value
+
+
+def validate_material_url(url: str) -> str:
+    """Проверить, что ссылка ведёт на http(s)-хост и её можно нормализовать."""
+
+    try:
+        parts = urlsplit(url)
+        has_host = bool(parts.hostname) and parts.port != 0
+    except ValueError:
+        raise MaterialRowError("некорректная ссылка") from None
+    if parts.scheme.lower() not in {"http", "https"} or not has_host:
+        raise MaterialRowError("ссылка должна начинаться с http:// или https://")
+    return url
+
+
+def parse_material_row(row: Mapping[str, Any]) -> MaterialRow:
+    """Проверить поля записи и посчитать хэш нормализованной ссылки."""
+
+    if row.get("_error"):
+        raise MaterialRowError(str(row["_error"]))
+    try:
+        olympiad_id = int(str(row.get("olympiad_id")).strip())
+    except ValueError:
+        raise MaterialRowError("поле 'olympiad_id' должно быть целым числом") from None
+    if olympiad_id <= 0:
+        raise MaterialRowError("поле 'olympiad_id' должно быть положительным")
+
+    url = validate_material_url(_required_text(row, "url", 1024))
+
+    category = str(row.get("category") or "").strip().lower() or MaterialCategory.ADDITIONAL.value
+    if category not in CATEGORIES:
+        raise MaterialRowError(f"поле 'category' должно быть одним из: {', '.join(CATEGORIES)}")
+
+    return MaterialRow(
+        olympiad_id=olympiad_id,
+        title=_required_text(row, "title", 255),
+        url=url,
+        url_hash=url_hash(url),
+        category=MaterialCategory(category),
+    )
+
+
+def iter_material_rows(
+    handle: BinaryIO, filename: str
+) -> Iterator[tuple[str, Mapping[str, Any]]]:
+    """Лениво читать записи файла вместе с номерами строк.
+
+    Некорректные JSON-строки возвращаются как записи с полем ``_error``.
+    """
+
+    suffix = "." + filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if suffix not in SUPPORTED_SUFFIXES:
+        raise ValueError("Поддерживаются файлы CSV, JSON и JSON Lines")
+
+    text = io.TextIOWrapper(handle, encoding="utf-8-sig", newline="")
+    if suffix == ".csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield f"строка {reader.line_num}", row
+        return
+
+    # Первый значимый символ отличает JSON-массив от JSON Lines.
+    first = text.read(1)
+    while first and first.isspace():
+        first = text.read(1)
+    if first == "[":
+        try:
+            payload = json.loads(first + text.read())
+        except json.JSONDecodeError:
+            raise ValueError("Файл не является корректным JSON") from None
+        for position, item in enumerate(payload, start=1):
+            if isinstance(item, dict):
+                yield f"запись {position}", item
+            else:
+                yield f"запись {position}", {"_error": "ожидается JSON-объект"}
+        return
+
+    for line_no, line in enumerate(_chain_first_line(first, text), start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            yield f"строка {line_no}", {"_error": "некорректный JSON"}
+            continue
+        if isinstance(item, dict):
+            yield f"строка {line_no}", item
+        else:
+            yield f"строка {line_no}", {"_error": "ожидается JSON-объект"}
+
+
+def _chain_first_line(first: str, text: io.TextIOBase) -> Iterator[str]:
+    """Вернуть строки потока, не потеряв уже прочитанный первый символ."""
+
+    if not first:
+        return
+    yield first + text.readline()
+    yield from text
+
+
+__all__ = [
+    "MaterialRow",
+    "MaterialRowError",
+    "MaterialsImportReport",
+    "iter_material_rows",
+    "parse_material_row",
+    "validate_material_url",
+]
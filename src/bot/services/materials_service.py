@@ -2,35 +2,129 @@
 
 from __future__ import annotations
 
+import enum
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from functools import lru_cache
-from typing import Mapping, Sequence
-
-from sqlalchemy import select
+from itertools import count
+from threading import Lock
+from typing import Any, Iterable, Mapping
+
+from sqlalchemy import (
+    CTE,
+    ColumnElement,
+    case,
+    delete,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.repository.db import AsyncSessionLocal
-from bot.repository.models import Material
+from bot.repository.db import AsyncSessionLocal, engine
+from bot.repository.models import LinkStatus, Material, MaterialCategory, Olympiad
+from bot.services.materials_import import (
+    MaterialRow,
+    MaterialRowError,
+    MaterialsImportReport,
+    parse_material_row,
+)
+from bot.utils.logging import logger
+from bot.utils.pg_listener import PgListener
+from bot.utils.urls import url_hash
+
+# Канал PostgreSQL, через который реплики сообщают об изменённых материалах.
+MATERIALS_CHANNEL = "materials_changed"
+DEFAULT_ADMIN_PAGE_SIZE = 10
+DEFAULT_IMPORT_BATCH_SIZE = 500
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# SQLSTATE нарушения уникальности (дубликат ссылки у олимпиады).
+_UNIQUE_VIOLATION = "23505"
+
+# Колонки проверки ссылки, которые сбрасываются при смене адреса.
+_LINK_RESET_VALUES: dict[str, Any] = {
+    "link_status": LinkStatus.UNKNOWN,
+    "link_http_status": None,
+    "link_failures": 0,
+    "link_checked_at": None,
+    "link_etag": None,
+    "link_last_modified": None,
+}
+
+
+class WriteOutcome(str, enum.Enum):
+    """Результат правки материала администратором."""
+
+    OK = "ok"
+    NOT_FOUND = "not_found"
+    CONFLICT = "conflict"
+    DUPLICATE = "duplicate"
+
+
+def _notify_cte(changed: CTE, *olympiad_columns: ColumnElement[Any]) -> CTE:
+    """CTE с ``pg_notify`` по строкам ``changed``.
+
+    Немодифицирующий CTE выполняется, только если на него ссылаются, поэтому
+    итоговый запрос должен присоединить его к выборке.
+    """
+
+    payload = func.concat_ws(",", *olympiad_columns)
+    return (
+        select(func.pg_notify(MATERIALS_CHANNEL, payload).label("notified"))
+        .select_from(changed)
+        .cte("notified")
+    )
 
 
 @dataclass(frozen=True, slots=True)
 class MaterialLink:
-    """Ссылка на материал для подготовки."""
+    """Ссылка на материал для подготовки.
+
+    ``file_id`` задан, если к материалу приложен документ в Telegram.
+    """
 
     title: str
     url: str
+    file_id: str | None = None
 
 
 @dataclass(frozen=True, slots=True)
 class MaterialsBundle:
     """Набор материалов по категориям."""
 
-    past_problems: tuple[MaterialLink, ...]
-    theory: tuple[MaterialLink, ...]
-    articles: tuple[MaterialLink, ...]
+    past_problems: tuple[MaterialLink, ...] = ()
+    theory: tuple[MaterialLink, ...] = ()
+    articles: tuple[MaterialLink, ...] = ()
     additional: tuple[MaterialLink, ...] = ()
 
+    def documents(self) -> tuple[MaterialLink, ...]:
+        """Материалы с приложенными документами в порядке разделов."""
+
+        return tuple(
+            link
+            for links in (self.past_problems, self.theory, self.articles, self.additional)
+            for link in links
+            if link.file_id
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class DemoMaterial:
+    """Материал демо-подборки, добавляемый вместе с демо-олимпиадой."""
+
+    olympiad_id: int
+    category: MaterialCategory
+    title: str
+    url: str
+
 
 @dataclass(frozen=True, slots=True)
 class AdminMaterial:
@@ -42,56 +136,213 @@ class AdminMaterial:
     url: str
     added_by_admin_id: int | None
     created_at: datetime
+    category: MaterialCategory = MaterialCategory.ADDITIONAL
+    link_status: LinkStatus = LinkStatus.UNKNOWN
+    link_http_status: int | None = None
+    link_checked_at: datetime | None = None
+    document_name: str | None = None
+    version: int = 1
+
+
+@dataclass(frozen=True, slots=True)
+class MaterialsCursor:
+    """Позиция в списке материалов, упорядоченном по ``(created_at, id)``.
+
+    ``older`` задаёт направление: к более старым записям (следующая
+    страница) или к более новым (предыдущая).
+    """
+
+    created_at: datetime
+    id: int
+    older: bool = True
+
+    def encode(self) -> str:
+        """Компактный токен для callback-данных."""
+
+        micros = (self.created_at - _EPOCH) // timedelta(microseconds=1)
+        return f"{'o' if self.older else 'n'}{micros:x}.{self.id:x}"
+
+    @classmethod
+    def decode(cls, token: str) -> MaterialsCursor | None:
+        """Разобрать токен; некорректный токен означает первую страницу."""
+
+        direction, body = token[:1], token[1:]
+        raw_micros, _, raw_id = body.partition(".")
+        if direction not in {"o", "n"}:
+            return None
+        try:
+            micros, material_id = int(raw_micros, 16), int(raw_id, 16)
+        except ValueError:
+            return None
+        return cls(
+            created_at=_EPOCH + timedelta(microseconds=micros),
+            id=material_id,
+            older=direction == "o",
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class AdminMaterialsPage:
+    """Страница списка материалов для административной панели."""
+
+    items: tuple[AdminMaterial, ...]
+    olympiad_id: int | None = None
+    from_start: bool = True
+    newer: MaterialsCursor | None = None
+    older: MaterialsCursor | None = None
 
 
 class MaterialsService:
-    """Бизнес-логика формирования подборок материалов."""
+    """Бизнес-логика формирования подборок материалов.
 
-    def __init__(
-        self,
-        demo_data: Mapping[int, MaterialsBundle] | None = None,
-        session_factory: type[AsyncSession] | None = None,
-    ) -> None:
+    Подборки кэшируются по олимпиаде. Каждая правка материалов присваивает
+    затронутым олимпиадам новое поколение, поэтому записи, прочитанные до
+    правки, больше не выдаются. Об изменениях остальные реплики узнают
+    через ``NOTIFY`` в канал :data:`MATERIALS_CHANNEL`.
+    """
+
+    def __init__(self, session_factory: type[AsyncSession] | None = None) -> None:
         self._session_factory = session_factory or AsyncSessionLocal
-        self._demo_data = demo_data or _DEFAULT_DEMO_MATERIALS
+        self._lock = Lock()
+        self._counter = count(1)
+        self._base_generation = 0
+        self._generations: dict[int, int] = {}
+        self._bundles: dict[int, tuple[int, MaterialsBundle]] = {}
+        self._listener: PgListener | None = None
+
+    def generation(self, olympiad_id: int) -> int:
+        """Текущее поколение материалов олимпиады для ключей кэша экранов."""
+
+        with self._lock:
+            return self._generations.get(olympiad_id, self._base_generation)
+
+    def invalidate(self, *olympiad_ids: int) -> None:
+        """Сбросить кэш указанных олимпиад или, без аргументов, весь кэш."""
+
+        with self._lock:
+            if not olympiad_ids:
+                self._base_generation = next(self._counter)
+                self._generations.clear()
+                self._bundles.clear()
+                return
+            for olympiad_id in olympiad_ids:
+                self._generations[olympiad_id] = next(self._counter)
+                self._bundles.pop(olympiad_id, None)
+
+    def handle_notification(self, payload: str) -> None:
+        """Применить уведомление другой реплики: список id через запятую."""
+
+        olympiad_ids = [int(item) for item in payload.split(",") if item.strip().isdigit()]
+        if olympiad_ids:
+            self.invalidate(*olympiad_ids)
+
+    def start_listener(self) -> None:
+        """Подписаться на изменения материалов, сделанные другими репликами."""
+
+        if self._listener is None:
+            self._listener = PgListener(
+                engine,
+                MATERIALS_CHANNEL,
+                self.handle_notification,
+                on_reconnect=self.invalidate,
+            )
+        self._listener.start()
 
-    async def get_materials(self, olympiad_id: int) -> MaterialsBundle:
-        """Вернуть материалы по олимпиаде с учётом демо-заглушек и БД."""
+    async def stop_listener(self) -> None:
+        """Остановить подписку на изменения материалов."""
 
-        bundle = self._demo_data.get(olympiad_id, _DEFAULT_DEMO_MATERIALS[0])
+        if self._listener is not None:
+            await self._listener.stop()
 
+    async def get_materials(self, olympiad_id: int) -> MaterialsBundle:
+        """Вернуть материалы олимпиады, сгруппированные по категориям."""
+
+        with self._lock:
+            generation = self._generations.get(olympiad_id, self._base_generation)
+            cached = self._bundles.get(olympiad_id)
+            if cached is not None and cached[0] == generation:
+                return cached[1]
+
+        bundle = await self._load_materials(olympiad_id)
+        with self._lock:
+            # Правка во время чтения уже сменила поколение: не кэшируем.
+            if self._generations.get(olympiad_id, self._base_generation) == generation:
+                self._bundles[olympiad_id] = (generation, bundle)
+        return bundle
+
+    async def _load_materials(self, olympiad_id: int) -> MaterialsBundle:
+        """Прочитать материалы олимпиады одним запросом и разложить по категориям."""
+
+        stmt = (
+            select(Material.category, Material.title, Material.url, Material.document_file_id)
+            .where(Material.olympiad_id == olympiad_id)
+            .order_by(Material.created_at.desc(), Material.id.desc())
+        )
+        groups: dict[MaterialCategory, list[MaterialLink]] = {
+            category: [] for category in MaterialCategory
+        }
         async with self._session_factory() as session:
-            stmt = (
-                select(Material)
-                .where(Material.olympiad_id == olympiad_id)
-                .order_by(Material.created_at.desc())
-            )
-            result = await session.execute(stmt)
-            db_links = tuple(
-                MaterialLink(title=item.title, url=item.url)
-                for item in result.scalars()
-            )
-
-        if not db_links:
-            return bundle
+            for category, title, url, file_id in await session.execute(stmt):
+                groups[category].append(MaterialLink(title=title, url=url, file_id=file_id))
 
         return MaterialsBundle(
-            past_problems=bundle.past_problems,
-            theory=bundle.theory,
-            articles=bundle.articles,
-            additional=db_links,
+            past_problems=tuple(groups[MaterialCategory.PAST_PROBLEMS]),
+            theory=tuple(groups[MaterialCategory.THEORY]),
+            articles=tuple(groups[MaterialCategory.ARTICLES]),
+            additional=tuple(groups[MaterialCategory.ADDITIONAL]),
         )
 
-    async def list_admin_materials(self) -> Sequence[AdminMaterial]:
-        """Вернуть все материалы для административного интерфейса."""
+    async def list_admin_materials(
+        self,
+        *,
+        olympiad_id: int | None = None,
+        cursor: MaterialsCursor | None = None,
+        limit: int = DEFAULT_ADMIN_PAGE_SIZE,
+    ) -> AdminMaterialsPage:
+        """Вернуть страницу материалов, начиная с самых новых.
+
+        Страница выбирается по ключу ``(created_at, id)`` от позиции
+        ``cursor`` одним запросом по составному индексу, без ``OFFSET``.
+        Лишняя строка в выборке показывает, есть ли записи дальше.
+        """
+
+        limit = max(limit, 1)
+        key = tuple_(Material.created_at, Material.id)
+        stmt = select(Material)
+        if olympiad_id is not None:
+            stmt = stmt.where(Material.olympiad_id == olympiad_id)
+        if cursor is None or cursor.older:
+            if cursor is not None:
+                stmt = stmt.where(key < tuple_(cursor.created_at, cursor.id))
+            stmt = stmt.order_by(Material.created_at.desc(), Material.id.desc())
+        else:
+            stmt = stmt.where(key > tuple_(cursor.created_at, cursor.id))
+            stmt = stmt.order_by(Material.created_at, Material.id)
 
         async with self._session_factory() as session:
-            stmt = select(Material).order_by(Material.created_at.desc())
-            result = await session.execute(stmt)
-            materials = tuple(
-                self._map_admin_material(material) for material in result.scalars()
-            )
-        return materials
+            result = await session.execute(stmt.limit(limit + 1))
+            rows = [self._map_admin_material(material) for material in result.scalars()]
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if cursor is not None and not cursor.older:
+            rows.reverse()
+            has_newer, has_older = has_more, True
+        else:
+            has_newer, has_older = cursor is not None, has_more
+
+        newer = older = None
+        if rows and has_newer:
+            newer = MaterialsCursor(rows[0].created_at, rows[0].id, older=False)
+        if rows and has_older:
+            older = MaterialsCursor(rows[-1].created_at, rows[-1].id)
+        return AdminMaterialsPage(
+            items=tuple(rows),
+            olympiad_id=olympiad_id,
+            from_start=cursor is None,
+            newer=newer,
+            older=older,
+        )
 
     async def get_material(self, material_id: int) -> AdminMaterial | None:
         """Получить материал по идентификатору."""
@@ -109,21 +360,44 @@ class MaterialsService:
         title: str,
         url: str,
         admin_tg_id: int,
+        category: MaterialCategory | None = None,
     ) -> AdminMaterial:
-        """Создать новый материал и вернуть его представление."""
+        """Создать материал и вернуть его представление.
+
+        Если у олимпиады уже есть материал с той же нормализованной ссылкой,
+        обновляется существующая запись. Её категория меняется, только если
+        ``category`` передана явно; новый материал без категории попадает в
+        дополнительные.
+        """
+
+        stmt = pg_insert(Material).values(
+            olympiad_id=olympiad_id,
+            title=title,
+            url=url,
+            url_hash=url_hash(url),
+            category=category or MaterialCategory.ADDITIONAL,
+            added_by_admin_id=admin_tg_id,
+        )
+        changes: dict[str, Any] = {
+            "title": stmt.excluded.title,
+            "url": stmt.excluded.url,
+            "added_by_admin_id": stmt.excluded.added_by_admin_id,
+            "version": Material.version + 1,
+        }
+        if category is not None:
+            changes["category"] = stmt.excluded.category
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Material.olympiad_id, Material.url_hash],
+            set_=changes,
+        ).returning(Material)
 
         async with self._session_factory() as session:
             async with session.begin():
-                material = Material(
-                    olympiad_id=olympiad_id,
-                    title=title,
-                    url=url,
-                    added_by_admin_id=admin_tg_id,
-                )
-                session.add(material)
-                await session.flush()
-                await session.refresh(material)
-                return self._map_admin_material(material)
+                material = (await session.execute(stmt)).scalar_one()
+                await self._notify_changed(session, (olympiad_id,))
+                created = self._map_admin_material(material)
+        self.invalidate(olympiad_id)
+        return created
 
     async def update_material(
         self,
@@ -133,30 +407,283 @@ class MaterialsService:
         title: str,
         url: str,
         admin_tg_id: int,
+        expected_version: int | None = None,
+    ) -> WriteOutcome:
+        """Обновить материал одним запросом ``UPDATE ... RETURNING``.
+
+        Если передана ``expected_version``, а материал успели изменить,
+        возвращается :attr:`WriteOutcome.CONFLICT`. Отсутствие материала и
+        конфликт версий различаются через CTE с текущей строкой, поэтому
+        предварительное чтение не нужно.
+        """
+
+        current = (
+            select(Material.id, Material.olympiad_id)
+            .where(Material.id == material_id)
+            .cte("current")
+        )
+        url_changed = Material.url != url
+        # При смене адреса результаты проверки прежней ссылки сбрасываются.
+        link_reset = {
+            name: case(
+                (url_changed, literal(value, Material.__table__.c[name].type)),
+                else_=Material.__table__.c[name],
+            )
+            for name, value in _LINK_RESET_VALUES.items()
+        }
+        stmt = (
+            update(Material)
+            .where(Material.id == current.c.id)
+            .values(
+                olympiad_id=olympiad_id,
+                title=title,
+                url=url,
+                url_hash=url_hash(url),
+                added_by_admin_id=admin_tg_id,
+                version=Material.version + 1,
+                **link_reset,
+            )
+            .returning(
+                Material.id,
+                Material.olympiad_id,
+                current.c.olympiad_id.label("previous_olympiad_id"),
+            )
+        )
+        if expected_version is not None:
+            stmt = stmt.where(Material.version == expected_version)
+        updated = stmt.cte("updated")
+        notified = _notify_cte(updated, updated.c.previous_olympiad_id, updated.c.olympiad_id)
+        query = select(
+            current.c.id, updated.c.previous_olympiad_id, updated.c.olympiad_id
+        ).select_from(
+            current.outerjoin(updated, true()).outerjoin(notified, true())
+        )
+
+        try:
+            async with self._session_factory() as session:
+                async with session.begin():
+                    row = (await session.execute(query)).first()
+        except IntegrityError as exc:
+            if getattr(exc.orig, "sqlstate", None) != _UNIQUE_VIOLATION:
+                raise
+            return WriteOutcome.DUPLICATE
+        if row is None:
+            return WriteOutcome.NOT_FOUND
+        if row.olympiad_id is None:
+            return WriteOutcome.CONFLICT
+        # Материал мог переехать к другой олимпиаде: сбрасываем обе.
+        self.invalidate(row.previous_olympiad_id, row.olympiad_id)
+        return WriteOutcome.OK
+
+    async def import_materials(
+        self,
+        rows: Iterable[tuple[str, Mapping[str, Any]]],
+        *,
+        admin_tg_id: int,
+        batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+    ) -> MaterialsImportReport:
+        """Загрузить материалы из потока записей одной транзакцией.
+
+        Записи проверяются по мере чтения и пишутся пачками через
+        ``INSERT ... ON CONFLICT`` по уникальному индексу хэша ссылки.
+        Повторы внутри файла, записи неизвестных олимпиад и строки без
+        изменений пропускаются.
+        """
+
+        report = MaterialsImportReport()
+        seen: set[tuple[int, str]] = set()
+        known_olympiads: set[int] = set()
+        affected: set[int] = set()
+        batch: list[tuple[str, MaterialRow]] = []
+
+        async def flush(session: AsyncSession) -> None:
+            missing = {row.olympiad_id for _, row in batch} - known_olympiads
+            if missing:
+                found = await session.scalars(select(Olympiad.id).where(Olympiad.id.in_(missing)))
+                known_olympiads.update(found)
+            values = []
+            for location, row in batch:
+                if row.olympiad_id not in known_olympiads:
+                    report.add_error(location, f"олимпиада {row.olympiad_id} не найдена")
+                    continue
+                values.append(
+                    {
+                        "olympiad_id": row.olympiad_id,
+                        "title": row.title,
+                        "url": row.url,
+                        "url_hash": row.url_hash,
+                        "category": row.category,
+                        "added_by_admin_id": admin_tg_id,
+                    }
+                )
+            batch.clear()
+            if not values:
+                return
+
+            stmt = pg_insert(Material).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Material.olympiad_id, Material.url_hash],
+                set_={
+                    "title": stmt.excluded.title,
+                    "url": stmt.excluded.url,
+                    "category": stmt.excluded.category,
+                    "added_by_admin_id": stmt.excluded.added_by_admin_id,
+                    "version": Material.version + 1,
+                },
+                where=or_(
+                    Material.title.is_distinct_from(stmt.excluded.title),
+                    Material.url.is_distinct_from(stmt.excluded.url),
+                    Material.category.is_distinct_from(stmt.excluded.category),
+                ),
+            ).returning(Material.olympiad_id, literal_column("xmax = 0"))
+            # Строка без изменений не попадает в RETURNING; xmax = 0 у вставленных.
+            written = (await session.execute(stmt)).all()
+            inserted = sum(1 for _, is_new in written if is_new)
+            report.inserted += inserted
+            report.updated += len(written) - inserted
+            report.skipped += len(values) - len(written)
+            affected.update(olympiad_id for olympiad_id, _ in written)
+
+        async with self._session_factory() as session:
+            async with session.begin():
+                for location, raw in rows:
+                    try:
+                        row = parse_material_row(raw)
+                    except MaterialRowError as exc:
+                        report.add_error(location, str(exc))
+                        continue
+                    key = (row.olympiad_id, row.url_hash)
+                    if key in seen:
+                        report.add_error(location, "ссылка уже встречалась в файле")
+                        continue
+                    seen.add(key)
+                    batch.append((location, row))
+                    if len(batch) >= batch_size:
+                        await flush(session)
+                await flush(session)
+                if affected:
+                    await self._notify_changed(session, affected)
+
+        if affected:
+            self.invalidate(*affected)
+        logger.info(
+            "Импорт материалов: добавлено {inserted}, обновлено {updated}, пропущено {skipped}",
+            inserted=report.inserted,
+            updated=report.updated,
+            skipped=report.skipped,
+        )
+        return report
+
+    async def attach_document(
+        self,
+        *,
+        material_id: int,
+        file_id: str,
+        file_unique_id: str,
+        file_name: str | None,
     ) -> bool:
-        """Обновить существующий материал."""
+        """Приложить к материалу документ, уже загруженный в Telegram.
+
+        Сохраняется ``file_id``: при выдаче материалов документ отправляется
+        по нему, без повторной загрузки файла.
+        """
+
+        updated = (
+            update(Material)
+            .where(Material.id == material_id)
+            .values(
+                document_file_id=file_id,
+                document_file_unique_id=file_unique_id,
+                document_name=(file_name or "")[:255] or None,
+                version=Material.version + 1,
+            )
+            .returning(Material.olympiad_id)
+            .cte("updated")
+        )
+        notified = _notify_cte(updated, updated.c.olympiad_id)
+        query = select(updated.c.olympiad_id).select_from(updated.join(notified, true()))
 
         async with self._session_factory() as session:
             async with session.begin():
-                material = await session.get(Material, material_id)
-                if material is None:
-                    return False
-                material.olympiad_id = olympiad_id
-                material.title = title
-                material.url = url
-                material.added_by_admin_id = admin_tg_id
-            return True
-
-    async def delete_material(self, material_id: int) -> bool:
-        """Удалить материал по идентификатору."""
+                olympiad_id = await session.scalar(query)
+        if olympiad_id is None:
+            return False
+        self.invalidate(olympiad_id)
+        return True
+
+    async def delete_material(
+        self, material_id: int, *, expected_version: int | None = None
+    ) -> WriteOutcome:
+        """Удалить материал одним запросом ``DELETE ... RETURNING``.
+
+        С ``expected_version`` удаление не выполняется, если материал
+        изменили после того, как администратор увидел список.
+        """
+
+        current = select(Material.id).where(Material.id == material_id).cte("current")
+        stmt = (
+            delete(Material)
+            .where(Material.id == current.c.id)
+            .returning(Material.id, Material.olympiad_id)
+        )
+        if expected_version is not None:
+            stmt = stmt.where(Material.version == expected_version)
+        deleted = stmt.cte("deleted")
+        notified = _notify_cte(deleted, deleted.c.olympiad_id)
+        query = select(current.c.id, deleted.c.olympiad_id).select_from(
+            current.outerjoin(deleted, true()).outerjoin(notified, true())
+        )
 
         async with self._session_factory() as session:
             async with session.begin():
-                material = await session.get(Material, material_id)
-                if material is None:
-                    return False
-                await session.delete(material)
-            return True
+                row = (await session.execute(query)).first()
+        if row is None:
+            return WriteOutcome.NOT_FOUND
+        if row.olympiad_id is None:
+            return WriteOutcome.CONFLICT
+        self.invalidate(row.olympiad_id)
+        return WriteOutcome.OK
+
+    async def add_demo_materials(
+        self, session: AsyncSession, olympiad_ids: Iterable[int]
+    ) -> tuple[int, ...]:
+        """Добавить демо-подборки к только что сохранённым демо-олимпиадам.
+
+        Работает в транзакции вызывающего; реплики узнают об изменении при
+        её фиксации. Возвращает олимпиады, которым добавлены материалы.
+        """
+
+        wanted = set(olympiad_ids)
+        rows = [
+            {
+                "olympiad_id": item.olympiad_id,
+                "category": item.category,
+                "title": item.title,
+                "url": item.url,
+                "url_hash": url_hash(item.url),
+            }
+            for item in DEMO_MATERIALS
+            if item.olympiad_id in wanted
+        ]
+        if not rows:
+            return ()
+        stmt = (
+            pg_insert(Material)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[Material.olympiad_id, Material.url_hash])
+            .returning(Material.olympiad_id)
+        )
+        seeded = tuple(sorted(set((await session.execute(stmt)).scalars().all())))
+        if seeded:
+            await self._notify_changed(session, seeded)
+        return seeded
+
+    async def _notify_changed(self, session: AsyncSession, olympiad_ids: Iterable[int]) -> None:
+        """Отправить уведомление репликам; доставляется при фиксации транзакции."""
+
+        payload = ",".join(str(olympiad_id) for olympiad_id in sorted(set(olympiad_ids)))
+        await session.execute(select(func.pg_notify(MATERIALS_CHANNEL, payload)))
+        logger.debug("Материалы изменены для олимпиад {ids}", ids=payload)
 
     def _map_admin_material(self, material: Material) -> AdminMaterial:
         """Собрать dataclass с деталями материала."""
@@ -168,151 +695,127 @@ class MaterialsService:
             url=material.url,
             added_by_admin_id=material.added_by_admin_id,
             created_at=material.created_at,
+            category=material.category,
+            link_status=material.link_status,
+            link_http_status=material.link_http_status,
+            link_checked_at=material.link_checked_at,
+            document_name=material.document_name if material.document_file_id else None,
+            version=material.version,
         )
 
 
-_DEFAULT_DEMO_MATERIALS: dict[int, MaterialsBundle] = {
-    0: MaterialsBundle(
-        past_problems=(
-            MaterialLink(
-                title="Задачи прошлых лет (PDF)",
-                url="https://example.org/past-papers.pdf",
-            ),
-        ),
-        theory=(
-            MaterialLink(
-                title="Теория и видеоразборы на YouTube",
-                url="https://www.youtube.com/playlist?list=DEMO_OLYMPIAD",
-            ),
-        ),
-        articles=(
-            MaterialLink(
-                title="Подборка статей и методичек",
-                url="https://example.org/articles",
-            ),
-        ),
+# Подборки к демо-олимпиадам каталога по умолчанию. В базу они попадают
+# вместе с олимпиадой, когда её впервые добавляют в избранное.
+DEMO_MATERIALS: tuple[DemoMaterial, ...] = (
+    DemoMaterial(
+        1,
+        MaterialCategory.PAST_PROBLEMS,
+        "НИУ ВШЭ: комплект задач прошлых лет",
+        "https://example.org/hse/problems",
     ),
-    1: MaterialsBundle(
-        past_problems=(
-            MaterialLink(
-                title="НИУ ВШЭ: комплект задач прошлых лет",
-                url="https://example.org/hse/problems",
-            ),
-        ),
-        theory=(
-            MaterialLink(
-                title="НИУ ВШЭ: теория и видеоразборы",
-                url="https://example.org/hse/theory",
-            ),
-        ),
-        articles=(
-            MaterialLink(
-                title="НИУ ВШЭ: методички и полезные статьи",
-                url="https://example.org/hse/articles",
-            ),
-        ),
+    DemoMaterial(
+        1,
+        MaterialCategory.THEORY,
+        "НИУ ВШЭ: теория и видеоразборы",
+        "https://example.org/hse/theory",
     ),
-    2: MaterialsBundle(
-        past_problems=(
-            MaterialLink(
-                title="ВсОШ по математике: задачи за 2023 год",
-                url="https://example.org/vsosh/problems",
-            ),
-        ),
-        theory=(
-            MaterialLink(
-                title="ВсОШ: теория и вебинары",
-                url="https://example.org/vsosh/theory",
-            ),
-        ),
-        articles=(
-            MaterialLink(
-                title="ВсОШ: рекомендации и методические материалы",
-                url="https://example.org/vsosh/articles",
-            ),
-        ),
+    DemoMaterial(
+        1,
+        MaterialCategory.ARTICLES,
+        "НИУ ВШЭ: методички и полезные статьи",
+        "https://example.org/hse/articles",
     ),
-    3: MaterialsBundle(
-        past_problems=(
-            MaterialLink(
-                title="НТИ: задачи отборочного и финала",
-                url="https://example.org/nti/problems",
-            ),
-        ),
-        theory=(
-            MaterialLink(
-                title="НТИ: теория и тренировки",
-                url="https://example.org/nti/theory",
-            ),
-        ),
-        articles=(
-            MaterialLink(
-                title="НТИ: статьи и гайды",
-                url="https://example.org/nti/articles",
-            ),
-        ),
+    DemoMaterial(
+        2,
+        MaterialCategory.PAST_PROBLEMS,
+        "ВсОШ по математике: задачи за 2023 год",
+        "https://example.org/vsosh/problems",
     ),
-    4: MaterialsBundle(
-        past_problems=(
-            MaterialLink(
-                title="ВсОШ по информатике: задания прошлых лет",
-                url="https://example.org/informatics/problems",
-            ),
-        ),
-        theory=(
-            MaterialLink(
-                title="ВсОШ по информатике: теория и разборы",
-                url="https://example.org/informatics/theory",
-            ),
-        ),
-        articles=(
-            MaterialLink(
-                title="ВсОШ по информатике: полезные материалы",
-                url="https://example.org/informatics/articles",
-            ),
-        ),
+    DemoMaterial(
+        2,
+        MaterialCategory.THEORY,
+        "ВсОШ: теория и вебинары",
+        "https://example.org/vsosh/theory",
     ),
-    5: MaterialsBundle(
-        past_problems=(
-            MaterialLink(
-                title="Физтех: комплект прошлых туров",
-                url="https://example.org/mipt/problems",
-            ),
-        ),
-        theory=(
-            MaterialLink(
-                title="Физтех: лекции и видеоразборы",
-                url="https://example.org/mipt/theory",
-            ),
-        ),
-        articles=(
-            MaterialLink(
-                title="Физтех: статьи и памятки",
-                url="https://example.org/mipt/articles",
-            ),
-        ),
+    DemoMaterial(
+        2,
+        MaterialCategory.ARTICLES,
+        "ВсОШ: рекомендации и методические материалы",
+        "https://example.org/vsosh/articles",
     ),
-    6: MaterialsBundle(
-        past_problems=(
-            MaterialLink(
-                title="Ломоносов: задачи прошлых лет",
-                url="https://example.org/lomonosov/problems",
-            ),
-        ),
-        theory=(
-            MaterialLink(
-                title="Ломоносов: теория и видео",
-                url="https://example.org/lomonosov/theory",
-            ),
-        ),
-        articles=(
-            MaterialLink(
-                title="Ломоносов: методические рекомендации",
-                url="https://example.org/lomonosov/articles",
-            ),
-        ),
+    DemoMaterial(
+        3,
+        MaterialCategory.PAST_PROBLEMS,
+        "НТИ: задачи отборочного и финала",
+        "https://example.org/nti/problems",
     ),
-}
+    DemoMaterial(
+        3,
+        MaterialCategory.THEORY,
+        "НТИ: теория и тренировки",
+        "https://example.org/nti/theory",
+    ),
+    DemoMaterial(
+        3,
+        MaterialCategory.ARTICLES,
+        "НТИ: статьи и гайды",
+        "https://example.org/nti/articles",
+    ),
+    DemoMaterial(
+        4,
+        MaterialCategory.PAST_PROBLEMS,
+        "ВсОШ по информатике: задания прошлых лет",
+        "https://example.org/informatics/problems",
+    ),
+    DemoMaterial(
+        4,
+        MaterialCategory.THEORY,
+        "ВсОШ по информатике: теория и разборы",
+        "https://example.org/informatics/theory",
+    ),
+    DemoMaterial(
+        4,
+        MaterialCategory.ARTICLES,
+        "ВсОШ по информатике: полезные материалы",
+        "https://example.org/informatics/articles",
+    ),
+    DemoMaterial(
+        5,
+        MaterialCategory.PAST_PROBLEMS,
+        "Физтех: комплект прошлых туров",
+        "https://example.org/mipt/problems",
+    ),
+    DemoMaterial(
+        5,
+        MaterialCategory.THEORY,
+        "Физтех: лекции и видеоразборы",
+        "https://example.org/mipt/theory",
+    ),
+    DemoMaterial(
+        5,
+        MaterialCategory.ARTICLES,
+        "Физтех: статьи и памятки",
+        "https://example.org/mipt/articles",
+    ),
+    DemoMaterial(
+        6,
+        MaterialCategory.PAST_PROBLEMS,
+        "Ломоносов: задачи прошлых лет",
+        "https://example.org/lomonosov/problems",
+    ),
+    DemoMaterial(
+        6,
+        MaterialCategory.THEORY,
+        "Ломоносов: теория и видео",
+        "https://example.org/lomonosov/theory",
+    ),
+    DemoMaterial(
+        6,
+        MaterialCategory.ARTICLES,
+        "Ломоносов: методические рекомендации",
+        "https://example.org/lomonosov/articles",
+    ),
+)
 
 
 @lru_cache
@@ -323,9 +826,17 @@ def get_materials_service() -> MaterialsService:
 
 
 __all__ = [
+    "DEMO_MATERIALS",
+    "MATERIALS_CHANNEL",
     "AdminMaterial",
+    "AdminMaterialsPage",
+    "DemoMaterial",
+    "LinkStatus",
+    "MaterialCategory",
     "MaterialLink",
     "MaterialsBundle",
+    "MaterialsCursor",
     "MaterialsService",
+    "WriteOutcome",
     "get_materials_service",
 ]
@@ -2,17 +2,36 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import date, datetime, timezone
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta, timezone
 from functools import lru_cache
-from typing import Sequence
+from typing import AbstractSet, Iterable, Literal, Mapping, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.repository.db import AsyncSessionLocal
-from bot.repository.models import Olympiad, User, UserOlympiad
-from bot.services.reminder_service import get_reminder_service
+from bot.repository.models import (
+    CalendarAccount,
+    CatalogState,
+    CatalogSubject,
+    Olympiad,
+    User,
+    UserOlympiad,
+)
+from bot.services.favorites_cache import get_favorites_cache
+from bot.services.followers_service import get_followers_service
+from bot.services.materials_service import get_materials_service
+from bot.services.reminder_service import FavoriteDates, get_reminder_service
+from bot.utils.logging import logger
+
+# Версия демо-каталога; версии из таблицы catalog_state начинаются с единицы.
+DEMO_CATALOG_VERSION = 0
+CATALOG_STATE_ID = 1
+# Сколько олимпиад показывается в рейтинге популярности.
+POPULAR_LIMIT = 10
 
 
 @dataclass(frozen=True, slots=True)
@@ -36,6 +55,26 @@ class OlympiadInfo:
     description: str | None = None
 
 
+EventKind = Literal["reg_deadline", "round"]
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogEvent:
+    """Ключевая дата олимпиады: окончание регистрации или тур."""
+
+    day: date
+    kind: EventKind
+    olympiad: OlympiadInfo
+
+
+@dataclass(frozen=True, slots=True)
+class PopularOlympiad:
+    """Олимпиада рейтинга популярности и число её подписчиков."""
+
+    olympiad: OlympiadInfo
+    followers: int
+
+
 DEMO_SUBJECTS: tuple[Subject, ...] = (
     Subject(code="math", title="Математика"),
     Subject(code="informatics", title="Информатика"),
@@ -96,42 +135,265 @@ DEMO_OLYMPIADS: tuple[OlympiadInfo, ...] = (
 )
 
 
+@dataclass(frozen=True, slots=True)
+class CatalogSnapshot:
+    """Неизменяемый срез каталога с готовыми индексами.
+
+    Снимок пересобирается целиком при смене каталога, а обработчики
+    используют ``version`` как ключ для кэшей отрисованных экранов.
+    Рейтинг ``popular`` обновляется отдельно и меняет ``popularity_version``.
+    """
+
+    version: int
+    subjects: tuple[Subject, ...]
+    subjects_by_code: Mapping[str, Subject]
+    olympiads_by_subject: Mapping[str, tuple[OlympiadInfo, ...]]
+    olympiads_by_id: Mapping[int, OlympiadInfo]
+    events: tuple[CatalogEvent, ...] = ()
+    event_days: tuple[date, ...] = ()
+    popular: tuple[PopularOlympiad, ...] = ()
+    popularity_version: int = 0
+
+
+def rank_popular(
+    olympiads_by_id: Mapping[int, OlympiadInfo],
+    followers: Mapping[int, int],
+    *,
+    limit: int = POPULAR_LIMIT,
+) -> tuple[PopularOlympiad, ...]:
+    """Отсортировать олимпиады каталога по числу подписчиков."""
+
+    ranked = [
+        PopularOlympiad(olympiad=olympiads_by_id[olympiad_id], followers=count)
+        for olympiad_id, count in followers.items()
+        if count > 0 and olympiad_id in olympiads_by_id
+    ]
+    ranked.sort(key=lambda item: (-item.followers, item.olympiad.title.lower()))
+    return tuple(ranked[:limit])
+
+
+def build_catalog_snapshot(
+    subjects: Iterable[Subject],
+    olympiads: Iterable[OlympiadInfo],
+    *,
+    version: int,
+    followers: Mapping[int, int] | None = None,
+    popularity_version: int = 0,
+) -> CatalogSnapshot:
+    """Собрать снимок каталога с сортировкой предметов и олимпиад."""
+
+    subjects_by_code = {item.code: item for item in subjects}
+    grouped: dict[str, list[OlympiadInfo]] = {}
+    olympiads_by_id: dict[int, OlympiadInfo] = {}
+    events: list[CatalogEvent] = []
+    for olympiad in olympiads:
+        grouped.setdefault(olympiad.subject_code, []).append(olympiad)
+        olympiads_by_id[olympiad.id] = olympiad
+        if olympiad.reg_deadline:
+            events.append(CatalogEvent(olympiad.reg_deadline, "reg_deadline", olympiad))
+        if olympiad.round_date:
+            events.append(CatalogEvent(olympiad.round_date, "round", olympiad))
+    events.sort(key=lambda event: (event.day, event.olympiad.title.lower(), event.kind))
+
+    return CatalogSnapshot(
+        version=version,
+        subjects=tuple(
+            sorted(subjects_by_code.values(), key=lambda subject: subject.title.lower())
+        ),
+        subjects_by_code=subjects_by_code,
+        olympiads_by_subject={
+            code: tuple(sorted(values, key=lambda olymp: olymp.title.lower()))
+            for code, values in grouped.items()
+        },
+        olympiads_by_id=olympiads_by_id,
+        events=tuple(events),
+        event_days=tuple(event.day for event in events),
+        popular=rank_popular(olympiads_by_id, followers or {}),
+        popularity_version=popularity_version,
+    )
+
+
 class OlympiadService:
     """Бизнес-логика каталога олимпиад и избранного."""
 
     def __init__(self, session_factory: type[AsyncSession] | None = None) -> None:
         self._session_factory = session_factory or AsyncSessionLocal
-        self._subjects: dict[str, Subject] = {item.code: item for item in DEMO_SUBJECTS}
-        self._subjects_order: tuple[Subject, ...] = tuple(
-            sorted(self._subjects.values(), key=lambda subject: subject.title.lower())
+        self._followers: Mapping[int, int] = {}
+        self._snapshot = build_catalog_snapshot(
+            DEMO_SUBJECTS, DEMO_OLYMPIADS, version=DEMO_CATALOG_VERSION
+        )
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Текущий снимок каталога."""
+
+        return self._snapshot
+
+    def replace_catalog(
+        self,
+        subjects: Iterable[Subject],
+        olympiads: Iterable[OlympiadInfo],
+        *,
+        version: int | None = None,
+    ) -> CatalogSnapshot:
+        """Атомарно подменить снимок каталога.
+
+        Без явной версии номер увеличивается на единицу, чтобы кэши экранов,
+        построенные по старому снимку, перестали использоваться.
+        """
+
+        next_version = version if version is not None else self._snapshot.version + 1
+        self._snapshot = build_catalog_snapshot(
+            subjects,
+            olympiads,
+            version=next_version,
+            followers=self._followers,
+            popularity_version=self._snapshot.popularity_version + 1,
+        )
+        return self._snapshot
+
+    def apply_follower_counts(self, followers: Mapping[int, int]) -> CatalogSnapshot:
+        """Подменить рейтинг популярности в текущем снимке.
+
+        Каталог и его индексы не пересобираются; меняются только ``popular``
+        и ``popularity_version``, если рейтинг действительно изменился.
+        """
+
+        self._followers = dict(followers)
+        snapshot = self._snapshot
+        popular = rank_popular(snapshot.olympiads_by_id, self._followers)
+        if popular != snapshot.popular:
+            self._snapshot = replace(
+                snapshot,
+                popular=popular,
+                popularity_version=snapshot.popularity_version + 1,
+            )
+        return self._snapshot
+
+    async def refresh_popularity(self) -> int:
+        """Сбросить накопленные счётчики в базу и обновить рейтинг.
+
+        Возвращает число записанных счётчиков.
+        """
+
+        followers_service = get_followers_service()
+        flushed = await followers_service.flush()
+        self.apply_follower_counts(await followers_service.load_top())
+        return flushed
+
+    async def reload_catalog(self, *, force: bool = False) -> bool:
+        """Перечитать каталог из базы, если изменилась его версия.
+
+        Возвращает ``True``, если снимок был заменён. Пока каталог не
+        загружен импортом, продолжает работать демо-каталог: таблица
+        ``olympiads`` пополняется и при добавлении демо-олимпиад в избранное.
+        """
+
+        async with self._session_factory() as session:
+            state = (
+                await session.execute(
+                    select(CatalogState.version, CatalogState.imported_at).where(
+                        CatalogState.id == CATALOG_STATE_ID
+                    )
+                )
+            ).first()
+            if state is None or state.imported_at is None:
+                return False
+            version = state.version
+            if not force and version == self._snapshot.version:
+                return False
+
+            subject_rows = (await session.execute(select(CatalogSubject))).scalars().all()
+            olympiad_rows = (await session.execute(select(Olympiad))).scalars().all()
+
+        if not olympiad_rows:
+            return False
+
+        subjects = {
+            row.code: Subject(code=row.code, title=row.title, description=row.description)
+            for row in subject_rows
+        }
+        if not subjects:
+            subjects = {item.code: item for item in DEMO_SUBJECTS}
+        codes_by_title = {item.title: item.code for item in subjects.values()}
+
+        olympiads: list[OlympiadInfo] = []
+        for row in olympiad_rows:
+            # Ранние записи хранили название предмета вместо кода.
+            subject_code = (
+                row.subject if row.subject in subjects else codes_by_title.get(row.subject)
+            )
+            if subject_code is None:
+                subject_code = row.subject
+                subjects[subject_code] = Subject(code=subject_code, title=subject_code)
+            olympiads.append(
+                OlympiadInfo(
+                    id=row.id,
+                    subject_code=subject_code,
+                    title=row.title,
+                    reg_deadline=row.reg_deadline,
+                    round_date=row.round_date,
+                    description=row.description,
+                )
+            )
+
+        self.replace_catalog(subjects.values(), olympiads, version=version)
+        logger.info(
+            "Каталог олимпиад обновлён до версии {version}: {count} олимпиад",
+            version=version,
+            count=len(olympiads),
         )
-        self._olympiads_by_subject: dict[str, list[OlympiadInfo]] = {}
-        self._olympiads_by_id: dict[int, OlympiadInfo] = {}
-        for olympiad in DEMO_OLYMPIADS:
-            self._olympiads_by_subject.setdefault(olympiad.subject_code, []).append(olympiad)
-            self._olympiads_by_id[olympiad.id] = olympiad
-        for values in self._olympiads_by_subject.values():
-            values.sort(key=lambda olymp: olymp.title.lower())
+        return True
 
     def list_subjects(self) -> Sequence[Subject]:
         """Вернуть все учебные предметы в алфавитном порядке."""
 
-        return self._subjects_order
+        return self._snapshot.subjects
 
     def get_subject(self, code: str) -> Subject | None:
         """Получить описание предмета по его коду."""
 
-        return self._subjects.get(code)
+        return self._snapshot.subjects_by_code.get(code)
 
     def list_olympiads(self, subject_code: str) -> Sequence[OlympiadInfo]:
         """Вернуть олимпиады для выбранного предмета."""
 
-        return tuple(self._olympiads_by_subject.get(subject_code, ()))
+        return self._snapshot.olympiads_by_subject.get(subject_code, ())
+
+    def list_popular(self) -> Sequence[PopularOlympiad]:
+        """Вернуть заранее отсортированный рейтинг популярных олимпиад."""
+
+        return self._snapshot.popular
 
     def get_olympiad(self, olympiad_id: int) -> OlympiadInfo | None:
         """Получить описание олимпиады из демо-каталога."""
 
-        return self._olympiads_by_id.get(olympiad_id)
+        return self._snapshot.olympiads_by_id.get(olympiad_id)
+
+    def list_upcoming_events(
+        self,
+        *,
+        days: int,
+        today: date | None = None,
+        olympiad_ids: AbstractSet[int] | None = None,
+    ) -> Sequence[CatalogEvent]:
+        """Вернуть даты олимпиад в ближайшие ``days`` дней включительно.
+
+        Диапазон ищется бинарным поиском по отсортированному индексу снимка;
+        при переданном ``olympiad_ids`` остаются только эти олимпиады.
+        """
+
+        snapshot = self._snapshot
+        start = today or datetime.now(tz=timezone.utc).date()
+        end = start + timedelta(days=max(days, 0))
+        lo = bisect_left(snapshot.event_days, start)
+        hi = bisect_right(snapshot.event_days, end, lo=lo)
+        window = snapshot.events[lo:hi]
+        if olympiad_ids is None:
+            return window
+        if not olympiad_ids:
+            return ()
+        return tuple(event for event in window if event.olympiad.id in olympiad_ids)
 
     async def add_to_favorites(
         self, *,
@@ -145,38 +407,98 @@ class OlympiadService:
         когда олимпиада уже находится в избранном.
         """
 
-        olympiad_info = self.get_olympiad(olympiad_id)
-        if olympiad_info is None:
+        if self.get_olympiad(olympiad_id) is None:
             raise ValueError("Unknown olympiad identifier")
 
+        added = await self.add_many_to_favorites(
+            tg_user_id=tg_user_id,
+            olympiad_ids=(olympiad_id,),
+            username=username,
+        )
+        return bool(added)
+
+    async def add_many_to_favorites(
+        self, *,
+        tg_user_id: int,
+        olympiad_ids: Iterable[int],
+        username: str | None = None,
+    ) -> tuple[int, ...]:
+        """Добавить несколько олимпиад в избранное одной транзакцией.
+
+        Связи и напоминания вставляются многострочными командами. Неизвестные
+        идентификаторы пропускаются. Возвращает идентификаторы олимпиад,
+        которых раньше не было в избранном, в порядке аргумента.
+        """
+
+        olympiads: dict[int, OlympiadInfo] = {}
+        for olympiad_id in olympiad_ids:
+            info = self.get_olympiad(olympiad_id)
+            if info is not None:
+                olympiads.setdefault(olympiad_id, info)
+        if not olympiads:
+            return ()
+
         reminder_service = get_reminder_service()
+        added_at = datetime.now(tz=timezone.utc)
 
         async with self._session_factory() as session:
             async with session.begin():
                 user = await self._get_or_create_user(session, tg_user_id, username)
-                await self._ensure_demo_olympiad(session, olympiad_info)
-
-                existing = await session.get(UserOlympiad, (user.id, olympiad_id))
-                if existing is not None:
-                    return False
-
-                session.add(
-                    UserOlympiad(
-                        user_id=user.id,
-                        olympiad_id=olympiad_id,
-                        created_at=datetime.now(tz=timezone.utc),
+                seeded = await self._ensure_olympiads(session, olympiads.values())
+
+                insert_stmt = (
+                    pg_insert(UserOlympiad)
+                    .values(
+                        [
+                            {
+                                "user_id": user.id,
+                                "olympiad_id": olympiad_id,
+                                "created_at": added_at,
+                            }
+                            for olympiad_id in olympiads
+                        ]
                     )
+                    .on_conflict_do_nothing(
+                        index_elements=[UserOlympiad.user_id, UserOlympiad.olympiad_id]
+                    )
+                    .returning(UserOlympiad.olympiad_id)
                 )
+                inserted = set((await session.execute(insert_stmt)).scalars().all())
+                added = tuple(olympiad_id for olympiad_id in olympiads if olympiad_id in inserted)
+                if not added:
+                    return ()
 
-                await reminder_service.schedule_for_favorite(
+                await reminder_service.schedule_for_favorites(
                     session=session,
                     user_id=user.id,
-                    olympiad_id=olympiad_id,
-                    reg_deadline=olympiad_info.reg_deadline,
-                    round_date=olympiad_info.round_date,
+                    olympiads=[
+                        FavoriteDates(
+                            olympiad_id=olympiad_id,
+                            reg_deadline=olympiads[olympiad_id].reg_deadline,
+                            round_date=olympiads[olympiad_id].round_date,
+                        )
+                        for olympiad_id in added
+                    ],
+                )
+                # Подключённый календарь получит новые события при следующей синхронизации.
+                await session.execute(
+                    update(CalendarAccount)
+                    .where(CalendarAccount.user_id == user.id)
+                    .values(
+                        sync_requested_at=func.coalesce(
+                            CalendarAccount.sync_requested_at, func.now()
+                        )
+                    )
+                    .execution_options(synchronize_session=False)
                 )
 
-            return True
+            if seeded:
+                get_materials_service().invalidate(*seeded)
+            cache = get_favorites_cache()
+            for olympiad_id in reversed(added):
+                cache.add(tg_user_id, olympiad_id, added_at)
+            get_followers_service().record(added, 1)
+            return added
 
     async def _get_or_create_user(
         self, session: AsyncSession, tg_user_id: int, username: str | None
@@ -196,27 +518,40 @@ class OlympiadService:
             await session.flush()
         return user
 
-    async def _ensure_demo_olympiad(
-        self, session: AsyncSession, olympiad_info: OlympiadInfo
-    ) -> None:
-        """Убедиться, что демо-олимпиада сохранена в базе."""
-
-        db_olympiad = await session.get(Olympiad, olympiad_info.id)
-        if db_olympiad is not None:
-            return
-
-        subject = self.get_subject(olympiad_info.subject_code)
-        session.add(
-            Olympiad(
-                id=olympiad_info.id,
-                subject=subject.title if subject else olympiad_info.subject_code,
-                title=olympiad_info.title,
-                reg_deadline=olympiad_info.reg_deadline,
-                round_date=olympiad_info.round_date,
-                description=olympiad_info.description,
+    async def _ensure_olympiads(
+        self, session: AsyncSession, olympiads: Iterable[OlympiadInfo]
+    ) -> tuple[int, ...]:
+        """Убедиться, что олимпиады каталога сохранены в базе.
+
+        Демо-олимпиады получают демо-подборки материалов при первом
+        сохранении. Возвращает олимпиады, которым добавлены материалы.
+        """
+
+        olympiads = list(olympiads)
+        stmt = (
+            pg_insert(Olympiad)
+            .values(
+                [
+                    {
+                        "id": info.id,
+                        "subject": info.subject_code,
+                        "title": info.title,
+                        "reg_deadline": info.reg_deadline,
+                        "round_date": info.round_date,
+                        "description": info.description,
+                    }
+                    for info in olympiads
+                ]
             )
+            .on_conflict_do_nothing(index_elements=[Olympiad.id])
+            .returning(Olympiad.id)
         )
-        await session.flush()
+        created = set((await session.execute(stmt)).scalars().all())
+        # Олимпиада импортированного каталога с тем же id демо-материалов не получает.
+        demo = [info.id for info in olympiads if info.id in created and info in DEMO_OLYMPIADS]
+        if not demo:
+            return ()
+        return await get_materials_service().add_demo_materials(session, demo)
 
 
 @lru_cache
@@ -227,8 +562,12 @@ def get_olympiad_service() -> OlympiadService:
 
 
 __all__ = [
+    "CatalogEvent",
+    "CatalogSnapshot",
     "OlympiadInfo",
     "OlympiadService",
+    "PopularOlympiad",
     "Subject",
+    "build_catalog_snapshot",
     "get_olympiad_service",
 ]
@@ -0,0 +1,272 @@
+"""Приём уведомлений платёжного провайдера и пакетная активация подписок."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Mapping
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.repository.db import AsyncSessionLocal
+from bot.repository.models import PaymentStub, User
+from bot.services.subscription_cache import SubscriptionCache, get_subscription_cache
+from bot.services.subscription_service import extended_expiry
+from bot.utils.logging import logger
+
+SessionFactory = Callable[[], AsyncSession]
+
+PAYMENT_SUCCEEDED = "succeeded"
+PAYMENT_STATUSES = frozenset({"pending", PAYMENT_SUCCEEDED, "canceled"})
+# Сколько активаций записывается одной транзакцией.
+DEFAULT_BATCH_SIZE = 200
+# Сколько ждать добора пачки после первой активации в очереди.
+DEFAULT_BATCH_WINDOW_SECONDS = 0.5
+RETRY_DELAY_SECONDS = 5.0
+
+
+@dataclass(frozen=True, slots=True)
+class PaymentEvent:
+    """Уведомление провайдера о смене статуса платежа."""
+
+    provider_payment_id: str
+    tg_user_id: int
+    status: str
+
+
+@dataclass(frozen=True, slots=True)
+class PendingActivation:
+    """Оплаченный платёж, подписку по которому ещё нужно включить."""
+
+    payment_id: int
+    user_id: int
+    tg_user_id: int
+
+
+def parse_payment_event(payload: Mapping[str, Any]) -> PaymentEvent:
+    """Проверить тело уведомления провайдера.
+
+    Ожидаются поля ``payment_id``, ``user`` (Telegram ID из ссылки на
+    оплату) и ``status``. При ошибке выбрасывается ``ValueError``.
+    """
+
+    payment_id = str(payload.get("payment_id") or "").strip()
+    if not payment_id or len(payment_id) > 128:
+        raise ValueError("поле 'payment_id' обязательно и не длиннее 128 символов")
+    try:
+        tg_user_id = int(str(payload.get("user")).strip())
+    except ValueError:
+        raise ValueError("поле 'user' должно быть целым числом") from None
+    status = str(payload.get("status") or "").strip().lower()
+    if status not in PAYMENT_STATUSES:
+        raise ValueError(f"неизвестный статус платежа {status!r}")
+    return PaymentEvent(provider_payment_id=payment_id, tg_user_id=tg_user_id, status=status)
+
+
+class PaymentsService:
+    """Идемпотентная запись платежей и фоновая активация подписок.
+
+    Уведомление сохраняется в ``payments_stub`` одной командой
+    ``INSERT ... ON CONFLICT`` по идентификатору платежа у провайдера, поэтому
+    повторная доставка не создаёт дубликатов и не активирует подписку дважды.
+    Сама активация идёт из очереди: воркер собирает пачку, одной транзакцией
+    продлевает подписку и отмечает платежи обработанными, затем сбрасывает кэш
+    подписки. Платежи, не успевшие обработаться до остановки, дочитываются из
+    базы при следующем запуске.
+    """
+
+    def __init__(
+        self,
+        session_factory: SessionFactory | None = None,
+        cache: SubscriptionCache | None = None,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        batch_window: float = DEFAULT_BATCH_WINDOW_SECONDS,
+    ) -> None:
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._cache = cache or get_subscription_cache()
+        self._batch_size = batch_size
+        self._batch_window = batch_window
+        self._queue: asyncio.Queue[PendingActivation] = asyncio.Queue()
+        self._worker: asyncio.Task[None] | None = None
+
+    async def record_event(self, event: PaymentEvent) -> bool:
+        """Сохранить уведомление и поставить активацию в очередь.
+
+        Возвращает ``True``, если уведомление изменило статус платежа.
+        Повторы и устаревшие статусы после успешной оплаты игнорируются.
+        """
+
+        create_user = (
+            pg_insert(User)
+            .values(tg_id=event.tg_user_id)
+            .on_conflict_do_nothing(index_elements=[User.tg_id])
+        )
+        user_id = select(User.id).where(User.tg_id == event.tg_user_id).scalar_subquery()
+        insert_stmt = pg_insert(PaymentStub).values(
+            user_id=user_id,
+            provider_payment_id=event.provider_payment_id,
+            status=event.status,
+            updated_at=func.now(),
+        )
+        # Успешная оплата окончательна: поздние pending/canceled её не откатывают.
+        stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[PaymentStub.provider_payment_id],
+            set_={"status": insert_stmt.excluded.status, "updated_at": func.now()},
+            where=(PaymentStub.status != PAYMENT_SUCCEEDED)
+            & (PaymentStub.status != insert_stmt.excluded.status),
+        ).returning(PaymentStub.id, PaymentStub.user_id)
+
+        async with self._session_factory() as session:
+            async with session.begin():
+                await session.execute(create_user)
+                row = (await session.execute(stmt)).first()
+
+        if row is None:
+            return False
+        if event.status == PAYMENT_SUCCEEDED:
+            self._queue.put_nowait(
+                PendingActivation(
+                    payment_id=row.id, user_id=row.user_id, tg_user_id=event.tg_user_id
+                )
+            )
+        return True
+
+    def start_worker(self) -> None:
+        """Запустить обработку очереди активаций в текущем цикле событий."""
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name="payments:activations")
+
+    async def stop_worker(self) -> None:
+        """Остановить обработку очереди активаций."""
+
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def _run(self) -> None:
+        await self._enqueue_unprocessed()
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._activate(batch)
+            except Exception:
+                logger.exception(
+                    "Не удалось активировать подписки по {count} платежам", count=len(batch)
+                )
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+                for item in batch:
+                    self._queue.put_nowait(item)
+
+    async def _next_batch(self) -> list[PendingActivation]:
+        """Дождаться первой активации и добрать пачку в пределах окна."""
+
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._batch_window
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _enqueue_unprocessed(self) -> None:
+        """Поставить в очередь оплаченные платежи, оставшиеся с прошлого запуска."""
+
+        stmt = (
+            select(PaymentStub.id, PaymentStub.user_id, User.tg_id)
+            .join(User, User.id == PaymentStub.user_id)
+            .where(
+                PaymentStub.status == PAYMENT_SUCCEEDED,
+                PaymentStub.processed_at.is_(None),
+            )
+            .order_by(PaymentStub.id)
+        )
+        async with self._session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+        for row in rows:
+            self._queue.put_nowait(
+                PendingActivation(payment_id=row.id, user_id=row.user_id, tg_user_id=row.tg_id)
+            )
+        if rows:
+            logger.info("В очередь возвращены необработанные платежи: {count}", count=len(rows))
+
+    async def _activate(self, batch: list[PendingActivation]) -> None:
+        """Продлить подписки и отметить платежи пачки одной транзакцией.
+
+        Сначала платежи помечаются обработанными; подписка продлевается только
+        по тем, что действительно были отмечены в этой транзакции. Поэтому
+        платёж, попавший в очередь дважды (повторное уведомление, вторая
+        реплика, повтор пачки после успешного коммита), учитывается один раз.
+        """
+
+        tg_ids = {item.user_id: item.tg_user_id for item in batch}
+        payment_ids = [item.payment_id for item in batch]
+        async with self._session_factory() as session:
+            async with session.begin():
+                claimed = (
+                    await session.execute(
+                        update(PaymentStub)
+                        .where(PaymentStub.id.in_(payment_ids), PaymentStub.processed_at.is_(None))
+                        .values(processed_at=func.now())
+                        .returning(PaymentStub.user_id)
+                        .execution_options(synchronize_session=False)
+                    )
+                ).scalars().all()
+                # Несколько оплат одного пользователя продлевают срок на
+                # соответствующее число периодов.
+                periods = Counter(claimed)
+                if periods:
+                    await session.execute(
+                        update(User)
+                        .where(User.id.in_(periods))
+                        .values(
+                            is_subscribed=True,
+                            subscription_expires_at=extended_expiry(
+                                case(dict(periods), value=User.id, else_=1)
+                            ),
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+        if not periods:
+            return
+        self._cache.invalidate_many(tg_ids[user_id] for user_id in periods if user_id in tg_ids)
+        logger.info(
+            "Подписки активированы по {payments} платежам для {users} пользователей",
+            payments=sum(periods.values()),
+            users=len(periods),
+        )
+
+
+@lru_cache
+def get_payments_service() -> PaymentsService:
+    """Получить singleton-сервис платежей."""
+
+    return PaymentsService()
+
+
+__all__ = [
+    "PaymentEvent",
+    "PaymentsService",
+    "get_payments_service",
+    "parse_payment_event",
+]
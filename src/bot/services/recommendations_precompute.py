@@ -0,0 +1,166 @@
+"""Пакетный расчёт подборок ВУЗов для всех пользователей с избранным."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import AsyncIterator
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from bot.repository.db import engine
+from bot.repository.models import UserOlympiad, UserRecommendation
+from bot.services.olympiad_service import get_olympiad_service
+from bot.services.universities_service import (
+    RECOMMENDATIONS_LIMIT,
+    favorites_fingerprint,
+    get_universities_service,
+)
+from bot.utils.logging import logger
+
+DEFAULT_CHUNK_USERS = 2000
+# Сколько строк user_olympiads забирается с сервера за один FETCH курсора.
+STREAM_FETCH_SIZE = 10_000
+
+
+@dataclass(slots=True)
+class PrecomputeReport:
+    """Итоги пакетного расчёта по диапазону пользователей."""
+
+    users: int = 0
+    chunks: int = 0
+    removed: int = 0
+
+
+async def _iter_favorite_sets(
+    *, min_user_id: int | None, max_user_id: int | None
+) -> AsyncIterator[tuple[int, list[int]]]:
+    """Читать избранное серверным курсором, группируя строки по пользователю."""
+
+    stmt = select(UserOlympiad.user_id, UserOlympiad.olympiad_id).order_by(
+        UserOlympiad.user_id
+    )
+    if min_user_id is not None:
+        stmt = stmt.where(UserOlympiad.user_id >= min_user_id)
+    if max_user_id is not None:
+        stmt = stmt.where(UserOlympiad.user_id <= max_user_id)
+
+    async with engine.connect() as connection:
+        result = await connection.stream(
+            stmt.execution_options(yield_per=STREAM_FETCH_SIZE)
+        )
+        current_user: int | None = None
+        current: list[int] = []
+        async for user_id, olympiad_id in result:
+            if user_id != current_user:
+                if current_user is not None:
+                    yield current_user, current
+                current_user, current = user_id, []
+            current.append(olympiad_id)
+        if current_user is not None:
+            yield current_user, current
+
+
+async def precompute_recommendations(
+    *,
+    min_user_id: int | None = None,
+    max_user_id: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_USERS,
+    today: date | None = None,
+) -> PrecomputeReport:
+    """Посчитать и сохранить подборки пользователей из диапазона ``user_id``.
+
+    Каталог и список ВУЗов перечитываются из базы, чтобы отпечатки совпали
+    с теми, что бот посчитает при выдаче. Записи пользователей диапазона,
+    у которых больше нет избранного, удаляются.
+    """
+
+    olympiad_service = get_olympiad_service()
+    universities_service = get_universities_service()
+    await olympiad_service.reload_catalog()
+    await universities_service.reload()
+
+    snapshot = olympiad_service.snapshot
+    index = universities_service.index
+    scoring = universities_service.get_scoring(index, snapshot)
+    day = today or datetime.now(tz=timezone.utc).date()
+    versions = (snapshot.version, index.version, day.toordinal())
+    started_at = datetime.now(tz=timezone.utc)
+    report = PrecomputeReport()
+
+    user_ids: list[int] = []
+    favorite_sets: list[list[int]] = []
+
+    async def write_chunk() -> None:
+        # Матричный расчёт уходит в поток, чтобы не останавливать цикл событий бота.
+        scores = await asyncio.to_thread(scoring.score_many, favorite_sets, today=day)
+        rows = []
+        for position, (user_id, olympiad_ids) in enumerate(zip(user_ids, favorite_sets)):
+            top = scoring.top_k(scores[position], RECOMMENDATIONS_LIMIT)
+            rows.append(
+                {
+                    "user_id": user_id,
+                    "fingerprint": favorites_fingerprint(olympiad_ids, versions=versions),
+                    "university_ids": [university_id for university_id, _ in top],
+                    "scores": [score for _, score in top],
+                    "computed_at": started_at,
+                }
+            )
+        stmt = pg_insert(UserRecommendation).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserRecommendation.user_id],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "university_ids": stmt.excluded.university_ids,
+                "scores": stmt.excluded.scores,
+                "computed_at": stmt.excluded.computed_at,
+            },
+        )
+        async with engine.begin() as connection:
+            await connection.execute(stmt)
+        report.users += len(rows)
+        report.chunks += 1
+        user_ids.clear()
+        favorite_sets.clear()
+
+    async for user_id, olympiad_ids in _iter_favorite_sets(
+        min_user_id=min_user_id, max_user_id=max_user_id
+    ):
+        user_ids.append(user_id)
+        # Отпечаток считается по олимпиадам каталога, как и при выдаче.
+        favorite_sets.append(
+            [
+                olympiad_id
+                for olympiad_id in olympiad_ids
+                if olympiad_id in snapshot.olympiads_by_id
+            ]
+        )
+        if len(user_ids) >= chunk_size:
+            await write_chunk()
+    if user_ids:
+        await write_chunk()
+
+    cleanup = delete(UserRecommendation).where(UserRecommendation.computed_at < started_at)
+    if min_user_id is not None:
+        cleanup = cleanup.where(UserRecommendation.user_id >= min_user_id)
+    if max_user_id is not None:
+        cleanup = cleanup.where(UserRecommendation.user_id <= max_user_id)
+    async with engine.begin() as connection:
+        report.removed = (await connection.execute(cleanup)).rowcount
+
+    logger.info(
+        "Подборки ВУЗов пересчитаны для {users} польз. ({chunks} пачек),"
+        " удалено устаревших: {removed}",
+        users=report.users,
+        chunks=report.chunks,
+        removed=report.removed,
+    )
+    return report
+
+
+__all__ = [
+    "PrecomputeReport",
+    "precompute_recommendations",
+]
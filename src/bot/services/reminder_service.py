@@ -7,7 +7,7 @@ from datetime import date, datetime, time, timedelta, timezone
 from functools import lru_cache
 from typing import Iterable, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.repository.db import AsyncSessionLocal
@@ -22,6 +22,15 @@ class ReminderPlan:
     scheduled_at: datetime
 
 
+@dataclass(frozen=True, slots=True)
+class FavoriteDates:
+    """Ключевые даты олимпиады, добавляемой в избранное."""
+
+    olympiad_id: int
+    reg_deadline: date | None
+    round_date: date | None
+
+
 class ReminderService:
     """Логика формирования напоминаний при работе с избранным."""
 
@@ -43,59 +52,73 @@ class ReminderService:
         соответствующие напоминания уже существуют, записи не создаются.
         """
 
+        return await self.schedule_for_favorites(
+            user_id=user_id,
+            olympiads=(FavoriteDates(olympiad_id, reg_deadline, round_date),),
+            session=session,
+        )
+
+    async def schedule_for_favorites(
+        self,
+        *,
+        user_id: int,
+        olympiads: Sequence[FavoriteDates],
+        session: AsyncSession | None = None,
+    ) -> int:
+        """Создать напоминания сразу для нескольких олимпиад пользователя.
+
+        Существующие напоминания читаются одним запросом, новые вставляются
+        одной многострочной командой. Возвращает количество новых записей.
+        """
+
         owns_session = session is None
         if owns_session:
             async with self._session_factory() as new_session:
                 async with new_session.begin():
                     return await self._schedule(
-                        session=new_session,
-                        user_id=user_id,
-                        olympiad_id=olympiad_id,
-                        reg_deadline=reg_deadline,
-                        round_date=round_date,
+                        session=new_session, user_id=user_id, olympiads=olympiads
                     )
-        return await self._schedule(
-            session=session,
-            user_id=user_id,
-            olympiad_id=olympiad_id,
-            reg_deadline=reg_deadline,
-            round_date=round_date,
-        )
+        return await self._schedule(session=session, user_id=user_id, olympiads=olympiads)
 
     async def _schedule(
         self,
         *,
         session: AsyncSession,
         user_id: int,
-        olympiad_id: int,
-        reg_deadline: date | None,
-        round_date: date | None,
+        olympiads: Sequence[FavoriteDates],
     ) -> int:
-        plans = tuple(self._build_plans(reg_deadline=reg_deadline, round_date=round_date))
+        plans = [
+            (item.olympiad_id, plan)
+            for item in olympiads
+            for plan in self._build_plans(
+                reg_deadline=item.reg_deadline, round_date=item.round_date
+            )
+        ]
         if not plans:
             return 0
 
-        existing_stmt = select(Reminder.kind).where(
+        existing_stmt = select(Reminder.olympiad_id, Reminder.kind).where(
             Reminder.user_id == user_id,
-            Reminder.olympiad_id == olympiad_id,
-            Reminder.kind.in_([plan.kind for plan in plans]),
+            tuple_(Reminder.olympiad_id, Reminder.kind).in_(
+                [(olympiad_id, plan.kind) for olympiad_id, plan in plans]
+            ),
         )
         existing_result = await session.execute(existing_stmt)
-        existing_kinds = set(existing_result.scalars().all())
-
-        created = 0
-        for plan in plans:
-            if plan.kind in existing_kinds:
-                continue
-            reminder = Reminder(
-                user_id=user_id,
-                olympiad_id=olympiad_id,
-                kind=plan.kind,
-                scheduled_at=plan.scheduled_at,
-            )
-            session.add(reminder)
-            created += 1
-        return created
+        existing = set(existing_result.tuples().all())
+
+        rows = [
+            {
+                "user_id": user_id,
+                "olympiad_id": olympiad_id,
+                "kind": plan.kind,
+                "scheduled_at": plan.scheduled_at,
+            }
+            for olympiad_id, plan in plans
+            if (olympiad_id, plan.kind) not in existing
+        ]
+        if rows:
+            await session.execute(insert(Reminder), rows)
+        return len(rows)
 
     def _build_plans(
         self,
@@ -137,6 +160,7 @@ def get_reminder_service() -> ReminderService:
 
 
 __all__: Sequence[str] = [
+    "FavoriteDates",
     "ReminderPlan",
     "ReminderService",
     "get_reminder_service",
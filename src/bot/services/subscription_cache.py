@@ -0,0 +1,131 @@
+"""Кэш статуса подписки пользователей с ограничением размера и TTL."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Iterable
+
+from bot.config import get_config
+
+DEFAULT_MAX_USERS = 50_000
+DEFAULT_TTL_SECONDS = 5 * 60
+
+
+@dataclass(frozen=True, slots=True)
+class SubscriptionStatus:
+    """Флаг подписки и срок её действия."""
+
+    is_subscribed: bool
+    expires_at: datetime | None = None
+
+    def is_active(self, now: datetime | None = None) -> bool:
+        """Подписка оформлена и её срок ещё не истёк.
+
+        Срок проверяется здесь, а не только фоновой очисткой, поэтому
+        истёкшая подписка перестаёт действовать сразу.
+        """
+
+        if not self.is_subscribed:
+            return False
+        if self.expires_at is None:
+            return True
+        return self.expires_at > (now or datetime.now(tz=timezone.utc))
+
+
+@dataclass(frozen=True, slots=True)
+class SubscriptionCacheStats:
+    """Счётчики обращений к кэшу подписки."""
+
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SubscriptionCache:
+    """LRU-кэш статуса подписки по Telegram ID.
+
+    Статус читается middleware на каждое сообщение, поэтому без кэша каждый
+    апдейт стоил бы запроса к базе. Изменения подписки сбрасывают записи
+    явно, а TTL ограничивает расхождение с правками из других реплик.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_users: int = DEFAULT_MAX_USERS,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_users = max_users
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[int, tuple[float, SubscriptionStatus]] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, tg_user_id: int) -> SubscriptionStatus | None:
+        """Вернуть закэшированный статус или ``None`` при промахе."""
+
+        with self._lock:
+            item = self._entries.get(tg_user_id)
+            if item is None or item[0] <= self._clock():
+                self._entries.pop(tg_user_id, None)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(tg_user_id)
+            self._hits += 1
+            return item[1]
+
+    def set(self, tg_user_id: int, status: SubscriptionStatus) -> None:
+        """Сохранить статус, прочитанный из базы."""
+
+        with self._lock:
+            self._entries[tg_user_id] = (self._clock() + self._ttl, status)
+            self._entries.move_to_end(tg_user_id)
+            while len(self._entries) > self._max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate_many(self, tg_user_ids: Iterable[int]) -> None:
+        """Сбросить записи перечисленных пользователей."""
+
+        with self._lock:
+            for tg_user_id in tg_user_ids:
+                self._entries.pop(tg_user_id, None)
+
+    def stats(self) -> SubscriptionCacheStats:
+        """Текущие значения счётчиков."""
+
+        with self._lock:
+            return SubscriptionCacheStats(
+                hits=self._hits, misses=self._misses, size=len(self._entries)
+            )
+
+
+@lru_cache
+def get_subscription_cache() -> SubscriptionCache:
+    """Получить общий кэш статуса подписки."""
+
+    settings = get_config()
+    return SubscriptionCache(
+        max_users=settings.subscription_cache_max_users,
+        ttl_seconds=settings.subscription_cache_ttl_seconds,
+    )
+
+
+__all__ = [
+    "SubscriptionCache",
+    "SubscriptionCacheStats",
+    "SubscriptionStatus",
+    "get_subscription_cache",
+]
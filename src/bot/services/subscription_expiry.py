@@ -0,0 +1,123 @@
+"""Фоновое завершение истёкших подписок и напоминания о продлении."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import ColumnElement
+
+from bot.config import get_config
+from bot.repository.db import AsyncSessionLocal
+from bot.repository.models import SubscriptionReminder, User
+from bot.services.subscription_cache import get_subscription_cache
+from bot.utils.logging import logger
+
+# Сколько подписок завершается одной транзакцией.
+EXPIRY_BATCH_SIZE = 1000
+
+
+@dataclass(slots=True)
+class SubscriptionSweepReport:
+    """Итоги обхода подписок."""
+
+    expired: int = 0
+    reminders: int = 0
+
+
+def _has_term() -> ColumnElement[bool]:
+    """Условие частичного индекса ``ix_users_subscription_expires_at``.
+
+    Запросы повторяют его дословно, чтобы планировщик выбрал этот индекс.
+    """
+
+    return User.is_subscribed & User.subscription_expires_at.is_not(None)
+
+
+async def expire_subscriptions(*, batch_size: int = EXPIRY_BATCH_SIZE) -> int:
+    """Снять флаг подписки у пользователей с истёкшим сроком.
+
+    Каждая пачка — отдельная команда ``UPDATE ... WHERE id IN (SELECT ...
+    LIMIT n FOR UPDATE SKIP LOCKED)``, поэтому блокировки держатся недолго и
+    не конфликтуют с параллельной оплатой. Возвращает число завершённых подписок.
+    """
+
+    lapsed = (
+        select(User.id)
+        .where(_has_term(), User.subscription_expires_at < func.now())
+        .order_by(User.subscription_expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(User)
+        .where(User.id.in_(lapsed))
+        .values(is_subscribed=False)
+        .returning(User.tg_id)
+        .execution_options(synchronize_session=False)
+    )
+
+    cache = get_subscription_cache()
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                tg_ids = (await session.execute(stmt)).scalars().all()
+        cache.invalidate_many(tg_ids)
+        total += len(tg_ids)
+        if len(tg_ids) < batch_size:
+            return total
+
+
+async def enqueue_renewal_reminders() -> int:
+    """Поставить в очередь напоминания о скором окончании подписки.
+
+    Подписки, истекающие в ближайшие ``subscription_reminder_days`` дней,
+    выбираются диапазоном по частичному индексу и вставляются одной командой
+    ``INSERT ... SELECT``. Уникальный ключ (пользователь, срок) не даёт
+    поставить напоминание об одном и том же сроке дважды.
+    """
+
+    days = get_config().subscription_reminder_days
+    expiring = select(User.id, User.subscription_expires_at, func.now()).where(
+        _has_term(),
+        User.subscription_expires_at >= func.now(),
+        User.subscription_expires_at < func.now() + func.make_interval(0, 0, 0, days),
+    )
+    stmt = (
+        pg_insert(SubscriptionReminder)
+        .from_select(["user_id", "expires_at", "scheduled_at"], expiring)
+        .on_conflict_do_nothing(
+            index_elements=[SubscriptionReminder.user_id, SubscriptionReminder.expires_at]
+        )
+    )
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            result = await session.execute(stmt)
+    return max(result.rowcount or 0, 0)
+
+
+async def sweep_subscriptions() -> SubscriptionSweepReport:
+    """Завершить истёкшие подписки и поставить напоминания о продлении."""
+
+    report = SubscriptionSweepReport(
+        expired=await expire_subscriptions(),
+        reminders=await enqueue_renewal_reminders(),
+    )
+    if report.expired or report.reminders:
+        logger.info(
+            "Обход подписок: завершено {expired}, напоминаний о продлении {reminders}",
+            expired=report.expired,
+            reminders=report.reminders,
+        )
+    return report
+
+
+__all__ = [
+    "SubscriptionSweepReport",
+    "enqueue_renewal_reminders",
+    "expire_subscriptions",
+    "sweep_subscriptions",
+]
@@ -2,37 +2,81 @@
 
 from __future__ import annotations
 
+from datetime import datetime, timedelta, timezone
 from functools import lru_cache
-from typing import Callable
+from typing import Any, Callable
 from uuid import uuid4
 
 from bot.utils.logging import logger
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
 
 from bot.config import get_config
 from bot.repository.db import AsyncSessionLocal
 from bot.repository.models import User
+from bot.services.subscription_cache import (
+    SubscriptionCache,
+    SubscriptionStatus,
+    get_subscription_cache,
+)
 
 SessionFactory = Callable[[], AsyncSession]
 
 
+def extended_expiry(periods: ColumnElement[Any] | int = 1) -> ColumnElement[Any]:
+    """SQL-выражение нового срока подписки после оплаты ``periods`` периодов.
+
+    Продление отсчитывается от текущего срока, если он ещё не истёк, иначе
+    от текущего момента.
+    """
+
+    days = get_config().subscription_period_days
+    start = func.greatest(func.coalesce(User.subscription_expires_at, func.now()), func.now())
+    return start + func.make_interval(0, 0, 0, periods * days)
+
+
 class SubscriptionService:
     """Управление подпиской пользователя в режиме заглушки."""
 
-    def __init__(self, session_factory: SessionFactory | None = None) -> None:
+    def __init__(
+        self,
+        session_factory: SessionFactory | None = None,
+        cache: SubscriptionCache | None = None,
+    ) -> None:
         self._session_factory = session_factory or AsyncSessionLocal
+        self._cache = cache or get_subscription_cache()
         settings = get_config()
         self._provider = settings.pay_provider
         self._return_url = settings.pay_return_url
+        self._period_days = settings.subscription_period_days
 
     async def is_subscribed(self, *, tg_user_id: int) -> bool:
-        """Проверить статус подписки пользователя."""
+        """Проверить, действует ли подписка пользователя."""
 
+        status = await self.get_status(tg_user_id=tg_user_id)
+        return status.is_active()
+
+    async def get_status(self, *, tg_user_id: int) -> SubscriptionStatus:
+        """Вернуть флаг подписки и срок её действия."""
+
+        cached = self._cache.get(tg_user_id)
+        if cached is not None:
+            return cached
         async with self._session_factory() as session:
-            result = await session.execute(select(User.is_subscribed).where(User.tg_id == tg_user_id))
-            value = result.scalar_one_or_none()
-            return bool(value)
+            result = await session.execute(
+                select(User.is_subscribed, User.subscription_expires_at).where(
+                    User.tg_id == tg_user_id
+                )
+            )
+            row = result.first()
+        status = (
+            SubscriptionStatus(is_subscribed=row.is_subscribed, expires_at=row.subscription_expires_at)
+            if row is not None
+            else SubscriptionStatus(is_subscribed=False)
+        )
+        self._cache.set(tg_user_id, status)
+        return status
 
     async def create_payment_link(self, *, tg_user_id: int, username: str | None = None) -> str:
         """Сгенерировать фиктивную ссылку на оплату и сохранить профиль пользователя."""
@@ -42,7 +86,12 @@ class SubscriptionService:
                 await self._get_or_create_user(session, tg_user_id, username)
 
         token = uuid4().hex
-        link = f"https://pay.{self._provider}/invoice/{token}?return={self._return_url}"
+        # Провайдер возвращает user в уведомлении об оплате: по нему
+        # webhook находит пользователя.
+        link = (
+            f"https://pay.{self._provider}/invoice/{token}"
+            f"?user={tg_user_id}&return={self._return_url}"
+        )
         logger.info(
             "Выдана заглушечная ссылка на оплату подписки",
             extra={"tg_user_id": tg_user_id, "payment_link": link},
@@ -55,9 +104,12 @@ class SubscriptionService:
         async with self._session_factory() as session:
             async with session.begin():
                 user = await self._get_or_create_user(session, tg_user_id, username)
-                if not user.is_subscribed:
-                    user.is_subscribed = True
-                    await session.flush()
+                now = datetime.now(tz=timezone.utc)
+                start = max(user.subscription_expires_at or now, now)
+                user.is_subscribed = True
+                user.subscription_expires_at = start + timedelta(days=self._period_days)
+                await session.flush()
+        self._cache.invalidate_many((tg_user_id,))
 
         logger.info("Подписка активирована", extra={"tg_user_id": tg_user_id})
 
@@ -87,4 +139,9 @@ def get_subscription_service() -> SubscriptionService:
     return SubscriptionService()
 
 
-__all__ = ["SubscriptionService", "get_subscription_service"]
+__all__ = [
+    "SubscriptionService",
+    "SubscriptionStatus",
+    "extended_expiry",
+    "get_subscription_service",
+]
@@ -2,20 +2,46 @@
 
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from functools import lru_cache
-from typing import Mapping, Sequence
+from threading import Lock
+from typing import Iterable, Mapping, Sequence
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.repository.db import AsyncSessionLocal
-from bot.repository.models import Olympiad, User, UserOlympiad
+from bot.repository.models import (
+    CatalogState,
+    OlympiadUniversity,
+    University,
+    UniversityBenefit,
+    UniversityFaculty,
+    User,
+    UserRecommendation,
+)
+from bot.services.favorites_service import get_favorites_service
+from bot.services.olympiad_service import (
+    CATALOG_STATE_ID,
+    DEMO_CATALOG_VERSION,
+    CatalogSnapshot,
+    get_olympiad_service,
+)
+from bot.services.university_scoring import ScoringMatrix, UniversityLink
+from bot.utils.logging import logger
+from bot.utils.render_cache import STATIC_SCREEN_VERSION, RenderCache
+
+# Сколько ВУЗов показывается в подборке по умолчанию.
+RECOMMENDATIONS_LIMIT = 10
+# Сколько подборок и детализаций хранится в кэше результатов.
+RESULTS_CACHE_SIZE = 4096
 
 
 @dataclass(frozen=True, slots=True)
 class FacultyInfo:
-    """Описание факультета в демо-данных."""
+    """Описание факультета и его льгот."""
 
     title: str
     description: str
@@ -24,7 +50,7 @@ class FacultyInfo:
 
 @dataclass(frozen=True, slots=True)
 class UniversityData:
-    """Демо-информация о ВУЗе и связанных олимпиадах."""
+    """Информация о ВУЗе и связанных олимпиадах."""
 
     id: int
     name: str
@@ -32,6 +58,14 @@ class UniversityData:
     olympiad_ids: tuple[int, ...]
     benefits: tuple[str, ...]
     faculties: tuple[FacultyInfo, ...]
+    links: tuple[UniversityLink, ...] = ()
+
+    def iter_links(self) -> tuple[UniversityLink, ...]:
+        """Связи с олимпиадами; без явных связей льгота считается минимальной."""
+
+        if self.links:
+            return self.links
+        return tuple(UniversityLink(olympiad_id) for olympiad_id in self.olympiad_ids)
 
 
 @dataclass(frozen=True, slots=True)
@@ -43,6 +77,7 @@ class UniversityRecommendation:
     description: str
     benefits: tuple[str, ...]
     matched_olympiads: tuple[str, ...]
+    score: float = 0.0
 
 
 @dataclass(frozen=True, slots=True)
@@ -145,65 +180,271 @@ DEMO_UNIVERSITIES: tuple[UniversityData, ...] = (
 )
 
 
+@dataclass(frozen=True, slots=True)
+class RecommendationSet:
+    """Подборка ВУЗов, общая для всех пользователей с одинаковым избранным.
+
+    ``key`` — отпечаток набора избранных олимпиад вместе с версиями каталога;
+    по нему же кэшируются детализации и отрисованные экраны.
+    """
+
+    key: str
+    favorites: Mapping[int, str]
+    recommendations: tuple[UniversityRecommendation, ...]
+
+
+def favorites_fingerprint(favorite_ids: Iterable[int], *, versions: Iterable[int]) -> str:
+    """Отпечаток отсортированного набора избранных олимпиад и версий данных."""
+
+    payload = "{versions}|{ids}".format(
+        versions=",".join(str(version) for version in versions),
+        ids=",".join(str(olympiad_id) for olympiad_id in sorted(favorite_ids)),
+    )
+    return hashlib.sha1(payload.encode("ascii")).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class UniversitiesIndex:
+    """Неизменяемый список ВУЗов.
+
+    ``version`` совпадает с версией каталога, из которой загружен список.
+    """
+
+    version: int
+    universities_by_id: Mapping[int, UniversityData]
+
+
+def build_universities_index(
+    universities: Iterable[UniversityData], *, version: int
+) -> UniversitiesIndex:
+    """Собрать снимок списка ВУЗов."""
+
+    return UniversitiesIndex(
+        version=version,
+        universities_by_id={university.id: university for university in universities},
+    )
+
+
+def build_scoring_matrix(
+    index: UniversitiesIndex, snapshot: CatalogSnapshot
+) -> ScoringMatrix:
+    """Построить матрицу весов связей для снимков ВУЗов и каталога."""
+
+    universities = tuple(index.universities_by_id.values())
+    return ScoringMatrix(
+        university_ids=[university.id for university in universities],
+        sort_keys=[university.name.lower() for university in universities],
+        links=(
+            (university.id, link)
+            for university in universities
+            for link in university.iter_links()
+        ),
+        olympiads=snapshot.olympiads_by_id,
+    )
+
+
 class UniversitiesService:
     """Подбор ВУЗов на основе избранных олимпиад пользователя."""
 
     def __init__(self, session_factory: type[AsyncSession] | None = None) -> None:
         self._session_factory = session_factory or AsyncSessionLocal
-        self._universities: Mapping[int, UniversityData] = {
-            item.id: item for item in DEMO_UNIVERSITIES
-        }
+        self._index = build_universities_index(DEMO_UNIVERSITIES, version=DEMO_CATALOG_VERSION)
+        self._results = RenderCache(maxsize=RESULTS_CACHE_SIZE)
+        self._scoring: tuple[tuple[int, int], ScoringMatrix] | None = None
+        self._scoring_lock = Lock()
+
+    @property
+    def index(self) -> UniversitiesIndex:
+        """Текущий снимок списка ВУЗов."""
+
+        return self._index
 
-    async def list_recommendations(self, *, tg_user_id: int) -> Sequence[UniversityRecommendation]:
-        """Вернуть демо-подборку ВУЗов для пользователя."""
+    async def reload(self, *, force: bool = False) -> bool:
+        """Перечитать ВУЗы из базы, если изменилась версия каталога.
+
+        Возвращает ``True``, если снимок был заменён. Пока в базе нет ВУЗов,
+        используются демо-данные.
+        """
 
         async with self._session_factory() as session:
-            favorites = await self._load_favorites(session, tg_user_id)
+            version = await session.scalar(
+                select(CatalogState.version).where(CatalogState.id == CATALOG_STATE_ID)
+            )
+            if version is None or (not force and version == self._index.version):
+                return False
 
-        if not favorites:
-            return ()
+            university_rows = (
+                await session.execute(
+                    select(University.id, University.name, University.description)
+                )
+            ).all()
+            if not university_rows:
+                return False
+            faculty_rows = (
+                await session.execute(
+                    select(
+                        UniversityFaculty.id,
+                        UniversityFaculty.university_id,
+                        UniversityFaculty.title,
+                        UniversityFaculty.description,
+                    ).order_by(UniversityFaculty.position, UniversityFaculty.id)
+                )
+            ).all()
+            benefit_rows = (
+                await session.execute(
+                    select(
+                        UniversityBenefit.university_id,
+                        UniversityBenefit.faculty_id,
+                        UniversityBenefit.text,
+                    ).order_by(UniversityBenefit.position, UniversityBenefit.id)
+                )
+            ).all()
+            link_rows = (
+                await session.execute(
+                    select(
+                        OlympiadUniversity.university_id,
+                        OlympiadUniversity.olympiad_id,
+                        OlympiadUniversity.benefit_kind,
+                        UniversityFaculty.subject_code,
+                    )
+                    .outerjoin(
+                        UniversityFaculty, UniversityFaculty.id == OlympiadUniversity.faculty_id
+                    )
+                    .order_by(OlympiadUniversity.university_id, OlympiadUniversity.olympiad_id)
+                )
+            ).all()
+
+        university_benefits: dict[int, list[str]] = {}
+        faculty_benefits: dict[int, list[str]] = {}
+        for university_id, faculty_id, text in benefit_rows:
+            if faculty_id is None:
+                university_benefits.setdefault(university_id, []).append(text)
+            else:
+                faculty_benefits.setdefault(faculty_id, []).append(text)
+
+        faculties: dict[int, list[FacultyInfo]] = {}
+        for faculty_id, university_id, title, description in faculty_rows:
+            faculties.setdefault(university_id, []).append(
+                FacultyInfo(
+                    title=title,
+                    description=description or "",
+                    benefits=tuple(faculty_benefits.get(faculty_id, ())),
+                )
+            )
 
-        recommendations: list[UniversityRecommendation] = []
-        for university in self._universities.values():
-            matched_titles = [
-                favorites[olymp_id]
-                for olymp_id in university.olympiad_ids
-                if olymp_id in favorites
-            ]
-            if not matched_titles:
-                continue
-            recommendations.append(
-                UniversityRecommendation(
-                    id=university.id,
-                    name=university.name,
-                    description=university.description,
-                    benefits=university.benefits,
-                    matched_olympiads=tuple(matched_titles),
+        links: dict[int, list[UniversityLink]] = {}
+        for university_id, olympiad_id, benefit_kind, subject_code in link_rows:
+            links.setdefault(university_id, []).append(
+                UniversityLink(
+                    olympiad_id=olympiad_id,
+                    benefit_kind=benefit_kind,
+                    faculty_subject_code=subject_code,
                 )
             )
 
-        recommendations.sort(
-            key=lambda item: (-len(item.matched_olympiads), item.name.lower())
+        universities = [
+            UniversityData(
+                id=university_id,
+                name=name,
+                description=description or "",
+                olympiad_ids=tuple(link.olympiad_id for link in links.get(university_id, ())),
+                benefits=tuple(university_benefits.get(university_id, ())),
+                faculties=tuple(faculties.get(university_id, ())),
+                links=tuple(links.get(university_id, ())),
+            )
+            for university_id, name, description in university_rows
+        ]
+        self._index = build_universities_index(universities, version=version)
+        logger.info(
+            "Список ВУЗов обновлён до версии {version}: {count} ВУЗов",
+            version=version,
+            count=len(universities),
+        )
+        return True
+
+    async def get_recommendation_set(self, *, tg_user_id: int) -> RecommendationSet:
+        """Вернуть подборку для избранного пользователя, используя кэш.
+
+        Пользователи с одинаковым набором избранных олимпиад получают один и
+        тот же объект, пока не сменится версия каталога, списка ВУЗов или
+        день (от него зависит вес близости дат). При промахе кэша берётся
+        подборка, посчитанная ночным заданием, если с тех пор избранное не
+        менялось, иначе подборка считается сразу.
+        """
+
+        favorite_ids = await get_favorites_service().get_favorite_ids(tg_user_id=tg_user_id)
+        snapshot = get_olympiad_service().snapshot
+        index = self._index
+        today = datetime.now(tz=timezone.utc).date()
+        favorites = {
+            olymp_id: snapshot.olympiads_by_id[olymp_id].title
+            for olymp_id in favorite_ids
+            if olymp_id in snapshot.olympiads_by_id
+        }
+        key = favorites_fingerprint(
+            favorites, versions=(snapshot.version, index.version, today.toordinal())
+        )
+        cached = self._results.get(key, STATIC_SCREEN_VERSION)
+        if isinstance(cached, RecommendationSet):
+            return cached
+
+        ranking = await self._load_stored_ranking(tg_user_id, key) if favorites else None
+        if ranking is None:
+            recommendations = self._rank(index, snapshot, favorites, RECOMMENDATIONS_LIMIT)
+        else:
+            recommendations = self._build_recommendations(index, favorites, ranking)
+        recommendation_set = RecommendationSet(
+            key=key, favorites=favorites, recommendations=recommendations
+        )
+        self._results.put(key, STATIC_SCREEN_VERSION, recommendation_set)
+        return recommendation_set
+
+    async def list_recommendations(
+        self, *, tg_user_id: int, limit: int = RECOMMENDATIONS_LIMIT
+    ) -> Sequence[UniversityRecommendation]:
+        """Вернуть до ``limit`` ВУЗов с наибольшей взвешенной оценкой.
+
+        Оценка учитывает вид льготы, профиль факультета и близость дат
+        олимпиад; считаются только строки матрицы для избранных олимпиад.
+        """
+
+        recommendation_set = await self.get_recommendation_set(tg_user_id=tg_user_id)
+        if limit <= RECOMMENDATIONS_LIMIT:
+            return recommendation_set.recommendations[:limit]
+        return self._rank(
+            self._index,
+            get_olympiad_service().snapshot,
+            recommendation_set.favorites,
+            limit,
         )
-        return tuple(recommendations)
 
     async def get_details(
         self, *, tg_user_id: int, university_id: int
     ) -> UniversityDetail | None:
         """Получить детальную информацию по выбранному ВУЗу."""
 
-        university = self._universities.get(university_id)
-        if university is None:
-            return None
+        recommendation_set = await self.get_recommendation_set(tg_user_id=tg_user_id)
+        return self.get_details_for(recommendation_set, university_id)
 
-        async with self._session_factory() as session:
-            favorites = await self._load_favorites(session, tg_user_id)
+    def get_details_for(
+        self, recommendation_set: RecommendationSet, university_id: int
+    ) -> UniversityDetail | None:
+        """Получить детализацию ВУЗа для уже вычисленной подборки."""
 
-        matched_titles = tuple(
-            favorites[olymp_id]
-            for olymp_id in university.olympiad_ids
-            if olymp_id in favorites
+        return self._results.get_or_render(
+            f"{recommendation_set.key}:{university_id}",
+            STATIC_SCREEN_VERSION,
+            lambda: self._build_detail(recommendation_set.favorites, university_id),
         )
+
+    def _build_detail(
+        self, favorites: Mapping[int, str], university_id: int
+    ) -> UniversityDetail | None:
+        university = self._index.universities_by_id.get(university_id)
+        if university is None:
+            return None
+
+        matched_titles = self._matched_titles(university, favorites)
         if not matched_titles:
             return None
 
@@ -216,19 +457,85 @@ class UniversitiesService:
             faculties=university.faculties,
         )
 
-    async def _load_favorites(
-        self, session: AsyncSession, tg_user_id: int
-    ) -> Mapping[int, str]:
-        """Получить избранные олимпиады пользователя."""
+    def get_scoring(
+        self, index: UniversitiesIndex, snapshot: CatalogSnapshot
+    ) -> ScoringMatrix:
+        """Матрица весов для пары снимков; пересобирается при смене версий."""
+
+        key = (index.version, snapshot.version)
+        with self._scoring_lock:
+            if self._scoring is None or self._scoring[0] != key:
+                self._scoring = (key, build_scoring_matrix(index, snapshot))
+            return self._scoring[1]
+
+    def _rank(
+        self,
+        index: UniversitiesIndex,
+        snapshot: CatalogSnapshot,
+        favorites: Mapping[int, str],
+        limit: int,
+    ) -> tuple[UniversityRecommendation, ...]:
+        if not favorites:
+            return ()
+
+        scoring = self.get_scoring(index, snapshot)
+        return self._build_recommendations(
+            index, favorites, scoring.top_k(scoring.score(favorites), limit)
+        )
+
+    def _build_recommendations(
+        self,
+        index: UniversitiesIndex,
+        favorites: Mapping[int, str],
+        ranking: Iterable[tuple[int, float]],
+    ) -> tuple[UniversityRecommendation, ...]:
+        recommendations: list[UniversityRecommendation] = []
+        for university_id, score in ranking:
+            university = index.universities_by_id.get(university_id)
+            if university is None:
+                continue
+            recommendations.append(
+                UniversityRecommendation(
+                    id=university.id,
+                    name=university.name,
+                    description=university.description,
+                    benefits=university.benefits,
+                    matched_olympiads=self._matched_titles(university, favorites),
+                    score=score,
+                )
+            )
+        return tuple(recommendations)
+
+    async def _load_stored_ranking(
+        self, tg_user_id: int, fingerprint: str
+    ) -> tuple[tuple[int, float], ...] | None:
+        """Прочитать заранее посчитанную подборку, если она ещё актуальна."""
 
-        stmt = (
-            select(Olympiad.id, Olympiad.title)
-            .join(UserOlympiad, UserOlympiad.olympiad_id == Olympiad.id)
-            .join(User, User.id == UserOlympiad.user_id)
-            .where(User.tg_id == tg_user_id)
+        async with self._session_factory() as session:
+            row = (
+                await session.execute(
+                    select(
+                        UserRecommendation.fingerprint,
+                        UserRecommendation.university_ids,
+                        UserRecommendation.scores,
+                    )
+                    .join(User, User.id == UserRecommendation.user_id)
+                    .where(User.tg_id == tg_user_id)
+                )
+            ).one_or_none()
+        if row is None or row.fingerprint != fingerprint:
+            return None
+        return tuple(zip(row.university_ids, row.scores))
+
+    @staticmethod
+    def _matched_titles(
+        university: UniversityData, favorites: Mapping[int, str]
+    ) -> tuple[str, ...]:
+        return tuple(
+            favorites[olymp_id]
+            for olymp_id in university.olympiad_ids
+            if olymp_id in favorites
         )
-        result = await session.execute(stmt)
-        return {olymp_id: title for olymp_id, title in result.all()}
 
 
 @lru_cache
@@ -240,8 +547,13 @@ def get_universities_service() -> UniversitiesService:
 
 __all__ = [
     "FacultyInfo",
+    "RecommendationSet",
     "UniversityDetail",
     "UniversityRecommendation",
+    "UniversitiesIndex",
     "UniversitiesService",
+    "build_scoring_matrix",
+    "build_universities_index",
+    "favorites_fingerprint",
     "get_universities_service",
 ]
@@ -0,0 +1,207 @@
+"""Взвешенная оценка ВУЗов по избранным олимпиадам на NumPy.
+
+Связи «олимпиада → ВУЗ» хранятся разреженной матрицей в формате CSR: строки —
+олимпиады, столбцы — ВУЗы, значения — вес связи. Оценка пользователя равна
+произведению этой матрицы на вектор его избранного, умноженный на близость
+дат олимпиад. Для одного пользователя затрагиваются только строки его
+избранного, а пачка пользователей считается одним ``bincount``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+
+from bot.repository.models import BenefitKind
+from bot.services.olympiad_service import OlympiadInfo
+
+BENEFIT_WEIGHTS: Mapping[BenefitKind, float] = {
+    BenefitKind.BVI: 1.0,
+    BenefitKind.HUNDRED_POINTS: 0.6,
+    BenefitKind.EXTRA_POINTS: 0.3,
+}
+# Вес связи в зависимости от того, совпадает ли профиль факультета с предметом.
+FACULTY_MATCH_WEIGHT = 1.0
+UNIVERSITY_WIDE_WEIGHT = 0.8
+FACULTY_MISMATCH_WEIGHT = 0.5
+# Близость дат: олимпиады с ближайшей датой в пределах горизонта получают
+# надбавку до PROXIMITY_BONUS, а олимпиады без будущих дат — понижающий вес.
+PROXIMITY_HORIZON_DAYS = 90
+PROXIMITY_BONUS = 0.5
+PAST_EVENTS_WEIGHT = 0.7
+
+
+@dataclass(frozen=True, slots=True)
+class UniversityLink:
+    """Связь олимпиады с ВУЗом: вид льготы и профиль факультета."""
+
+    olympiad_id: int
+    benefit_kind: BenefitKind = BenefitKind.EXTRA_POINTS
+    faculty_subject_code: str | None = None
+
+
+def link_weight(link: UniversityLink, olympiad: OlympiadInfo) -> float:
+    """Вес связи без учёта дат олимпиады."""
+
+    if link.faculty_subject_code is None:
+        relevance = UNIVERSITY_WIDE_WEIGHT
+    elif link.faculty_subject_code == olympiad.subject_code:
+        relevance = FACULTY_MATCH_WEIGHT
+    else:
+        relevance = FACULTY_MISMATCH_WEIGHT
+    return BENEFIT_WEIGHTS[link.benefit_kind] * relevance
+
+
+def _expand_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Склеить диапазоны ``[start, end)`` в один массив индексов."""
+
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total, dtype=np.int64)
+
+
+class ScoringMatrix:
+    """Разреженная матрица весов связей с быстрым подсчётом оценок."""
+
+    def __init__(
+        self,
+        *,
+        university_ids: Sequence[int],
+        sort_keys: Sequence[str],
+        links: Iterable[tuple[int, UniversityLink]],
+        olympiads: Mapping[int, OlympiadInfo],
+    ) -> None:
+        self.university_ids = np.asarray(university_ids, dtype=np.int64)
+        # Ранг имени используется для стабильного порядка при равных оценках.
+        self.name_rank = np.empty(len(sort_keys), dtype=np.int64)
+        self.name_rank[np.argsort(np.asarray(sort_keys, dtype=object), kind="stable")] = (
+            np.arange(len(sort_keys))
+        )
+        column_by_id = {university_id: pos for pos, university_id in enumerate(university_ids)}
+
+        rows: list[int] = []
+        columns: list[int] = []
+        weights: list[float] = []
+        row_by_olympiad: dict[int, int] = {}
+        for university_id, link in links:
+            olympiad = olympiads.get(link.olympiad_id)
+            column = column_by_id.get(university_id)
+            if olympiad is None or column is None:
+                continue
+            row = row_by_olympiad.setdefault(link.olympiad_id, len(row_by_olympiad))
+            rows.append(row)
+            columns.append(column)
+            weights.append(link_weight(link, olympiad))
+
+        order = np.argsort(np.asarray(rows, dtype=np.int64), kind="stable")
+        row_counts = np.bincount(np.asarray(rows, dtype=np.int64), minlength=len(row_by_olympiad))
+        self.indptr = np.concatenate(([0], np.cumsum(row_counts))).astype(np.int64)
+        self.columns = np.asarray(columns, dtype=np.int64)[order]
+        self.weights = np.asarray(weights, dtype=np.float64)[order]
+        self._row_by_olympiad = row_by_olympiad
+
+        # Даты олимпиад в виде порядковых номеров дней; -1 означает «нет даты».
+        reg = np.full(len(row_by_olympiad), -1, dtype=np.int64)
+        rounds = np.full(len(row_by_olympiad), -1, dtype=np.int64)
+        for olympiad_id, row in row_by_olympiad.items():
+            olympiad = olympiads[olympiad_id]
+            if olympiad.reg_deadline:
+                reg[row] = olympiad.reg_deadline.toordinal()
+            if olympiad.round_date:
+                rounds[row] = olympiad.round_date.toordinal()
+        self._event_days = np.stack((reg, rounds))
+        self._proximity_day: int | None = None
+        self._proximity = np.ones(len(row_by_olympiad), dtype=np.float64)
+
+    @property
+    def size(self) -> int:
+        """Количество ВУЗов (столбцов матрицы)."""
+
+        return len(self.university_ids)
+
+    def proximity(self, today: date | None = None) -> np.ndarray:
+        """Веса близости дат по строкам матрицы; пересчитываются раз в день."""
+
+        day = (today or datetime.now(tz=timezone.utc).date()).toordinal()
+        if self._proximity_day != day:
+            no_event = np.iinfo(np.int64).max
+            upcoming = np.where(
+                self._event_days >= day, self._event_days - day, no_event
+            )
+            nearest = upcoming.min(axis=0)
+            has_upcoming = nearest != no_event
+            closeness = np.clip(1.0 - nearest / PROXIMITY_HORIZON_DAYS, 0.0, 1.0)
+            self._proximity = np.where(
+                has_upcoming, 1.0 + PROXIMITY_BONUS * closeness, PAST_EVENTS_WEIGHT
+            )
+            self._proximity_day = day
+        return self._proximity
+
+    def score(self, olympiad_ids: Iterable[int], *, today: date | None = None) -> np.ndarray:
+        """Оценки всех ВУЗов для одного набора избранных олимпиад."""
+
+        return self.score_many((olympiad_ids,), today=today)[0]
+
+    def score_many(
+        self, favorite_sets: Sequence[Iterable[int]], *, today: date | None = None
+    ) -> np.ndarray:
+        """Матрица оценок «пользователи × ВУЗы» для пачки наборов избранного."""
+
+        users: list[int] = []
+        rows: list[int] = []
+        for user_pos, olympiad_ids in enumerate(favorite_sets):
+            for olympiad_id in set(olympiad_ids):
+                row = self._row_by_olympiad.get(olympiad_id)
+                if row is not None:
+                    users.append(user_pos)
+                    rows.append(row)
+
+        n_users = len(favorite_sets)
+        if not rows:
+            return np.zeros((n_users, self.size), dtype=np.float64)
+
+        row_array = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[row_array]
+        ends = self.indptr[row_array + 1]
+        links = _expand_ranges(starts, ends)
+        lengths = ends - starts
+        link_users = np.repeat(np.asarray(users, dtype=np.int64), lengths)
+        link_rows = np.repeat(row_array, lengths)
+
+        weights = self.weights[links] * self.proximity(today)[link_rows]
+        flat = np.bincount(
+            link_users * self.size + self.columns[links],
+            weights=weights,
+            minlength=n_users * self.size,
+        )
+        return flat.reshape(n_users, self.size)
+
+    def top_k(self, scores: np.ndarray, k: int) -> list[tuple[int, float]]:
+        """Лучшие ``k`` ВУЗов по оценке, при равенстве — по названию."""
+
+        candidates = np.flatnonzero(scores > 0)
+        if k <= 0 or not len(candidates):
+            return []
+        if len(candidates) > k:
+            threshold = np.partition(scores[candidates], -k)[-k]
+            candidates = candidates[scores[candidates] >= threshold]
+        order = np.lexsort((self.name_rank[candidates], -scores[candidates]))
+        chosen = candidates[order[:k]]
+        return [
+            (int(university_id), float(score))
+            for university_id, score in zip(self.university_ids[chosen], scores[chosen])
+        ]
+
+
+__all__ = [
+    "BENEFIT_WEIGHTS",
+    "ScoringMatrix",
+    "UniversityLink",
+    "link_weight",
+]
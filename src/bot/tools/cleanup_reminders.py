@@ -0,0 +1,101 @@
+"""Разовая очистка неотправленных напоминаний по олимпиадам вне избранного.
+
+Удаляет напоминания, для которых у пользователя больше нет записи в
+``user_olympiads``. Удаление выполняется set-based пачками, чтобы не держать
+длинные блокировки на таблице ``reminders``.
+
+Запуск: ``python -m bot.tools.cleanup_reminders [--batch-size N] [--dry-run]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import and_, delete, exists, func, select
+
+from bot.repository.db import engine
+from bot.repository.models import Reminder, UserOlympiad
+from bot.utils.logging import logger, setup_logging
+
+DEFAULT_BATCH_SIZE = 10_000
+
+_ORPHAN_CONDITION = and_(
+    Reminder.sent_at.is_(None),
+    ~exists().where(
+        UserOlympiad.user_id == Reminder.user_id,
+        UserOlympiad.olympiad_id == Reminder.olympiad_id,
+    ),
+)
+
+
+async def count_orphans() -> int:
+    """Посчитать напоминания, которые будут удалены."""
+
+    async with engine.connect() as connection:
+        total = await connection.scalar(
+            select(func.count()).select_from(Reminder).where(_ORPHAN_CONDITION)
+        )
+    return int(total or 0)
+
+
+async def delete_orphans(*, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Удалить осиротевшие напоминания пачками, каждая в своей транзакции."""
+
+    batch = (
+        select(Reminder.id)
+        .where(_ORPHAN_CONDITION)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    stmt = delete(Reminder).where(Reminder.id.in_(batch))
+
+    deleted = 0
+    while True:
+        async with engine.begin() as connection:
+            result = await connection.execute(stmt)
+        deleted += result.rowcount
+        logger.info("Удалено напоминаний: {total}", total=deleted)
+        if result.rowcount < batch_size:
+            return deleted
+
+
+async def _run(*, batch_size: int, dry_run: bool) -> int:
+    try:
+        if dry_run:
+            return await count_orphans()
+        return await delete_orphans(batch_size=batch_size)
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа командной строки."""
+
+    setup_logging()
+    parser = argparse.ArgumentParser(
+        prog="python -m bot.tools.cleanup_reminders",
+        description="Удалить неотправленные напоминания по олимпиадам вне избранного.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="строк за одну транзакцию (по умолчанию %(default)s)",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="только посчитать напоминания без удаления"
+    )
+    args = parser.parse_args(argv)
+
+    total = asyncio.run(_run(batch_size=max(args.batch_size, 1), dry_run=args.dry_run))
+    if args.dry_run:
+        logger.info("Найдено осиротевших напоминаний: {total}", total=total)
+    else:
+        logger.info("Очистка завершена, удалено напоминаний: {total}", total=total)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,528 @@
+"""Потоковый импорт каталога: предметы, олимпиады, ВУЗы и связи между ними.
+
+Формат входных файлов — CSV с заголовком или JSON Lines. Каждая запись
+содержит поле ``kind`` и поля своей сущности:
+
+* ``subject``: ``code`` (1–32 символа ``a-z``, ``0-9``, ``_``, ``-``), ``title``,
+  ``description``;
+* ``olympiad``: ``id``, ``subject``, ``title``, ``reg_deadline``, ``round_date``,
+  ``description`` (даты в формате ``YYYY-MM-DD``, ``subject`` — код предмета);
+* ``university``: ``id``, ``name``, ``description``;
+* ``faculty``: ``id``, ``university_id``, ``title``, ``description``, ``position``,
+  ``subject_code`` (профильный предмет факультета);
+* ``benefit``: ``university_id``, ``faculty_id``, ``text``, ``position``
+  (без ``faculty_id`` льгота относится ко всему ВУЗу);
+* ``link``: ``olympiad_id``, ``university_id``, ``benefit_kind`` (``bvi``,
+  ``hundred_points`` или ``extra_points``), ``faculty_id``.
+
+Льготы ВУЗа, встретившегося среди записей ``benefit``, заменяются целиком.
+
+Строки проверяются по мере чтения и пачками загружаются через ``COPY``
+во временные таблицы, затем сливаются в основные таблицы set-based
+upsert'ами в одной транзакции. После импорта увеличивается версия каталога
+и отмечается время импорта: только после этого бот переключается с демо-каталога.
+
+Запуск: ``python -m bot.tools.import_catalog catalog.jsonl [more.csv ...]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Iterator, Mapping
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from bot.repository.db import engine
+from bot.repository.models import BenefitKind
+from bot.utils.logging import logger, setup_logging
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 20
+BENEFIT_KINDS = tuple(kind.value for kind in BenefitKind)
+# Код предмета попадает в callback_data вида ``sel:page:<code>:<page>``:
+# без ``:`` и не длиннее 32 ASCII-символов, чтобы уложиться в 64 байта Telegram.
+SUBJECT_CODE_RE = re.compile(r"[a-z0-9_-]{1,32}")
+
+
+class RowError(ValueError):
+    """Ошибка валидации отдельной строки импорта."""
+
+
+@dataclass(frozen=True, slots=True)
+class StagingTable:
+    """Временная таблица для одного вида записей."""
+
+    name: str
+    columns: tuple[str, ...]
+    ddl: str
+
+
+STAGING_TABLES: dict[str, StagingTable] = {
+    "subject": StagingTable(
+        name="stage_subjects",
+        columns=("seq", "code", "title", "description"),
+        ddl="seq bigint, code text, title text, description text",
+    ),
+    "olympiad": StagingTable(
+        name="stage_olympiads",
+        columns=("seq", "id", "subject", "title", "reg_deadline", "round_date", "description"),
+        ddl=(
+            "seq bigint, id integer, subject text, title text,"
+            " reg_deadline date, round_date date, description text"
+        ),
+    ),
+    "university": StagingTable(
+        name="stage_universities",
+        columns=("seq", "id", "name", "description"),
+        ddl="seq bigint, id integer, name text, description text",
+    ),
+    "faculty": StagingTable(
+        name="stage_faculties",
+        columns=(
+            "seq", "id", "university_id", "title", "description", "position", "subject_code"
+        ),
+        ddl=(
+            "seq bigint, id integer, university_id integer, title text,"
+            " description text, position integer, subject_code text"
+        ),
+    ),
+    "benefit": StagingTable(
+        name="stage_benefits",
+        columns=("seq", "university_id", "faculty_id", "text", "position"),
+        ddl="seq bigint, university_id integer, faculty_id integer, text text, position integer",
+    ),
+    "link": StagingTable(
+        name="stage_links",
+        columns=("seq", "olympiad_id", "university_id", "benefit_kind", "faculty_id"),
+        ddl=(
+            "seq bigint, olympiad_id integer, university_id integer,"
+            " benefit_kind text, faculty_id integer"
+        ),
+    ),
+}
+
+# Порядок важен: олимпиады ссылаются на предметы, факультеты и льготы — на ВУЗы,
+# связи — на олимпиады и ВУЗы.
+MERGE_STATEMENTS: tuple[tuple[str, str], ...] = (
+    (
+        "subject",
+        """
+        INSERT INTO subjects (code, title, description)
+        SELECT DISTINCT ON (code) code, title, description
+        FROM stage_subjects
+        ORDER BY code, seq DESC
+        ON CONFLICT (code) DO UPDATE
+        SET title = EXCLUDED.title, description = EXCLUDED.description
+        """,
+    ),
+    (
+        "olympiad",
+        """
+        INSERT INTO olympiads (id, subject, title, reg_deadline, round_date, description)
+        SELECT DISTINCT ON (id) id, subject, title, reg_deadline, round_date, description
+        FROM stage_olympiads
+        ORDER BY id, seq DESC
+        ON CONFLICT (id) DO UPDATE
+        SET subject = EXCLUDED.subject,
+            title = EXCLUDED.title,
+            reg_deadline = EXCLUDED.reg_deadline,
+            round_date = EXCLUDED.round_date,
+            description = EXCLUDED.description
+        """,
+    ),
+    (
+        "university",
+        """
+        INSERT INTO universities (id, name, description)
+        SELECT DISTINCT ON (id) id, name, description
+        FROM stage_universities
+        ORDER BY id, seq DESC
+        ON CONFLICT (id) DO UPDATE
+        SET name = EXCLUDED.name, description = EXCLUDED.description
+        """,
+    ),
+    (
+        "faculty",
+        """
+        INSERT INTO university_faculties
+            (id, university_id, position, title, description, subject_code)
+        SELECT DISTINCT ON (s.id)
+            s.id, s.university_id, s.position, s.title, s.description, s.subject_code
+        FROM stage_faculties AS s
+        JOIN universities AS u ON u.id = s.university_id
+        ORDER BY s.id, s.seq DESC
+        ON CONFLICT (id) DO UPDATE
+        SET university_id = EXCLUDED.university_id,
+            position = EXCLUDED.position,
+            title = EXCLUDED.title,
+            description = EXCLUDED.description,
+            subject_code = EXCLUDED.subject_code
+        """,
+    ),
+    (
+        "benefit",
+        """
+        WITH purged AS (
+            DELETE FROM university_benefits
+            WHERE university_id IN (SELECT university_id FROM stage_benefits)
+        )
+        INSERT INTO university_benefits (university_id, faculty_id, position, text)
+        SELECT s.university_id, s.faculty_id, s.position, s.text
+        FROM stage_benefits AS s
+        JOIN universities AS u ON u.id = s.university_id
+        LEFT JOIN university_faculties AS f
+            ON f.id = s.faculty_id AND f.university_id = s.university_id
+        WHERE s.faculty_id IS NULL OR f.id IS NOT NULL
+        ORDER BY s.seq
+        """,
+    ),
+    (
+        "link",
+        """
+        INSERT INTO olympiad_university (olympiad_id, university_id, benefit_kind, faculty_id)
+        SELECT DISTINCT ON (s.olympiad_id, s.university_id)
+            s.olympiad_id, s.university_id, s.benefit_kind::benefit_kind, f.id
+        FROM stage_links AS s
+        JOIN olympiads AS o ON o.id = s.olympiad_id
+        JOIN universities AS u ON u.id = s.university_id
+        LEFT JOIN university_faculties AS f
+            ON f.id = s.faculty_id AND f.university_id = s.university_id
+        ORDER BY s.olympiad_id, s.university_id, s.seq DESC
+        ON CONFLICT (olympiad_id, university_id) DO UPDATE
+        SET benefit_kind = EXCLUDED.benefit_kind, faculty_id = EXCLUDED.faculty_id
+        """,
+    ),
+)
+
+SEQUENCE_RESETS: tuple[str, ...] = (
+    "SELECT setval(pg_get_serial_sequence('olympiads', 'id'),"
+    " GREATEST((SELECT max(id) FROM olympiads), 1))",
+    "SELECT setval(pg_get_serial_sequence('universities', 'id'),"
+    " GREATEST((SELECT max(id) FROM universities), 1))",
+    "SELECT setval(pg_get_serial_sequence('university_faculties', 'id'),"
+    " GREATEST((SELECT max(id) FROM university_faculties), 1))",
+)
+
+BUMP_VERSION_SQL = """
+INSERT INTO catalog_state (id, version, imported_at) VALUES (1, 1, CURRENT_TIMESTAMP)
+ON CONFLICT (id) DO UPDATE
+SET version = catalog_state.version + 1,
+    updated_at = CURRENT_TIMESTAMP,
+    imported_at = CURRENT_TIMESTAMP
+RETURNING version
+"""
+
+
+def _required_text(row: Mapping[str, Any], key: str, max_length: int) -> str:
+    value = row.get(key)
+    if value is None or not str(value).strip():
+        raise RowError(f"поле {key!r} обязательно")
+    value = str(value).strip()
+    if len(value) > max_length:
+        raise RowError(f"поле {key!r} длиннее {max_length} символов")
+    return value
+
+
+def _optional_text(row: Mapping[str, Any], key: str) -> str | None:
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _required_int(row: Mapping[str, Any], key: str) -> int:
+    value = row.get(key)
+    try:
+        number = int(str(value).strip())
+    except (TypeError, ValueError):
+        raise RowError(f"поле {key!r} должно быть целым числом") from None
+    if number <= 0:
+        raise RowError(f"поле {key!r} должно быть положительным")
+    return number
+
+
+def _optional_int(row: Mapping[str, Any], key: str) -> int | None:
+    if _optional_text(row, key) is None:
+        return None
+    return _required_int(row, key)
+
+
+def _position(row: Mapping[str, Any]) -> int:
+    value = _optional_text(row, "position")
+    if value is None:
+        return 0
+    try:
+        return int(value)
+    except ValueError:
+        raise RowError("поле 'position' должно быть целым числом") from None
+
+
+def _optional_date(row: Mapping[str, Any], key: str) -> date | None:
+    value = _optional_text(row, key)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise RowError(f"поле {key!r} должно быть датой YYYY-MM-DD") from None
+
+
+def _subject_code(row: Mapping[str, Any], key: str) -> str:
+    value = _required_text(row, key, 50)
+    if SUBJECT_CODE_RE.fullmatch(value) is None:
+        raise RowError(
+            f"поле {key!r} должно состоять из 1–32 символов a-z, 0-9, '_' или '-'"
+        )
+    return value
+
+
+def _parse_subject(row: Mapping[str, Any]) -> tuple[Any, ...]:
+    return (
+        _subject_code(row, "code"),
+        _required_text(row, "title", 100),
+        _optional_text(row, "description"),
+    )
+
+
+def _parse_olympiad(row: Mapping[str, Any]) -> tuple[Any, ...]:
+    return (
+        _required_int(row, "id"),
+        _subject_code(row, "subject"),
+        _required_text(row, "title", 255),
+        _optional_date(row, "reg_deadline"),
+        _optional_date(row, "round_date"),
+        _optional_text(row, "description"),
+    )
+
+
+def _parse_university(row: Mapping[str, Any]) -> tuple[Any, ...]:
+    return (
+        _required_int(row, "id"),
+        _required_text(row, "name", 255),
+        _optional_text(row, "description"),
+    )
+
+
+def _parse_faculty(row: Mapping[str, Any]) -> tuple[Any, ...]:
+    return (
+        _required_int(row, "id"),
+        _required_int(row, "university_id"),
+        _required_text(row, "title", 255),
+        _optional_text(row, "description"),
+        _position(row),
+        _optional_text(row, "subject_code"),
+    )
+
+
+def _parse_benefit(row: Mapping[str, Any]) -> tuple[Any, ...]:
+    return (
+        _required_int(row, "university_id"),
+        _optional_int(row, "faculty_id"),
+        _required_text(row, "text", 1000),
+        _position(row),
+    )
+
+
+def _parse_link(row: Mapping[str, Any]) -> tuple[Any, ...]:
+    benefit_kind = _optional_text(row, "benefit_kind") or BenefitKind.EXTRA_POINTS.value
+    if benefit_kind not in BENEFIT_KINDS:
+        raise RowError(f"поле 'benefit_kind' должно быть одним из: {', '.join(BENEFIT_KINDS)}")
+    return (
+        _required_int(row, "olympiad_id"),
+        _required_int(row, "university_id"),
+        benefit_kind,
+        _optional_int(row, "faculty_id"),
+    )
+
+
+PARSERS: dict[str, Callable[[Mapping[str, Any]], tuple[Any, ...]]] = {
+    "subject": _parse_subject,
+    "olympiad": _parse_olympiad,
+    "university": _parse_university,
+    "faculty": _parse_faculty,
+    "benefit": _parse_benefit,
+    "link": _parse_link,
+}
+
+
+def iter_rows(path: Path) -> Iterator[tuple[int, Mapping[str, Any]]]:
+    """Лениво читать записи файла вместе с номерами строк."""
+
+    suffix = path.suffix.lower()
+    with path.open(encoding="utf-8", newline="") as handle:
+        if suffix == ".csv":
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        if suffix not in (".jsonl", ".ndjson"):
+            raise ValueError(f"Неподдерживаемый формат файла: {path}")
+        for line_no, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                payload = json.loads(line)
+            except json.JSONDecodeError:
+                yield line_no, {"kind": None, "_error": "некорректный JSON"}
+                continue
+            if not isinstance(payload, dict):
+                yield line_no, {"kind": None, "_error": "ожидается JSON-объект"}
+                continue
+            yield line_no, payload
+
+
+@dataclass(slots=True)
+class ImportReport:
+    """Итоги импорта по видам записей."""
+
+    accepted: dict[str, int] = field(default_factory=lambda: dict.fromkeys(PARSERS, 0))
+    merged: dict[str, int] = field(default_factory=lambda: dict.fromkeys(PARSERS, 0))
+    invalid: int = 0
+    errors: list[str] = field(default_factory=list)
+    version: int | None = None
+
+    def add_error(self, location: str, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"{location}: {message}")
+
+
+class CatalogImporter:
+    """Загрузка записей пачками через COPY во временные таблицы."""
+
+    def __init__(self, connection: AsyncConnection, *, batch_size: int) -> None:
+        self._connection = connection
+        self._batch_size = batch_size
+        self._buffers: dict[str, list[tuple[Any, ...]]] = {kind: [] for kind in PARSERS}
+        self._seq = 0
+        self.report = ImportReport()
+
+    async def prepare(self) -> None:
+        for table in STAGING_TABLES.values():
+            await self._connection.execute(
+                text(f"CREATE TEMP TABLE {table.name} ({table.ddl}) ON COMMIT DROP")
+            )
+
+    async def feed(self, location: str, row: Mapping[str, Any]) -> None:
+        kind = str(row.get("kind") or "").strip().lower()
+        parser = PARSERS.get(kind)
+        if parser is None:
+            self.report.add_error(location, row.get("_error") or f"неизвестный kind {kind!r}")
+            return
+        try:
+            values = parser(row)
+        except RowError as exc:
+            self.report.add_error(location, str(exc))
+            return
+
+        self._seq += 1
+        buffer = self._buffers[kind]
+        buffer.append((self._seq, *values))
+        self.report.accepted[kind] += 1
+        if len(buffer) >= self._batch_size:
+            await self._flush(kind)
+
+    async def finish(self) -> ImportReport:
+        for kind in PARSERS:
+            await self._flush(kind)
+        for kind, statement in MERGE_STATEMENTS:
+            result = await self._connection.execute(text(statement))
+            self.report.merged[kind] = result.rowcount
+        for statement in SEQUENCE_RESETS:
+            await self._connection.execute(text(statement))
+        self.report.version = await self._connection.scalar(text(BUMP_VERSION_SQL))
+        return self.report
+
+    async def _flush(self, kind: str) -> None:
+        buffer = self._buffers[kind]
+        if not buffer:
+            return
+        table = STAGING_TABLES[kind]
+        raw = await self._connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name, records=buffer, columns=table.columns
+        )
+        buffer.clear()
+
+
+async def import_catalog(
+    paths: list[Path], *, batch_size: int = DEFAULT_BATCH_SIZE, strict: bool = False
+) -> ImportReport:
+    """Импортировать файлы каталога в одной транзакции."""
+
+    async with engine.begin() as connection:
+        importer = CatalogImporter(connection, batch_size=batch_size)
+        await importer.prepare()
+        for path in paths:
+            for line_no, row in iter_rows(path):
+                await importer.feed(f"{path.name}:{line_no}", row)
+        if strict and importer.report.invalid:
+            raise RowError(
+                f"Найдено некорректных строк: {importer.report.invalid}; импорт отменён"
+            )
+        report = await importer.finish()
+    await engine.dispose()
+    return report
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m bot.tools.import_catalog",
+        description="Потоковый импорт каталога олимпиад из CSV или JSON Lines.",
+    )
+    parser.add_argument("paths", nargs="+", type=Path, help="файлы .csv или .jsonl")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="размер пачки COPY (по умолчанию %(default)s)",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="отменить импорт, если встретилась хотя бы одна некорректная строка",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа командной строки."""
+
+    setup_logging()
+    args = _parse_args(argv)
+    started = time.perf_counter()
+    try:
+        report = asyncio.run(
+            import_catalog(args.paths, batch_size=max(args.batch_size, 1), strict=args.strict)
+        )
+    except (OSError, ValueError) as exc:
+        logger.error("Импорт каталога не выполнен: {error}", error=exc)
+        return 1
+
+    for message in report.errors:
+        logger.warning("Пропущена строка {message}", message=message)
+    logger.info(
+        "Импорт завершён за {elapsed:.1f} c: принято {accepted}, записано {merged},"
+        " некорректных строк {invalid}; версия каталога {version}",
+        elapsed=time.perf_counter() - started,
+        accepted=report.accepted,
+        merged=report.merged,
+        invalid=report.invalid,
+        version=report.version,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Ночной пересчёт подборок ВУЗов для всех пользователей с избранным.
+
+Диапазон ``users.id`` делится на равные части, и каждая часть считается в
+отдельном процессе со своим подключением к базе.
+
+Запуск: ``python -m bot.tools.precompute_recommendations [--workers N]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import func, select
+
+from bot.repository.db import engine
+from bot.repository.models import UserOlympiad
+from bot.services.recommendations_precompute import (
+    DEFAULT_CHUNK_USERS,
+    PrecomputeReport,
+    precompute_recommendations,
+)
+from bot.utils.logging import logger, setup_logging
+
+
+async def _user_id_bounds() -> tuple[int, int] | None:
+    async with engine.connect() as connection:
+        row = (
+            await connection.execute(
+                select(func.min(UserOlympiad.user_id), func.max(UserOlympiad.user_id))
+            )
+        ).one()
+    await engine.dispose()
+    if row[0] is None:
+        return None
+    return int(row[0]), int(row[1])
+
+
+def split_ranges(low: int, high: int, parts: int) -> list[tuple[int, int]]:
+    """Разбить отрезок ``[low, high]`` на не более чем ``parts`` частей."""
+
+    parts = max(1, min(parts, high - low + 1))
+    step = (high - low + 1) // parts
+    ranges: list[tuple[int, int]] = []
+    start = low
+    for part in range(parts):
+        end = high if part == parts - 1 else start + step - 1
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+async def _run_range(
+    min_user_id: int | None, max_user_id: int | None, chunk_size: int
+) -> PrecomputeReport:
+    try:
+        return await precompute_recommendations(
+            min_user_id=min_user_id, max_user_id=max_user_id, chunk_size=chunk_size
+        )
+    finally:
+        await engine.dispose()
+
+
+def _worker(
+    min_user_id: int | None, max_user_id: int | None, chunk_size: int
+) -> PrecomputeReport:
+    setup_logging()
+    return asyncio.run(_run_range(min_user_id, max_user_id, chunk_size))
+
+
+def run(*, workers: int, chunk_size: int) -> PrecomputeReport:
+    """Пересчитать подборки, распределив диапазоны пользователей по процессам."""
+
+    bounds = asyncio.run(_user_id_bounds())
+    total = PrecomputeReport()
+    if bounds is None:
+        return total
+
+    # Крайние диапазоны открыты, чтобы очистка затронула и пользователей,
+    # у которых избранное пропало после расчёта границ.
+    ranges: list[tuple[int | None, int | None]] = list(split_ranges(*bounds, workers))
+    ranges[0] = (None, ranges[0][1])
+    ranges[-1] = (ranges[-1][0], None)
+    if len(ranges) == 1:
+        reports = [_worker(*ranges[0], chunk_size)]
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(ranges), mp_context=context) as pool:
+            futures = [pool.submit(_worker, low, high, chunk_size) for low, high in ranges]
+            reports = [future.result() for future in futures]
+
+    for report in reports:
+        total.users += report.users
+        total.chunks += report.chunks
+        total.removed += report.removed
+    return total
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа командной строки."""
+
+    setup_logging()
+    parser = argparse.ArgumentParser(
+        prog="python -m bot.tools.precompute_recommendations",
+        description="Пересчитать подборки ВУЗов для всех пользователей с избранным.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="число процессов, между которыми делятся пользователи (по умолчанию %(default)s)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_USERS,
+        help="пользователей в одной пачке расчёта (по умолчанию %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    report = run(workers=max(args.workers, 1), chunk_size=max(args.chunk_size, 1))
+    logger.info(
+        "Пересчёт завершён за {elapsed:.1f} c: {users} польз., {chunks} пачек,"
+        " удалено устаревших {removed}",
+        elapsed=time.perf_counter() - started,
+        users=report.users,
+        chunks=report.chunks,
+        removed=report.removed,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Минимальный клиент Google Calendar API: OAuth-токены и пакетные запросы."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Literal, Mapping, Sequence
+from urllib.parse import quote, urlencode
+from uuid import uuid4
+
+import aiohttp
+
+CALENDAR_SCOPE = "https://www.googleapis.com/auth/calendar.events"
+# Google рекомендует не больше 50 вложенных запросов в одном пакете.
+MAX_BATCH_SIZE = 50
+REQUEST_TIMEOUT_SECONDS = 30.0
+# Статусы, после которых запрос стоит повторить позже.
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+Operation = Literal["insert", "update", "delete"]
+
+
+class GoogleApiError(Exception):
+    """Ошибка обращения к Google API."""
+
+    def __init__(self, status: int, message: str = "") -> None:
+        super().__init__(f"{status}: {message}" if message else str(status))
+        self.status = status
+
+    @property
+    def retryable(self) -> bool:
+        return self.status in RETRYABLE_STATUSES
+
+
+@dataclass(frozen=True, slots=True)
+class AccessToken:
+    """Access-токен и срок его действия в секундах."""
+
+    token: str
+    expires_in: int
+    refresh_token: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class EventOperation:
+    """Изменение одного события в пакетном запросе."""
+
+    key: str
+    operation: Operation
+    event_id: str
+    body: Mapping[str, Any] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class OperationResult:
+    """Ответ на вложенный запрос пакета."""
+
+    key: str
+    status: int
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def retryable(self) -> bool:
+        return self.status in RETRYABLE_STATUSES
+
+
+class GoogleCalendarClient:
+    """Обращения к Google OAuth и Calendar API поверх общей HTTP-сессии."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        client_id: str,
+        client_secret: str,
+        token_url: str,
+        api_base_url: str,
+    ) -> None:
+        self._session = session
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._token_url = token_url
+        self._api_base_url = api_base_url.rstrip("/")
+
+    async def exchange_code(self, code: str, *, redirect_uri: str) -> AccessToken:
+        """Обменять код авторизации на access- и refresh-токены."""
+
+        return await self._request_token(
+            {
+                "grant_type": "authorization_code",
+                "code": code,
+                "redirect_uri": redirect_uri,
+            }
+        )
+
+    async def refresh_access_token(self, refresh_token: str) -> AccessToken:
+        """Получить новый access-токен по refresh-токену."""
+
+        return await self._request_token(
+            {"grant_type": "refresh_token", "refresh_token": refresh_token}
+        )
+
+    async def execute_batch(
+        self,
+        access_token: str,
+        calendar_id: str,
+        operations: Sequence[EventOperation],
+    ) -> list[OperationResult]:
+        """Выполнить до ``MAX_BATCH_SIZE`` изменений одним HTTP-запросом."""
+
+        if len(operations) > MAX_BATCH_SIZE:
+            raise ValueError(f"В пакете не больше {MAX_BATCH_SIZE} запросов")
+        boundary = f"batch_{uuid4().hex}"
+        body = _build_batch_body(boundary, calendar_id, operations)
+        async with self._session.post(
+            f"{self._api_base_url}/batch/calendar/v3",
+            data=body.encode(),
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Content-Type": f"multipart/mixed; boundary={boundary}",
+            },
+        ) as response:
+            text = await response.text()
+            if response.status != 200:
+                raise GoogleApiError(response.status, text[:200])
+            content_type = response.headers.get("Content-Type", "")
+        statuses = _parse_batch_response(text, content_type)
+        # Ответа нет — считаем вложенный запрос неудавшимся и повторим позже.
+        return [
+            OperationResult(key=operation.key, status=statuses.get(operation.key, 503))
+            for operation in operations
+        ]
+
+    async def _request_token(self, form: dict[str, str]) -> AccessToken:
+        form = {**form, "client_id": self._client_id, "client_secret": self._client_secret}
+        async with self._session.post(self._token_url, data=form) as response:
+            try:
+                payload = await response.json(content_type=None)
+            except ValueError:
+                payload = None
+            if response.status != 200:
+                error = payload.get("error", "") if isinstance(payload, dict) else ""
+                raise GoogleApiError(response.status, error)
+        # Неожиданный ответ при статусе 200 считается временной ошибкой сервиса.
+        if not isinstance(payload, dict) or not isinstance(payload.get("access_token"), str):
+            raise GoogleApiError(502, "в ответе нет access_token")
+        try:
+            expires_in = int(payload.get("expires_in", 3600))
+        except (TypeError, ValueError):
+            raise GoogleApiError(502, "некорректный expires_in") from None
+        return AccessToken(
+            token=payload["access_token"],
+            expires_in=expires_in,
+            refresh_token=payload.get("refresh_token"),
+        )
+
+
+def build_authorization_url(
+    auth_url: str, *, client_id: str, redirect_uri: str, state: str
+) -> str:
+    """Адрес страницы согласия Google с запросом офлайн-доступа."""
+
+    query = urlencode(
+        {
+            "client_id": client_id,
+            "redirect_uri": redirect_uri,
+            "response_type": "code",
+            "scope": CALENDAR_SCOPE,
+            "access_type": "offline",
+            "prompt": "consent",
+            "state": state,
+        }
+    )
+    return f"{auth_url}?{query}"
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    """Создать HTTP-сессию для обращений к Google API."""
+
+    return aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS))
+
+
+def _build_batch_body(
+    boundary: str, calendar_id: str, operations: Sequence[EventOperation]
+) -> str:
+    events_path = f"/calendar/v3/calendars/{quote(calendar_id, safe='')}/events"
+    parts: list[str] = []
+    for operation in operations:
+        if operation.operation == "insert":
+            request_line = f"POST {events_path}"
+        elif operation.operation == "update":
+            request_line = f"PUT {events_path}/{operation.event_id}"
+        else:
+            request_line = f"DELETE {events_path}/{operation.event_id}"
+        inner = [f"{request_line} HTTP/1.1"]
+        if operation.body is not None:
+            inner.append("Content-Type: application/json; charset=UTF-8")
+            inner.append("")
+            inner.append(json.dumps(operation.body, ensure_ascii=False))
+        else:
+            inner.append("")
+        parts.append(
+            "\r\n".join(
+                (
+                    f"--{boundary}",
+                    "Content-Type: application/http",
+                    f"Content-ID: <{operation.key}>",
+                    "",
+                    *inner,
+                    "",
+                )
+            )
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts)
+
+
+def _parse_batch_response(text: str, content_type: str) -> dict[str, int]:
+    """Вернуть HTTP-статусы вложенных ответов по ключам операций."""
+
+    boundary = ""
+    for param in content_type.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary":
+            boundary = value.strip('"')
+    if not boundary:
+        raise GoogleApiError(502, "в ответе пакета нет boundary")
+
+    statuses: dict[str, int] = {}
+    for part in text.split(f"--{boundary}"):
+        part = part.strip()
+        if not part or part == "--":
+            continue
+        headers, _, inner = part.replace("\r\n", "\n").partition("\n\n")
+        key = None
+        for line in headers.split("\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-id":
+                # Google отвечает идентификатором вида <response-KEY>.
+                key = value.strip().strip("<>").removeprefix("response-")
+        status_line = inner.lstrip().split("\n", 1)[0].split()
+        if key is None or len(status_line) < 2 or not status_line[1].isdigit():
+            continue
+        statuses[key] = int(status_line[1])
+    return statuses
+
+
+__all__ = [
+    "AccessToken",
+    "EventOperation",
+    "GoogleApiError",
+    "GoogleCalendarClient",
+    "MAX_BATCH_SIZE",
+    "OperationResult",
+    "build_authorization_url",
+    "create_http_session",
+]
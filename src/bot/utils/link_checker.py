@@ -0,0 +1,137 @@
+"""Асинхронная проверка доступности ссылок."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import aiohttp
+
+USER_AGENT = "OlympiadBot-LinkChecker/1.0"
+REQUEST_TIMEOUT_SECONDS = 15.0
+# Ответы 4xx, которые не означают, что ссылка битая: доступ ограничен или
+# сервер просит подождать. Остальные 4xx помечают ссылку битой сразу.
+TRANSIENT_CLIENT_STATUSES = frozenset({401, 403, 408, 429})
+# Серверы, которые не поддерживают HEAD или запрещают его, проверяются GET.
+HEAD_FALLBACK_STATUSES = frozenset({403, 405, 501})
+
+
+@dataclass(frozen=True, slots=True)
+class LinkCheckResult:
+    """Итог проверки ссылки.
+
+    ``reachable`` равно ``True`` для рабочей ссылки, ``False`` — для
+    заведомо битой и ``None`` для временной ошибки (таймаут, 429, 5xx),
+    после которой ссылку стоит проверить ещё раз.
+    """
+
+    reachable: bool | None
+    http_status: int | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False
+
+
+class HostRateLimiter:
+    """Не чаще одного запроса к хосту за ``interval`` секунд."""
+
+    def __init__(self, interval: float) -> None:
+        self._interval = interval
+        self._next_slot: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, host: str) -> None:
+        """Дождаться своей очереди к хосту."""
+
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class LinkChecker:
+    """Проверка ссылок с ограничением параллелизма и частоты по хостам.
+
+    Работает поверх общей ``aiohttp.ClientSession``, чтобы соединения
+    переиспользовались. Если известны ETag или Last-Modified прошлого
+    ответа, запрос отправляется условным и сервер может ответить 304 без тела.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        concurrency: int,
+        host_interval: float,
+    ) -> None:
+        self._session = session
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._limiter = HostRateLimiter(host_interval)
+
+    async def check(
+        self,
+        url: str,
+        *,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> LinkCheckResult:
+        """Проверить одну ссылку."""
+
+        headers: dict[str, str] = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        # Очередь к хосту ждём до семафора, чтобы медленный хост не занимал слоты.
+        await self._limiter.wait((urlsplit(url).hostname or "").lower())
+        async with self._semaphore:
+            try:
+                result = await self._request("HEAD", url, headers)
+                if result.http_status in HEAD_FALLBACK_STATUSES:
+                    result = await self._request("GET", url, headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                return LinkCheckResult(reachable=None)
+        return result
+
+    async def _request(self, method: str, url: str, headers: dict[str, str]) -> LinkCheckResult:
+        async with self._session.request(
+            method, url, headers=headers, allow_redirects=True
+        ) as response:
+            status = response.status
+            if status == 304:
+                return LinkCheckResult(reachable=True, http_status=status, not_modified=True)
+            if status < 400:
+                return LinkCheckResult(
+                    reachable=True,
+                    http_status=status,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+            if status < 500 and status not in TRANSIENT_CLIENT_STATUSES:
+                return LinkCheckResult(reachable=False, http_status=status)
+            return LinkCheckResult(reachable=None, http_status=status)
+
+
+def create_http_session(*, concurrency: int, per_host: int = 2) -> aiohttp.ClientSession:
+    """Создать HTTP-сессию с пулом соединений для проверки ссылок."""
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=concurrency, limit_per_host=per_host, ttl_dns_cache=300
+        ),
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+__all__ = [
+    "HostRateLimiter",
+    "LinkCheckResult",
+    "LinkChecker",
+    "create_http_session",
+]
@@ -0,0 +1,101 @@
+"""Подписка на уведомления PostgreSQL ``LISTEN/NOTIFY``."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Callable
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from bot.utils.logging import logger
+
+RECONNECT_DELAY_SECONDS = 5.0
+
+
+class PgListener:
+    """Фоновая задача, слушающая канал на выделенном соединении.
+
+    При обрыве соединения задача переподключается и вызывает
+    ``on_reconnect``: уведомления, отправленные в это время, потеряны, и
+    подписчику нужно сбросить всё, что он мог пропустить.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        channel: str,
+        on_message: Callable[[str], None],
+        *,
+        on_reconnect: Callable[[], None] | None = None,
+    ) -> None:
+        self._engine = engine
+        self._channel = channel
+        self._on_message = on_message
+        self._on_reconnect = on_reconnect
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Запустить прослушивание в текущем цикле событий."""
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"pg-listen:{self._channel}")
+
+    async def stop(self) -> None:
+        """Остановить прослушивание и вернуть соединение в пул."""
+
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        first_attempt = True
+        while True:
+            try:
+                async with self._engine.connect() as connection:
+                    if not first_attempt and self._on_reconnect is not None:
+                        self._on_reconnect()
+                    await self._listen(connection)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001 - переподключаемся при любой ошибке
+                logger.warning(
+                    "Подписка на канал {channel} прервана: {error}",
+                    channel=self._channel,
+                    error=exc,
+                )
+            first_attempt = False
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    async def _listen(self, connection: AsyncConnection) -> None:
+        """Слушать канал, пока соединение живо."""
+
+        raw = (await connection.get_raw_connection()).driver_connection
+        lost = asyncio.Event()
+
+        def handle(_conn: object, _pid: int, _channel: str, payload: str) -> None:
+            try:
+                self._on_message(payload)
+            except Exception as exc:  # noqa: BLE001 - ошибка подписчика не рвёт подписку
+                logger.error("Ошибка обработки уведомления: {error}", error=exc)
+
+        def terminated(_conn: object) -> None:
+            lost.set()
+
+        raw.add_termination_listener(terminated)
+        await raw.add_listener(self._channel, handle)
+        logger.info("Подписка на канал {channel} активна", channel=self._channel)
+        try:
+            await lost.wait()
+        finally:
+            raw.remove_termination_listener(terminated)
+            if not raw.is_closed():
+                await raw.remove_listener(self._channel, handle)
+        raise ConnectionError("соединение с базой закрыто")
+
+
+__all__ = ["PgListener"]
@@ -0,0 +1,125 @@
+"""Кэш готовых экранов: текст сообщения и клавиатура."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, TypeVar
+
+from aiogram.types import InlineKeyboardMarkup
+
+T = TypeVar("T")
+
+# Версия для экранов, которые не зависят от каталога (главное меню и т.п.).
+STATIC_SCREEN_VERSION = 0
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedScreen:
+    """Отрисованный экран, готовый к отправке без дополнительных вычислений."""
+
+    text: str
+    reply_markup: InlineKeyboardMarkup | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class RenderCacheStats:
+    """Счётчики обращений к кэшу экранов."""
+
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class RenderCache:
+    """LRU-кэш экранов по идентификатору экрана и версии каталога.
+
+    Для каждого экрана хранится только последняя версия: при смене версии
+    каталога запись перерисовывается и заменяет старую.
+    """
+
+    def __init__(self, maxsize: int = 2048) -> None:
+        self._maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[int, object]] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_render(self, screen_id: str, version: int, render: Callable[[], T]) -> T:
+        """Вернуть закэшированный экран или отрисовать и сохранить новый."""
+
+        with self._lock:
+            entry = self._entries.get(screen_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(screen_id)
+                self._hits += 1
+                return entry[1]  # type: ignore[return-value]
+            self._misses += 1
+
+        value = render()
+        self.put(screen_id, version, value)
+        return value
+
+    def get(self, screen_id: str, version: int) -> object | None:
+        """Вернуть значение нужной версии или ``None`` при промахе.
+
+        Нужен, когда значение готовится асинхронно и не может быть
+        передано в :meth:`get_or_render` функцией отрисовки.
+        """
+
+        with self._lock:
+            entry = self._entries.get(screen_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(screen_id)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+            return None
+
+    def put(self, screen_id: str, version: int, value: object) -> None:
+        """Сохранить значение, вытеснив самые старые записи при переполнении."""
+
+        with self._lock:
+            self._entries[screen_id] = (version, value)
+            self._entries.move_to_end(screen_id)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *screen_ids: str) -> None:
+        """Удалить указанные экраны или очистить кэш целиком."""
+
+        with self._lock:
+            if not screen_ids:
+                self._entries.clear()
+                return
+            for screen_id in screen_ids:
+                self._entries.pop(screen_id, None)
+
+    def stats(self) -> RenderCacheStats:
+        """Текущие значения счётчиков."""
+
+        with self._lock:
+            return RenderCacheStats(hits=self._hits, misses=self._misses, size=len(self._entries))
+
+
+@lru_cache
+def get_render_cache() -> RenderCache:
+    """Получить общий кэш экранов."""
+
+    return RenderCache()
+
+
+__all__ = [
+    "RenderCache",
+    "RenderCacheStats",
+    "RenderedScreen",
+    "STATIC_SCREEN_VERSION",
+    "get_render_cache",
+]
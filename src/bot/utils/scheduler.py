@@ -1,21 +1,42 @@
-"""Планировщик фоновых задач для напоминаний."""
+"""Планировщик фоновых задач: напоминания и обновление каталога.
+
+Задачи выполняются в цикле событий бота: соединения asyncpg привязаны к
+циклу, в котором созданы, поэтому общий пул движка нельзя использовать из
+отдельных циклов в потоках.
+"""
 
 from __future__ import annotations
 
-import asyncio
 from datetime import datetime, timezone
 
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from bot.utils.logging import logger
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from bot.repository.db import AsyncSessionLocal
-from bot.repository.models import Reminder
+from bot.repository.models import Reminder, SubscriptionReminder
+from bot.services.calendar_sync import get_calendar_sync_service
+from bot.services.favorites_cache import get_favorites_cache
+from bot.services.material_links import check_material_links
+from bot.services.olympiad_service import get_olympiad_service
+from bot.services.recommendations_precompute import precompute_recommendations
+from bot.services.subscription_cache import get_subscription_cache
+from bot.services.subscription_expiry import sweep_subscriptions
+from bot.services.universities_service import get_universities_service
+from bot.utils.render_cache import get_render_cache
 
 
 _REMINDER_JOB_ID = "reminders:dispatch"
-_SCHEDULER: BackgroundScheduler | None = None
+_CATALOG_JOB_ID = "catalog:refresh"
+_CACHE_METRICS_JOB_ID = "caches:metrics"
+_FOLLOWERS_JOB_ID = "followers:flush"
+_RECOMMENDATIONS_JOB_ID = "recommendations:precompute"
+_MATERIAL_LINKS_JOB_ID = "materials:links"
+_SUBSCRIPTIONS_JOB_ID = "subscriptions:sweep"
+_CALENDAR_SYNC_JOB_ID = "calendar:sync"
+_SCHEDULER: AsyncIOScheduler | None = None
 
 
 async def _process_due_reminders() -> None:
@@ -31,8 +52,6 @@ async def _process_due_reminders() -> None:
                 )
             )
             reminders = result.scalars().all()
-            if not reminders:
-                return
 
             for reminder in reminders:
                 logger.info(
@@ -43,29 +62,140 @@ async def _process_due_reminders() -> None:
                 )
                 reminder.sent_at = now
 
+            renewal_users = (
+                await session.execute(
+                    update(SubscriptionReminder)
+                    .where(
+                        SubscriptionReminder.sent_at.is_(None),
+                        SubscriptionReminder.scheduled_at <= now,
+                    )
+                    .values(sent_at=now)
+                    .returning(SubscriptionReminder.user_id)
+                    .execution_options(synchronize_session=False)
+                )
+            ).scalars().all()
+            if renewal_users:
+                logger.info(
+                    "Отправляем напоминания о продлении подписки: {count}",
+                    count=len(renewal_users),
+                )
+
+
+async def _refresh_catalog() -> None:
+    """Перечитать каталог олимпиад и список ВУЗов при смене версии каталога.
+
+    Даты олимпиад могли измениться, поэтому подключённые календари
+    помечаются для сверки.
+    """
+
+    if await get_olympiad_service().reload_catalog():
+        await get_calendar_sync_service().request_sync_all()
+    await get_universities_service().reload()
+
+
+async def _flush_followers() -> None:
+    """Записать накопленные счётчики подписчиков и обновить рейтинг."""
+
+    flushed = await get_olympiad_service().refresh_popularity()
+    if flushed:
+        logger.info("Обновлены счётчики подписчиков: {count}", count=flushed)
+
 
-def _sync_process_due_reminders() -> None:
-    """Обёртка для запуска асинхронной задачи внутри APScheduler."""
+async def _push_calendars() -> None:
+    """Отправить изменения избранного в подключённые календари."""
 
-    asyncio.run(_process_due_reminders())
+    await get_calendar_sync_service().sync_due()
 
 
-def start_scheduler() -> BackgroundScheduler:
-    """Создать и запустить планировщик напоминаний."""
+def _log_cache_metrics() -> None:
+    """Записать в лог счётчики кэшей избранного, экранов и подписки."""
+
+    favorites = get_favorites_cache().stats()
+    screens = get_render_cache().stats()
+    subscriptions = get_subscription_cache().stats()
+    logger.info(
+        "Кэш избранного: {size} польз., hit rate {rate:.1%} ({hits}/{misses}),"
+        " истекло {expired}, вытеснено {evicted}; кэш экранов: {screens_size} шт.,"
+        " hit rate {screens_rate:.1%}; кэш подписки: {subs_size} польз.,"
+        " hit rate {subs_rate:.1%}",
+        size=favorites.size,
+        rate=favorites.hit_rate,
+        hits=favorites.hits,
+        misses=favorites.misses,
+        expired=favorites.expirations,
+        evicted=favorites.evictions,
+        screens_size=screens.size,
+        screens_rate=screens.hit_rate,
+        subs_size=subscriptions.size,
+        subs_rate=subscriptions.hit_rate,
+    )
+
+
+def start_scheduler() -> AsyncIOScheduler:
+    """Создать и запустить планировщик в текущем цикле событий."""
 
     global _SCHEDULER
 
     if _SCHEDULER and _SCHEDULER.running:
         return _SCHEDULER
 
-    scheduler = BackgroundScheduler(timezone=timezone.utc)
+    scheduler = AsyncIOScheduler(timezone=timezone.utc)
     scheduler.add_job(
-        _sync_process_due_reminders,
+        _process_due_reminders,
         trigger=IntervalTrigger(minutes=1),
         id=_REMINDER_JOB_ID,
         max_instances=1,
         replace_existing=True,
     )
+    scheduler.add_job(
+        _refresh_catalog,
+        trigger=IntervalTrigger(minutes=1),
+        id=_CATALOG_JOB_ID,
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        _flush_followers,
+        trigger=IntervalTrigger(minutes=1),
+        id=_FOLLOWERS_JOB_ID,
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        precompute_recommendations,
+        trigger=CronTrigger(hour=3, minute=0),
+        id=_RECOMMENDATIONS_JOB_ID,
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        check_material_links,
+        trigger=IntervalTrigger(minutes=30),
+        id=_MATERIAL_LINKS_JOB_ID,
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        sweep_subscriptions,
+        trigger=IntervalTrigger(minutes=10),
+        id=_SUBSCRIPTIONS_JOB_ID,
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        _push_calendars,
+        trigger=IntervalTrigger(minutes=1),
+        id=_CALENDAR_SYNC_JOB_ID,
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        _log_cache_metrics,
+        trigger=IntervalTrigger(minutes=10),
+        id=_CACHE_METRICS_JOB_ID,
+        max_instances=1,
+        replace_existing=True,
+    )
     scheduler.start()
     logger.info("Фоновый планировщик напоминаний запущен")
 
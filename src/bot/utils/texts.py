@@ -9,6 +9,7 @@ MAIN_MENU_CALENDAR = "📅 Синхронизация с календарем"
 MAIN_MENU_UNIVERSITIES = "🎓 ВУЗы и поступление"
 MAIN_MENU_SUBSCRIPTION = "💳 Моя подписка"
 MAIN_MENU_HELP = "❓ Помощь"
+MAIN_MENU_DEADLINES = "⏰ Ближайшие даты"
 
 MAIN_MENU_ITEMS: tuple[str, ...] = (
     MAIN_MENU_FAVORITES,
@@ -17,6 +18,7 @@ MAIN_MENU_ITEMS: tuple[str, ...] = (
     MAIN_MENU_UNIVERSITIES,
     MAIN_MENU_SUBSCRIPTION,
     MAIN_MENU_HELP,
+    MAIN_MENU_DEADLINES,
 )
 
 START_GREETING_LINES: tuple[str, ...] = (
@@ -30,6 +32,16 @@ CATALOG_HINT = (
     " Выберите предмет, изучите список и добавьте интересующие олимпиады в избранное."
 )
 
+CATALOG_MULTISELECT_HINT = (
+    "Режим выбора: отметьте олимпиады и нажмите «⭐ Добавить выбранные»."
+)
+
+CATALOG_POPULAR_TITLE = "🔥 Популярные олимпиады"
+
+CATALOG_POPULAR_EMPTY = (
+    "Пока никто не добавил олимпиады в избранное. Загляните сюда позже."
+)
+
 FAVORITES_HINT = (
     "Здесь отображаются олимпиады, которые вы отметили звездочкой."
     " Мы напомним о дедлайнах регистрации и датах туров."
@@ -45,6 +57,11 @@ UNIVERSITIES_HINT = (
     " Изучайте условия поступления и требования."
 )
 
+DEADLINES_HINT = (
+    "Окончания регистрации и даты туров на ближайшие дни."
+    " Переключайтесь между всем каталогом и своими олимпиадами."
+)
+
 SUBSCRIPTION_HINT = (
     "В разделе подписки можно управлять оплатой и тарифом."
     " Пока функция работает в режиме заглушки."
@@ -60,6 +77,8 @@ SUBSCRIPTION_ACTIVE_LINES: tuple[str, ...] = (
     "При необходимости вы можете повторно оформить подписку.",
 )
 
+SUBSCRIPTION_EXPIRES_LINE = "Подписка действует до {date:%d.%m.%Y}."
+
 SUBSCRIPTION_PAYMENT_PROMPT_LINES: tuple[str, ...] = (
     "Для оплаты воспользуйтесь ссылкой ниже (заглушка): {link}",
     "После успешной оплаты нажмите «Оплачено», чтобы активировать подписку.",
@@ -89,6 +108,8 @@ HELP_TEXT_LINES: tuple[str, ...] = (
     "Отправьте запрос вручную через кнопку «📚 Материалы для подготовки».",
     "🎓 ВУЗы и поступление → на основе избранных олимпиад покажем университеты с льготами и детальную "
     "информацию по факультетам.",
+    "⏰ Ближайшие даты → регистрации и туры на неделю, месяц или квартал вперёд по всему каталогу или "
+    "только по вашим олимпиадам. Команда /deadlines N покажет даты на N дней.",
 )
 
 # Подтверждения действий
@@ -97,11 +118,17 @@ CONFIRM_FAVORITE_ADDED = (
     " Мы пришлём напоминания о важных датах."
 )
 
+CONFIRM_FAVORITES_BULK_ADDED = (
+    "Добавлено олимпиад в ❤ Мои олимпиады: {count}."
+    " Мы пришлём напоминания о важных датах."
+)
+
 CONFIRM_FAVORITE_REMOVED = "Олимпиада удалена из избранного."
 
 CONFIRM_CALENDAR_SYNC = (
-    "Ссылка для синхронизации отправлена."
-    " Следуйте инструкции, чтобы добавить события в календарь."
+    "Откройте ссылку и разрешите доступ к Google Календарю."
+    " Избранные олимпиады появятся в календаре через несколько минут"
+    " и будут обновляться сами."
 )
 
 CONFIRM_SUBSCRIPTION_STUB = "Платёжная система пока недоступна. Мы сообщим, когда всё заработает."
@@ -0,0 +1,50 @@
+"""Нормализация ссылок для поиска дубликатов."""
+
+from __future__ import annotations
+
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# Параметры рекламных меток не влияют на содержимое страницы.
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = frozenset({"fbclid", "gclid", "yclid", "_openstat"})
+
+
+def normalize_url(url: str) -> str:
+    """Привести ссылку к каноническому виду.
+
+    Схема и хост приводятся к нижнему регистру, порт по умолчанию, якорь,
+    рекламные метки и завершающий ``/`` отбрасываются, параметры запроса
+    сортируются.
+    """
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    port = parts.port
+    netloc = host
+    if parts.username:
+        netloc = f"{parts.username}@{host}"
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+
+    path = parts.path.rstrip("/") or ("/" if not netloc else "")
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in _TRACKING_PARAMS
+            and not key.lower().startswith(_TRACKING_PREFIXES)
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def url_hash(url: str) -> str:
+    """SHA-1 нормализованной ссылки для уникального индекса."""
+
+    return hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+__all__ = ["normalize_url", "url_hash"]
@@ -0,0 +1,52 @@
+"""Раздача календарной ленты iCalendar."""
+
+from __future__ import annotations
+
+from aiohttp import web
+
+from bot.services.calendar_feed import get_calendar_feed_service
+from bot.services.calendar_tokens import get_calendar_token_service
+from bot.services.subscription_service import get_subscription_service
+
+FEED_CONTENT_TYPE = "text/calendar"
+# Календари опрашивают ленту раз в несколько минут; короткий max-age
+# экономит запросы, а ETag делает остальные проверки дешёвыми.
+FEED_CACHE_CONTROL = "private, max-age=300"
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Сравнить ETag с заголовком If-None-Match (RFC 9110, раздел 13.1.2)."""
+
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        # If-None-Match использует слабое сравнение: префикс W/ не учитывается.
+        if candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+async def handle_calendar_feed(request: web.Request) -> web.StreamResponse:
+    """Отдать ленту избранных олимпиад или 304, если она не менялась."""
+
+    tg_user_id = await get_calendar_token_service().resolve(request.match_info["token"])
+    if tg_user_id is None:
+        raise web.HTTPNotFound()
+    if not await get_subscription_service().is_subscribed(tg_user_id=tg_user_id):
+        raise web.HTTPForbidden(text="Подписка неактивна")
+
+    service = get_calendar_feed_service()
+    state = await service.get_state(tg_user_id=tg_user_id)
+    headers = {"ETag": state.etag, "Cache-Control": FEED_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("If-None-Match", ""), state.etag):
+        return web.Response(status=304, headers=headers)
+    return web.Response(
+        body=service.render(state),
+        content_type=FEED_CONTENT_TYPE,
+        charset="utf-8",
+        headers=headers,
+    )
+
+
+__all__ = ["handle_calendar_feed"]
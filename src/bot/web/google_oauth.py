@@ -0,0 +1,41 @@
+"""Возврат пользователя со страницы согласия Google."""
+
+from __future__ import annotations
+
+from aiohttp import web
+
+from bot.services.calendar_sync import get_calendar_sync_service
+from bot.utils.google_calendar import GoogleApiError
+from bot.utils.logging import logger
+
+CONNECTED_TEXT = (
+    "Google Календарь подключён. Избранные олимпиады появятся в нём через"
+    " несколько минут. Можно вернуться в Telegram."
+)
+
+
+async def handle_google_oauth_callback(request: web.Request) -> web.Response:
+    """Обменять код авторизации на токены и поставить первую синхронизацию."""
+
+    if "error" in request.query:
+        return web.Response(text="Доступ к календарю не выдан. Попробуйте ещё раз из бота.")
+    code = request.query.get("code")
+    state = request.query.get("state")
+    if not code or not state:
+        raise web.HTTPBadRequest(text="Не хватает параметров code и state")
+
+    service = get_calendar_sync_service()
+    try:
+        await service.connect(code=code, state=state)
+    except ValueError as exc:
+        raise web.HTTPBadRequest(text=f"Ссылка недействительна: {exc}") from None
+    except GoogleApiError as exc:
+        logger.warning("Google отклонил код авторизации: {error}", error=exc)
+        raise web.HTTPBadRequest(text="Google не подтвердил доступ. Попробуйте ещё раз.") from None
+    except Exception:
+        logger.exception("Не удалось подключить Google Календарь")
+        raise web.HTTPServiceUnavailable() from None
+    return web.Response(text=CONNECTED_TEXT)
+
+
+__all__ = ["handle_google_oauth_callback"]
@@ -0,0 +1,70 @@
+"""Webhook платёжного провайдера."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+
+from aiohttp import web
+
+from bot.config import get_config
+from bot.services.payments_service import get_payments_service, parse_payment_event
+from bot.utils.logging import logger
+
+SIGNATURE_HEADER = "X-Signature"
+MAX_BODY_SIZE = 16 * 1024
+
+
+def _signature_valid(body: bytes, signature: str, secret: str) -> bool:
+    """Сверить HMAC-SHA256 тела запроса с подписью провайдера."""
+
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+async def handle_payment_webhook(request: web.Request) -> web.Response:
+    """Принять уведомление об оплате и сразу ответить провайдеру.
+
+    Уведомление записывается в базу до ответа, чтобы провайдер повторил
+    доставку при сбое; активация подписки выполняется в фоне.
+    """
+
+    if request.content_length is not None and request.content_length > MAX_BODY_SIZE:
+        raise web.HTTPRequestEntityTooLarge(MAX_BODY_SIZE, request.content_length)
+    body = await request.read()
+
+    secret = get_config().pay_webhook_secret
+    if not secret:
+        # Без секрета любой мог бы выдать себе подписку: уведомления не принимаются.
+        logger.error("PAY_WEBHOOK_SECRET не задан, уведомление об оплате отклонено")
+        raise web.HTTPServiceUnavailable()
+    if not _signature_valid(body, request.headers.get(SIGNATURE_HEADER, ""), secret):
+        logger.warning("Отклонено уведомление об оплате с неверной подписью")
+        raise web.HTTPUnauthorized()
+
+    try:
+        payload = json.loads(body)
+        if not isinstance(payload, dict):
+            raise ValueError("ожидается JSON-объект")
+        event = parse_payment_event(payload)
+    except ValueError as exc:
+        raise web.HTTPBadRequest(text=str(exc)) from None
+
+    try:
+        changed = await get_payments_service().record_event(event)
+    except Exception:
+        logger.exception(
+            "Не удалось сохранить уведомление об оплате {payment_id}",
+            payment_id=event.provider_payment_id,
+        )
+        raise web.HTTPServiceUnavailable() from None
+
+    if not changed:
+        logger.debug(
+            "Повторное уведомление об оплате {payment_id}", payment_id=event.provider_payment_id
+        )
+    return web.json_response({"status": "ok"})
+
+
+__all__ = ["handle_payment_webhook"]
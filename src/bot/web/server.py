@@ -0,0 +1,75 @@
+"""Встроенный HTTP-сервер бота для входящих запросов внешних сервисов."""
+
+from __future__ import annotations
+
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+from bot.config import get_config
+from bot.services.calendar_feed import FEED_PATH_PREFIX, FEED_SUFFIX
+from bot.utils.logging import logger
+from bot.web.calendar import handle_calendar_feed
+from bot.web.google_oauth import handle_google_oauth_callback
+from bot.web.payments import MAX_BODY_SIZE, handle_payment_webhook
+
+_RUNNER: web.AppRunner | None = None
+
+
+def create_web_app() -> web.Application:
+    """Собрать приложение со всеми маршрутами."""
+
+    settings = get_config()
+    app = web.Application(client_max_size=MAX_BODY_SIZE)
+    # Провайдер присылает уведомления на путь из pay_return_url.
+    webhook_path = urlsplit(settings.pay_return_url).path or "/"
+    app.router.add_post(webhook_path, handle_payment_webhook)
+    if not settings.pay_webhook_secret:
+        logger.warning("PAY_WEBHOOK_SECRET не задан: уведомления об оплате будут отклоняться")
+    app.router.add_get(
+        f"{FEED_PATH_PREFIX}{{token}}{FEED_SUFFIX}", handle_calendar_feed, allow_head=True
+    )
+    # Google возвращает пользователя на путь из google_redirect_uri.
+    oauth_path = urlsplit(settings.google_redirect_uri).path or "/"
+    app.router.add_get(oauth_path, handle_google_oauth_callback)
+    return app
+
+
+async def start_web_server() -> web.AppRunner:
+    """Запустить HTTP-сервер в текущем цикле событий."""
+
+    global _RUNNER
+
+    if _RUNNER is not None:
+        return _RUNNER
+
+    settings = get_config()
+    runner = web.AppRunner(create_web_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, settings.web_host, settings.web_port).start()
+    logger.info(
+        "HTTP-сервер запущен на {host}:{port}", host=settings.web_host, port=settings.web_port
+    )
+
+    _RUNNER = runner
+    return runner
+
+
+async def shutdown_web_server() -> None:
+    """Остановить HTTP-сервер."""
+
+    global _RUNNER
+
+    if _RUNNER is None:
+        return
+
+    await _RUNNER.cleanup()
+    _RUNNER = None
+    logger.info("HTTP-сервер остановлен")
+
+
+__all__ = [
+    "create_web_app",
+    "shutdown_web_server",
+    "start_web_server",
+]
@@ -0,0 +1,390 @@
+"""Синхронизация с Google Календарём против локальной заглушки Google API."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+import pytest
+from aiohttp import web
+from sqlalchemy import select
+
+from bot.config import get_config
+from bot.repository.models import CalendarAccount, CalendarPushedEvent, User
+from bot.services.calendar_sync import (
+    BACKOFF_MAX_SECONDS,
+    AccountOutcome,
+    CalendarSyncService,
+    PushedEvent,
+    backoff_delay,
+    content_hash,
+    diff_events,
+    remote_event_id,
+)
+from bot.utils.google_calendar import (
+    EventOperation,
+    GoogleApiError,
+    OperationResult,
+    _build_batch_body,
+    _parse_batch_response,
+)
+from bot.utils.link_checker import HostRateLimiter
+
+from conftest import database, local_server
+
+RESPONSE_BOUNDARY = "batch_response_1"
+
+
+def _body(summary: str) -> dict[str, Any]:
+    return {"summary": summary, "start": {"date": "2026-11-01"}, "end": {"date": "2026-11-02"}}
+
+
+def _split_batch(text: str, content_type: str) -> list[tuple[str, str, str]]:
+    """Разобрать пакетный запрос на (ключ, строка запроса, тело)."""
+
+    boundary = content_type.split("boundary=", 1)[1]
+    requests: list[tuple[str, str, str]] = []
+    for part in text.split(f"--{boundary}"):
+        part = part.strip()
+        if not part or part == "--":
+            continue
+        headers, _, inner = part.partition("\r\n\r\n")
+        key = next(
+            line.split(":", 1)[1].strip().strip("<>")
+            for line in headers.split("\r\n")
+            if line.lower().startswith("content-id:")
+        )
+        request_line, _, rest = inner.partition("\r\n")
+        body = rest.partition("\r\n\r\n")[2].strip()
+        requests.append((key, request_line, body))
+    return requests
+
+
+def _batch_response(statuses: dict[str, int]) -> str:
+    parts = [
+        "\r\n".join(
+            (
+                f"--{RESPONSE_BOUNDARY}",
+                "Content-Type: application/http",
+                f"Content-ID: <response-{key}>",
+                "",
+                f"HTTP/1.1 {status} Status",
+                "Content-Type: application/json; charset=UTF-8",
+                "",
+                "{}",
+                "",
+            )
+        )
+        for key, status in statuses.items()
+    ]
+    return "".join(parts) + f"--{RESPONSE_BOUNDARY}--\r\n"
+
+
+class GoogleStub:
+    """Заглушка OAuth и пакетного эндпоинта Calendar API."""
+
+    def __init__(
+        self,
+        statuses: dict[str, int] | None = None,
+        *,
+        token_status: int = 200,
+        token_payload: dict[str, Any] | None = None,
+    ) -> None:
+        self.statuses = statuses or {}
+        self.token_status = token_status
+        self.token_payload = (
+            {"access_token": "fresh-token", "expires_in": 3600}
+            if token_payload is None
+            else token_payload
+        )
+        self.token_forms: list[dict[str, str]] = []
+        self.batches: list[list[tuple[str, str, str]]] = []
+
+    def app(self) -> web.Application:
+        async def token(request: web.Request) -> web.Response:
+            self.token_forms.append(dict(await request.post()))
+            return web.json_response(self.token_payload, status=self.token_status)
+
+        async def batch(request: web.Request) -> web.Response:
+            assert request.headers["Authorization"] == "Bearer fresh-token"
+            requests = _split_batch(await request.text(), request.headers["Content-Type"])
+            self.batches.append(requests)
+            text = _batch_response({key: self.statuses.get(key, 200) for key, _, _ in requests})
+            return web.Response(
+                text=text,
+                headers={"Content-Type": f'multipart/mixed; boundary="{RESPONSE_BOUNDARY}"'},
+            )
+
+        app = web.Application()
+        app.router.add_post("/token", token)
+        app.router.add_post("/batch/calendar/v3", batch)
+        return app
+
+
+def _account(account_id: int = 1, **fields: Any) -> SimpleNamespace:
+    values: dict[str, Any] = {
+        "id": account_id,
+        "calendar_id": "primary",
+        "refresh_token": "refresh",
+        "access_token": None,
+        "access_token_expires_at": None,
+        "sync_requested_at": None,
+        "failures": 0,
+    }
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+@pytest.fixture
+def service() -> CalendarSyncService:
+    return CalendarSyncService(olympiad_service=SimpleNamespace())
+
+
+async def _sync_with_stub(
+    service: CalendarSyncService,
+    stub: GoogleStub,
+    account: SimpleNamespace,
+    desired: dict[str, dict[str, Any]],
+    pushed: dict[str, PushedEvent],
+) -> AccountOutcome:
+    settings = get_config()
+    async with local_server(stub.app()) as server:
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(settings, "google_token_url", str(server.make_url("/token")))
+            patch.setattr(settings, "google_api_base_url", str(server.make_url("/")))
+            async with aiohttp.ClientSession() as http:
+                return await service._sync_account(
+                    service._client(http), HostRateLimiter(0), account, desired, pushed
+                )
+
+
+def test_batch_body_round_trip() -> None:
+    operations = [
+        EventOperation("new", "insert", "id1", {"id": "id1", "summary": "Олимпиада"}),
+        EventOperation("changed", "update", "id2", {"summary": "Другая"}),
+        EventOperation("old", "delete", "id3"),
+    ]
+    body = _build_batch_body("b", "user@example.com", operations)
+    requests = _split_batch(body, "multipart/mixed; boundary=b")
+
+    path = "/calendar/v3/calendars/user%40example.com/events"
+    assert [(key, line) for key, line, _ in requests] == [
+        ("new", f"POST {path} HTTP/1.1"),
+        ("changed", f"PUT {path}/id2 HTTP/1.1"),
+        ("old", f"DELETE {path}/id3 HTTP/1.1"),
+    ]
+    assert json.loads(requests[0][2]) == {"id": "id1", "summary": "Олимпиада"}
+    assert requests[2][2] == ""
+
+    statuses = {"new": 409, "changed": 200, "old": 404}
+    parsed = _parse_batch_response(
+        _batch_response(statuses), f'multipart/mixed; boundary="{RESPONSE_BOUNDARY}"'
+    )
+    assert parsed == statuses
+
+
+def test_batch_response_without_boundary_is_rejected() -> None:
+    with pytest.raises(GoogleApiError) as error:
+        _parse_batch_response("", "multipart/mixed")
+    assert error.value.status == 502
+
+
+def test_diff_events_insert_update_delete() -> None:
+    desired = {"same": _body("A"), "changed": _body("B2"), "new": _body("C")}
+    pushed = {
+        "same": PushedEvent("remote-same", content_hash(_body("A"))),
+        "changed": PushedEvent("remote-changed", content_hash(_body("B"))),
+        "unknown": PushedEvent("remote-unknown", None),
+        "gone": PushedEvent("remote-gone", content_hash(_body("D"))),
+    }
+
+    operations = {op.key: op for op in diff_events(7, desired, pushed)}
+
+    assert set(operations) == {"changed", "new", "unknown", "gone"}
+    new_id = remote_event_id(7, "new")
+    assert operations["new"] == EventOperation(
+        "new", "insert", new_id, {**_body("C"), "id": new_id}
+    )
+    assert operations["changed"] == EventOperation(
+        "changed", "update", "remote-changed", _body("B2")
+    )
+    assert operations["unknown"].operation == "delete"
+    assert operations["gone"] == EventOperation("gone", "delete", "remote-gone")
+
+
+def test_backoff_delay_grows_and_is_capped() -> None:
+    for _ in range(50):
+        assert timedelta(seconds=30) <= backoff_delay(1) <= timedelta(seconds=60)
+        assert backoff_delay(0) <= timedelta(seconds=60)
+        assert timedelta(seconds=120) <= backoff_delay(3) <= timedelta(seconds=240)
+        capped = backoff_delay(100)
+        assert timedelta(seconds=BACKOFF_MAX_SECONDS / 2) <= capped
+        assert capped <= timedelta(seconds=BACKOFF_MAX_SECONDS)
+
+
+def test_sync_account_sends_changes_and_stops_on_429(service: CalendarSyncService) -> None:
+    stub = GoogleStub({"dup": 409, "gone": 404, "later": 429})
+    desired = {"dup": _body("A"), "upd": _body("B2"), "gone": _body("C2"), "later": _body("E")}
+    pushed = {
+        "upd": PushedEvent("remote-upd", content_hash(_body("B"))),
+        "gone": PushedEvent("remote-gone", content_hash(_body("C"))),
+        "del": PushedEvent("remote-del", None),
+    }
+
+    outcome = asyncio.run(_sync_with_stub(service, stub, _account(), desired, pushed))
+
+    assert stub.token_forms == [
+        {
+            "grant_type": "refresh_token",
+            "refresh_token": "refresh",
+            "client_id": "client-id",
+            "client_secret": "client-secret",
+        }
+    ]
+    assert len(stub.batches) == 1
+    assert {result.key: result.status for _, result in outcome.results} == {
+        "dup": 409,
+        "upd": 200,
+        "gone": 404,
+        "later": 429,
+        "del": 200,
+    }
+    assert outcome.retry is True
+    assert outcome.revoked is False
+    assert outcome.access_token == "fresh-token"
+    assert outcome.access_token_expires_at is not None
+
+
+def test_sync_account_reuses_valid_token(service: CalendarSyncService) -> None:
+    stub = GoogleStub()
+    account = _account(
+        access_token="fresh-token",
+        access_token_expires_at=datetime.now(tz=timezone.utc) + timedelta(hours=1),
+    )
+
+    outcome = asyncio.run(_sync_with_stub(service, stub, account, {"new": _body("A")}, {}))
+
+    assert stub.token_forms == []
+    assert [result.status for _, result in outcome.results] == [200]
+    assert outcome.retry is False
+    assert outcome.access_token is None
+
+
+def test_sync_account_marks_revoked_grant(service: CalendarSyncService) -> None:
+    stub = GoogleStub(token_status=400, token_payload={"error": "invalid_grant"})
+
+    outcome = asyncio.run(_sync_with_stub(service, stub, _account(), {"new": _body("A")}, {}))
+
+    assert outcome.revoked is True
+    assert outcome.retry is False
+    assert stub.batches == []
+
+
+def test_token_response_without_access_token_is_retried(
+    service: CalendarSyncService,
+) -> None:
+    stub = GoogleStub(token_payload={"token_type": "Bearer"})
+
+    outcome = asyncio.run(_sync_with_stub(service, stub, _account(), {"new": _body("A")}, {}))
+
+    assert outcome.retry is True
+    assert outcome.revoked is False
+    assert stub.batches == []
+
+
+# Ниже — проверки записи итогов в PostgreSQL; без TEST_DATABASE_URL они пропускаются.
+
+
+async def _create_account(session_factory: Any, pushed: dict[str, PushedEvent]) -> SimpleNamespace:
+    requested_at = datetime.now(tz=timezone.utc) - timedelta(minutes=5)
+    async with session_factory() as session:
+        async with session.begin():
+            user = User(tg_id=100)
+            session.add(user)
+            await session.flush()
+            account = CalendarAccount(
+                user_id=user.id,
+                refresh_token="refresh",
+                sync_requested_at=requested_at,
+                failures=2,
+            )
+            session.add(account)
+            await session.flush()
+            session.add_all(
+                CalendarPushedEvent(
+                    account_id=account.id,
+                    event_key=key,
+                    remote_event_id=record.remote_event_id,
+                    content_hash=record.content_hash,
+                )
+                for key, record in pushed.items()
+            )
+    return _account(account.id, sync_requested_at=requested_at, failures=2)
+
+
+async def _stored(session_factory: Any, account_id: int) -> tuple[Any, dict[str, str | None]]:
+    async with session_factory() as session:
+        account = await session.get(CalendarAccount, account_id)
+        rows = await session.execute(
+            select(CalendarPushedEvent.event_key, CalendarPushedEvent.content_hash).where(
+                CalendarPushedEvent.account_id == account_id
+            )
+        )
+        return account, dict(rows.all())
+
+
+def test_store_outcome_applies_batch_statuses(
+    database_url: str, service: CalendarSyncService
+) -> None:
+    stub = GoogleStub({"dup": 409, "gone": 404, "later": 429})
+    desired = {"dup": _body("A"), "upd": _body("B2"), "gone": _body("C2"), "later": _body("E")}
+    pushed = {
+        "upd": PushedEvent("remote-upd", content_hash(_body("B"))),
+        "gone": PushedEvent("remote-gone", content_hash(_body("C"))),
+        "del": PushedEvent("remote-del", None),
+    }
+
+    async def scenario() -> None:
+        async with database(database_url) as session_factory:
+            service._session_factory = session_factory
+            account = await _create_account(session_factory, pushed)
+            outcome = await _sync_with_stub(service, stub, account, desired, pushed)
+            await service._store_outcome(account, outcome)
+
+            stored, events = await _stored(session_factory, account.id)
+            # 409 — событие уже в календаре, хэш неизвестен; 404 и удаление снимают
+            # запись; 429 не записывается и откладывает аккаунт.
+            assert events == {"dup": None, "upd": content_hash(_body("B2"))}
+            assert stored.failures == 3
+            now = datetime.now(tz=timezone.utc)
+            assert now + timedelta(seconds=100) < stored.next_attempt_at
+            assert stored.next_attempt_at < now + timedelta(seconds=250)
+            assert stored.sync_requested_at == account.sync_requested_at
+            assert stored.access_token == "fresh-token"
+
+    asyncio.run(scenario())
+
+
+def test_store_outcome_clears_request_after_success(
+    database_url: str, service: CalendarSyncService
+) -> None:
+    async def scenario() -> None:
+        async with database(database_url) as session_factory:
+            service._session_factory = session_factory
+            account = await _create_account(session_factory, {})
+            operation = EventOperation("new", "insert", "id1", {**_body("A"), "id": "id1"})
+            outcome = AccountOutcome(results=[(operation, OperationResult("new", 200))])
+            await service._store_outcome(account, outcome)
+
+            stored, events = await _stored(session_factory, account.id)
+            assert events == {"new": content_hash(_body("A"))}
+            assert stored.failures == 0
+            assert stored.next_attempt_at is None
+            assert stored.sync_requested_at is None
+            assert stored.last_synced_at is not None
+
+    asyncio.run(scenario())
@@ -0,0 +1,69 @@
+"""Демо-каталог: переключение на импортированный и демо-подборки материалов."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import replace
+
+import pytest
+from sqlalchemy import func, update
+
+from bot.repository.models import CatalogState
+from bot.services import olympiad_service as olympiad_module
+from bot.services.materials_service import DEMO_MATERIALS, MaterialsBundle, MaterialsService
+from bot.services.olympiad_service import DEMO_OLYMPIADS, OlympiadService
+
+from conftest import database
+
+
+def test_favourited_demo_olympiads_do_not_replace_catalog(database_url: str) -> None:
+    async def scenario() -> None:
+        async with database(database_url) as session_factory:
+            service = OlympiadService(session_factory)
+            async with session_factory() as session:
+                async with session.begin():
+                    session.add(CatalogState(id=1, version=1))
+                    # Так избранное сохраняет демо-олимпиады до импорта каталога.
+                    await service._ensure_olympiads(session, DEMO_OLYMPIADS[:1])
+
+            assert await service.reload_catalog() is False
+            assert len(service.snapshot.olympiads_by_id) == len(DEMO_OLYMPIADS)
+
+            async with session_factory() as session:
+                async with session.begin():
+                    await session.execute(
+                        update(CatalogState).values(version=2, imported_at=func.now())
+                    )
+
+            assert await service.reload_catalog() is True
+            assert service.snapshot.version == 2
+            assert list(service.snapshot.olympiads_by_id) == [DEMO_OLYMPIADS[0].id]
+
+    asyncio.run(scenario())
+
+
+def test_first_favourite_seeds_demo_materials(
+    database_url: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def scenario() -> None:
+        async with database(database_url) as session_factory:
+            service = OlympiadService(session_factory)
+            materials = MaterialsService(session_factory)
+            monkeypatch.setattr(olympiad_module, "get_materials_service", lambda: materials)
+            imported = replace(DEMO_OLYMPIADS[1], title="Импортированная олимпиада")
+            async with session_factory() as session:
+                async with session.begin():
+                    seeded = await service._ensure_olympiads(
+                        session, [DEMO_OLYMPIADS[0], imported]
+                    )
+                    again = await service._ensure_olympiads(session, DEMO_OLYMPIADS[:1])
+
+            assert seeded == (DEMO_OLYMPIADS[0].id,)
+            assert again == ()
+            bundle = await materials.get_materials(DEMO_OLYMPIADS[0].id)
+            expected = [item for item in DEMO_MATERIALS if item.olympiad_id == 1]
+            links = bundle.past_problems + bundle.theory + bundle.articles
+            assert [link.title for link in links] == [item.title for item in expected]
+            assert await materials.get_materials(imported.id) == MaterialsBundle()
+
+    asyncio.run(scenario())
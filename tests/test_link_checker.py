@@ -0,0 +1,169 @@
+"""Проверка ссылок материалов против локального HTTP-сервера."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import aiohttp
+from aiohttp import web
+
+from bot.repository.models import LinkStatus
+from bot.services.material_links import BROKEN_AFTER_FAILURES, _apply_result
+from bot.utils.link_checker import HostRateLimiter, LinkChecker, LinkCheckResult
+
+from conftest import local_server
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Oct 2026 00:00:00 GMT"
+
+
+def _build_app(log: list[tuple[str, str, float]]) -> web.Application:
+    async def handler(request: web.Request) -> web.Response:
+        name = request.match_info["name"]
+        log.append((request.method, name, time.monotonic()))
+        if name == "no-head" and request.method == "HEAD":
+            return web.Response(status=405)
+        if name == "cached":
+            if (
+                request.headers.get("If-None-Match") == ETAG
+                or request.headers.get("If-Modified-Since") == LAST_MODIFIED
+            ):
+                return web.Response(status=304)
+            return web.Response(headers={"ETag": ETAG, "Last-Modified": LAST_MODIFIED})
+        if name.isdigit():
+            return web.Response(status=int(name))
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_route("*", "/{name}", handler)
+    return app
+
+
+async def _check(
+    url_path: str, *, host_interval: float = 0.0, **validators: str
+) -> tuple[LinkCheckResult, list[tuple[str, str, float]]]:
+    log: list[tuple[str, str, float]] = []
+    async with local_server(_build_app(log)) as server:
+        async with aiohttp.ClientSession() as http:
+            checker = LinkChecker(http, concurrency=4, host_interval=host_interval)
+            result = await checker.check(str(server.make_url(url_path)), **validators)
+    return result, log
+
+
+def test_head_falls_back_to_get() -> None:
+    result, log = asyncio.run(_check("/no-head"))
+
+    assert result.reachable is True
+    assert result.http_status == 200
+    assert [method for method, _, _ in log] == ["HEAD", "GET"]
+
+
+def test_conditional_request_with_etag_returns_not_modified() -> None:
+    result, _ = asyncio.run(_check("/cached", etag=ETAG))
+
+    assert result == LinkCheckResult(reachable=True, http_status=304, not_modified=True)
+
+
+def test_conditional_request_with_last_modified_returns_not_modified() -> None:
+    result, _ = asyncio.run(_check("/cached", last_modified=LAST_MODIFIED))
+
+    assert result.not_modified is True
+
+
+def test_fresh_response_keeps_validators() -> None:
+    result, _ = asyncio.run(_check("/cached"))
+
+    assert result.not_modified is False
+    assert (result.etag, result.last_modified) == (ETAG, LAST_MODIFIED)
+
+
+def test_client_errors_are_broken_and_throttling_is_transient() -> None:
+    expected = {"404": False, "410": False, "429": None, "403": None, "503": None}
+    for status, reachable in expected.items():
+        result, _ = asyncio.run(_check(f"/{status}"))
+        assert result.reachable is reachable, status
+        assert result.http_status == int(status)
+
+
+def test_connection_error_is_transient() -> None:
+    async def scenario() -> LinkCheckResult:
+        async with aiohttp.ClientSession() as http:
+            checker = LinkChecker(http, concurrency=1, host_interval=0)
+            # Порт 9 (discard) на localhost обычно закрыт.
+            return await checker.check("http://127.0.0.1:9/")
+
+    assert asyncio.run(scenario()) == LinkCheckResult(reachable=None)
+
+
+def test_requests_to_one_host_are_spaced() -> None:
+    interval = 0.2
+
+    async def scenario() -> list[float]:
+        log: list[tuple[str, str, float]] = []
+        async with local_server(_build_app(log)) as server:
+            async with aiohttp.ClientSession() as http:
+                checker = LinkChecker(http, concurrency=4, host_interval=interval)
+                await asyncio.gather(
+                    *(checker.check(str(server.make_url(f"/page{i}"))) for i in range(3))
+                )
+        return sorted(at for _, _, at in log)
+
+    arrivals = asyncio.run(scenario())
+    gaps = [later - earlier for earlier, later in zip(arrivals, arrivals[1:])]
+    assert len(arrivals) == 3
+    assert all(gap >= interval * 0.9 for gap in gaps), gaps
+
+
+def test_rate_limiter_does_not_delay_other_hosts() -> None:
+    async def scenario() -> float:
+        limiter = HostRateLimiter(1.0)
+        await limiter.wait("a.example")
+        started = time.monotonic()
+        await limiter.wait("b.example")
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 0.1
+
+
+def _row(failures: int = 0, status: LinkStatus = LinkStatus.OK) -> SimpleNamespace:
+    return SimpleNamespace(id=1, link_failures=failures, link_status=status)
+
+
+NOW = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+
+def test_transient_failures_mark_link_broken_after_threshold() -> None:
+    row = _row()
+    for attempt in range(1, BROKEN_AFTER_FAILURES + 1):
+        values = _apply_result(row, LinkCheckResult(reachable=None, http_status=503), NOW)
+        assert values["link_failures"] == attempt
+        row = _row(values["link_failures"], values["link_status"])
+        expected = LinkStatus.BROKEN if attempt >= BROKEN_AFTER_FAILURES else LinkStatus.OK
+        assert row.link_status is expected
+
+
+def test_definite_failure_marks_link_broken_at_once() -> None:
+    values = _apply_result(_row(), LinkCheckResult(reachable=False, http_status=404), NOW)
+
+    assert values["link_status"] is LinkStatus.BROKEN
+    assert values["link_failures"] == 1
+
+
+def test_success_resets_failures_and_not_modified_keeps_validators() -> None:
+    fresh = _apply_result(
+        _row(2, LinkStatus.BROKEN),
+        LinkCheckResult(reachable=True, http_status=200, etag=ETAG),
+        NOW,
+    )
+    cached = _apply_result(
+        _row(2), LinkCheckResult(reachable=True, http_status=304, not_modified=True), NOW
+    )
+
+    assert fresh["link_status"] is LinkStatus.OK
+    assert fresh["link_failures"] == 0
+    assert fresh["link_etag"] == ETAG
+    assert cached["link_failures"] == 0
+    assert "link_etag" not in cached
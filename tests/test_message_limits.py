@@ -0,0 +1,105 @@
+"""Экраны бота укладываются в лимит длины сообщения Telegram."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from bot.handlers.user.catalog import MULTISELECT_SUFFIX, _render_subject_pages
+from bot.handlers.user.deadlines import (
+    MAX_EVENTS_SHOWN,
+    MESSAGE_TEXT_LIMIT,
+    _format_deadlines_text,
+)
+from bot.handlers.user.materials import _format_materials_text
+from bot.services.materials_service import MaterialLink, MaterialsBundle
+from bot.services.olympiad_service import CatalogEvent, OlympiadInfo
+
+# Название на пределе колонки; после экранирования «&» оно заметно длиннее.
+LONG_TITLE = ("Олимпиада & турнир " * 14)[:255]
+
+
+def _events(count: int) -> list[CatalogEvent]:
+    start = date(2026, 11, 1)
+    return [
+        CatalogEvent(
+            day=start + timedelta(days=index),
+            kind="round",
+            olympiad=OlympiadInfo(id=index, subject_code="math", title=LONG_TITLE),
+        )
+        for index in range(count)
+    ]
+
+
+def test_deadlines_with_long_titles_fit_message() -> None:
+    events = _events(MAX_EVENTS_SHOWN + 5)
+
+    text = _format_deadlines_text(events, scope="all", days=365)
+
+    assert len(text) <= MESSAGE_TEXT_LIMIT
+    shown = text.count("• ")
+    assert 0 < shown < MAX_EVENTS_SHOWN
+    assert text.endswith(
+        f"И ещё {len(events) - shown}. Сократите период, чтобы увидеть все даты."
+    )
+
+
+def test_short_deadlines_are_listed_in_full() -> None:
+    events = [
+        CatalogEvent(day=event.day, kind=event.kind, olympiad=OlympiadInfo(1, "math", "ВсОШ"))
+        for event in _events(3)
+    ]
+
+    text = _format_deadlines_text(events, scope="fav", days=30)
+
+    assert text.count("• ") == 3
+    assert "И ещё" not in text
+
+
+def test_materials_of_a_whole_season_fit_message() -> None:
+    def links(prefix: str, count: int) -> tuple[MaterialLink, ...]:
+        return tuple(
+            MaterialLink(
+                title=f"{prefix} {index}: " + "задачи & решения " * 12,
+                url=f"https://example.org/{prefix}/{index}?a=1&b=2&" + "x" * 200,
+            )
+            for index in range(count)
+        )
+
+    bundle = MaterialsBundle(past_problems=links("past", 30), additional=links("extra", 3))
+
+    text = _format_materials_text(LONG_TITLE, bundle)
+
+    assert len(text) <= MESSAGE_TEXT_LIMIT
+    assert "• …и ещё" in text
+    # Пустые разделы и дополнительные материалы не вытесняются длинным разделом.
+    assert text.count("• материалы появятся позже") == 2
+    assert "extra 0" in text
+    assert text.endswith("и мы добавим новые материалы вручную.")
+
+
+def test_small_materials_bundle_is_shown_in_full() -> None:
+    bundle = MaterialsBundle(theory=(MaterialLink("Теория", "https://example.org/t"),))
+
+    text = _format_materials_text("ВсОШ", bundle)
+
+    assert "• Теория — https://example.org/t" in text
+    assert "и ещё" not in text
+
+
+def test_full_catalog_page_fits_with_multiselect_hint() -> None:
+    # Размер записей подобран так, что страница заполняется почти до лимита.
+    olympiads = [
+        OlympiadInfo(
+            id=index,
+            subject_code="math",
+            title="Олимпиада " + "и" * 204,
+            description="Описание " * 30,
+        )
+        for index in range(40)
+    ]
+
+    pages = _render_subject_pages("math", "Математика", olympiads)
+
+    assert len(pages) > 1
+    for page in pages:
+        assert len(page.screen.text + MULTISELECT_SUFFIX) <= MESSAGE_TEXT_LIMIT
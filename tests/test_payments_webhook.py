@@ -0,0 +1,227 @@
+"""Webhook платёжного провайдера и пакетная активация подписок."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import aiohttp
+import pytest
+from sqlalchemy import select
+
+from bot.config import get_config
+from bot.repository.models import PaymentStub, User
+from bot.services.payments_service import PaymentEvent, PaymentsService
+from bot.services.subscription_cache import SubscriptionCache
+from bot.web import payments as payments_web
+from bot.web.payments import SIGNATURE_HEADER
+from bot.web.server import create_web_app
+
+from conftest import database, local_server
+
+WEBHOOK_PATH = "/pay/return"
+
+
+def _sign(body: bytes, secret: str | None = None) -> str:
+    key = (secret or get_config().pay_webhook_secret or "").encode()
+    return hmac.new(key, body, hashlib.sha256).hexdigest()
+
+
+async def _post(server: Any, payload: dict[str, Any], *, signed: bool = True) -> int:
+    body = json.dumps(payload).encode()
+    headers = {"Content-Type": "application/json"}
+    if signed:
+        headers[SIGNATURE_HEADER] = _sign(body)
+    async with aiohttp.ClientSession() as http:
+        async with http.post(server.make_url(WEBHOOK_PATH), data=body, headers=headers) as resp:
+            return resp.status
+
+
+class RecordingPayments:
+    """Сервис платежей, запоминающий принятые уведомления."""
+
+    def __init__(self) -> None:
+        self.events: list[PaymentEvent] = []
+
+    async def record_event(self, event: PaymentEvent) -> bool:
+        self.events.append(event)
+        return True
+
+
+@pytest.fixture
+def recording(monkeypatch: pytest.MonkeyPatch) -> RecordingPayments:
+    service = RecordingPayments()
+    monkeypatch.setattr(payments_web, "get_payments_service", lambda: service)
+    return service
+
+
+def _deliver(*payloads: dict[str, Any], signed: bool = True) -> list[int]:
+    async def scenario() -> list[int]:
+        async with local_server(create_web_app()) as server:
+            return [await _post(server, payload, signed=signed) for payload in payloads]
+
+    return asyncio.run(scenario())
+
+
+PAID = {"payment_id": "pay-1", "user": 42, "status": "succeeded"}
+
+
+def test_signed_notification_is_accepted(recording: RecordingPayments) -> None:
+    assert _deliver(PAID) == [200]
+    assert recording.events == [PaymentEvent("pay-1", 42, "succeeded")]
+
+
+def test_unsigned_notification_is_rejected(recording: RecordingPayments) -> None:
+    assert _deliver(PAID, signed=False) == [401]
+    assert recording.events == []
+
+
+def test_notifications_are_rejected_without_secret(
+    recording: RecordingPayments, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(get_config(), "pay_webhook_secret", None)
+
+    assert _deliver(PAID, signed=False) == [503]
+    assert recording.events == []
+
+
+def test_malformed_payload_is_rejected(recording: RecordingPayments) -> None:
+    assert _deliver({"payment_id": "pay-1", "user": "x", "status": "succeeded"}) == [400]
+    assert _deliver({"payment_id": "pay-1", "user": 42, "status": "refunded"}) == [400]
+    assert recording.events == []
+
+
+# Ниже — проверки записи в PostgreSQL; без TEST_DATABASE_URL они пропускаются.
+
+
+def _run_with_service(database_url: str, monkeypatch: pytest.MonkeyPatch, scenario: Any) -> Any:
+    async def wrapper() -> Any:
+        async with database(database_url) as session_factory:
+            service = PaymentsService(
+                session_factory, SubscriptionCache(), batch_window=0.05
+            )
+            monkeypatch.setattr(payments_web, "get_payments_service", lambda: service)
+            async with local_server(create_web_app()) as server:
+                return await scenario(server, service, session_factory)
+
+    return asyncio.run(wrapper())
+
+
+async def _drain(service: PaymentsService) -> int:
+    """Обработать всё, что стоит в очереди активаций; вернуть число платежей."""
+
+    activated = 0
+    while not service._queue.empty():
+        batch = await service._next_batch()
+        await service._activate(batch)
+        activated += len(batch)
+    return activated
+
+
+async def _user(session_factory: Any, tg_id: int) -> User:
+    async with session_factory() as session:
+        return (await session.execute(select(User).where(User.tg_id == tg_id))).scalar_one()
+
+
+def _assert_close(actual: datetime | None, expected: datetime) -> None:
+    assert actual is not None
+    assert abs(actual - expected) < timedelta(minutes=1), (actual, expected)
+
+
+def test_duplicate_delivery_activates_once(
+    database_url: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def scenario(server: Any, service: PaymentsService, session_factory: Any) -> None:
+        assert [await _post(server, PAID) for _ in range(3)] == [200, 200, 200]
+        assert await _drain(service) == 1
+
+        user = await _user(session_factory, 42)
+        period = timedelta(days=get_config().subscription_period_days)
+        assert user.is_subscribed
+        _assert_close(user.subscription_expires_at, datetime.now(tz=timezone.utc) + period)
+        async with session_factory() as session:
+            payments = (await session.execute(select(PaymentStub))).scalars().all()
+        assert [(p.provider_payment_id, p.status) for p in payments] == [("pay-1", "succeeded")]
+        assert payments[0].processed_at is not None
+
+    _run_with_service(database_url, monkeypatch, scenario)
+
+
+def test_late_pending_does_not_revert_succeeded(
+    database_url: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def scenario(server: Any, service: PaymentsService, session_factory: Any) -> None:
+        await _post(server, PAID)
+        assert await _post(server, {**PAID, "status": "pending"}) == 200
+        assert await _post(server, {**PAID, "status": "canceled"}) == 200
+        assert service._queue.qsize() == 1
+
+        async with session_factory() as session:
+            status = await session.scalar(select(PaymentStub.status))
+        assert status == "succeeded"
+
+    _run_with_service(database_url, monkeypatch, scenario)
+
+
+def test_batch_extends_expiry_by_number_of_payments(
+    database_url: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def scenario(server: Any, service: PaymentsService, session_factory: Any) -> None:
+        # Сначала pending, затем оплата: активирует только succeeded.
+        await _post(server, {"payment_id": "pay-0", "user": 7, "status": "pending"})
+        for index in range(1, 4):
+            await _post(server, {"payment_id": f"pay-{index}", "user": 7, "status": "succeeded"})
+        await _post(server, {"payment_id": "other", "user": 8, "status": "succeeded"})
+        assert service._queue.qsize() == 4
+
+        batch = await service._next_batch()
+        assert len(batch) == 4
+        await service._activate(batch)
+
+        period = timedelta(days=get_config().subscription_period_days)
+        now = datetime.now(tz=timezone.utc)
+        _assert_close((await _user(session_factory, 7)).subscription_expires_at, now + 3 * period)
+        _assert_close((await _user(session_factory, 8)).subscription_expires_at, now + period)
+
+    _run_with_service(database_url, monkeypatch, scenario)
+
+
+def test_activation_extends_remaining_term(
+    database_url: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def scenario(server: Any, service: PaymentsService, session_factory: Any) -> None:
+        await _post(server, PAID)
+        await _drain(service)
+        first = (await _user(session_factory, 42)).subscription_expires_at
+        await _post(server, {**PAID, "payment_id": "pay-2"})
+        await _drain(service)
+
+        period = timedelta(days=get_config().subscription_period_days)
+        assert first is not None
+        _assert_close((await _user(session_factory, 42)).subscription_expires_at, first + period)
+
+    _run_with_service(database_url, monkeypatch, scenario)
+
+
+def test_payment_queued_twice_is_credited_once(
+    database_url: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def scenario(server: Any, service: PaymentsService, session_factory: Any) -> None:
+        await _post(server, PAID)
+        # Та же активация из дочитывания необработанных платежей при старте.
+        await service._enqueue_unprocessed()
+        batch = await service._next_batch()
+        assert len(batch) == 2
+        await service._activate(batch)
+        # Повтор пачки, коммит которой на самом деле прошёл.
+        await service._activate(batch)
+
+        period = timedelta(days=get_config().subscription_period_days)
+        now = datetime.now(tz=timezone.utc)
+        _assert_close((await _user(session_factory, 42)).subscription_expires_at, now + period)
+
+    _run_with_service(database_url, monkeypatch, scenario)